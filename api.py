@@ -1,15 +1,215 @@
-import requests
+import contextlib
+import importlib
+import json
+import threading
+import time
+
+from response_cache import ResponseCache, CACHE_DIR
+
+
+class _LazyModule:
+    # requests импортируется при первом обращении: сам импорт занимает
+    # ~100 мс, а расчёты и чтение курсов из базы в нём не нуждаются
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+
+requests = _LazyModule("requests")
 
 API_URL = 'https://www.cbr-xml-daily.ru/daily_json.js'
+# Подключение и чтение (сек.): зависший сервер должен давать ошибку и
+# открывать автомат, а не держать GUI и блокировку кэша бесконечно
+FETCH_TIMEOUT = (5.0, 10.0)
 
-def fetch_rates() -> dict:
+# None отключает общий дисковый кэш ответов
+RESPONSE_CACHE_DIR = CACHE_DIR
+
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_RECOVERY_TIMEOUT = 30.0
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 recovery_timeout: float = BREAKER_RECOVERY_TIMEOUT,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._listeners = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._opened_at = 0.0
+            self._probe_in_flight = False
+            self._stats = {
+                "successes": 0,
+                "failures": 0,
+                "short_circuited": 0,
+                "served_from_snapshot": 0,
+                "opened": 0,
+            }
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def add_listener(self, callback):
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _transition(self, new_state: str):
+        # Вызывается под self._lock, уведомления рассылаются после его освобождения
+        old_state = self._state
+        self._state = new_state
+        if new_state == self.OPEN:
+            self._opened_at = self._clock()
+            self._stats["opened"] += 1
+        return old_state, new_state
+
+    def _notify(self, change):
+        if change is None or change[0] == change[1]:
+            return
+        for callback in list(self._listeners):
+            callback(*change)
+
+    def allow(self) -> bool:
+        change = None
+        with self._lock:
+            if self._state == self.OPEN:
+                if self._clock() - self._opened_at < self.recovery_timeout:
+                    self._stats["short_circuited"] += 1
+                    return False
+                change = self._transition(self.HALF_OPEN)
+            if self._state == self.HALF_OPEN:
+                if self._probe_in_flight:
+                    self._stats["short_circuited"] += 1
+                    allowed = False
+                else:
+                    self._probe_in_flight = True
+                    allowed = True
+            else:
+                allowed = True
+        self._notify(change)
+        return allowed
+
+    def record_success(self):
+        with self._lock:
+            self._stats["successes"] += 1
+            self._failures = 0
+            self._probe_in_flight = False
+            change = self._transition(self.CLOSED)
+        self._notify(change)
+
+    def record_failure(self):
+        change = None
+        with self._lock:
+            self._stats["failures"] += 1
+            self._failures += 1
+            if self._state == self.HALF_OPEN:
+                self._probe_in_flight = False
+                change = self._transition(self.OPEN)
+            elif self._state == self.CLOSED and self._failures >= self.failure_threshold:
+                change = self._transition(self.OPEN)
+        self._notify(change)
+
+    def record_snapshot_served(self):
+        with self._lock:
+            self._stats["served_from_snapshot"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "state": self._state,
+                "consecutive_failures": self._failures,
+                **self._stats,
+            }
+
+
+breaker = CircuitBreaker()
+_last_rates = None
+_response_cache = None
+
+
+def get_response_cache():
+    global _response_cache
+    if not RESPONSE_CACHE_DIR:
+        return None
+    if _response_cache is None or _response_cache.directory != RESPONSE_CACHE_DIR:
+        _response_cache = ResponseCache(RESPONSE_CACHE_DIR)
+    return _response_cache
+
+
+def _extract_rates(data: dict) -> dict:
+    if data.get("success", True):
+        return data['Valute']
+    raise ValueError("API returned an error")
+
+
+def _cached_rates(cache, allow_stale: bool = False):
+    if cache is None:
+        return None
+    payload = cache.get(API_URL, allow_stale=allow_stale)
+    if payload is None:
+        return None
     try:
-        resp = requests.get(API_URL)
-        resp.raise_for_status()
-        data = resp.json()
-        if data.get("success", True):
-            return data['Valute']
-        else:
-            raise ValueError("API returned an error")
-    except Exception as e:
-        raise RuntimeError(f"Failed to fetch rates: {e}")
\ No newline at end of file
+        return _extract_rates(json.loads(payload))
+    except (ValueError, KeyError, AttributeError):
+        return None
+
+
+def fetch_rates() -> dict:
+    global _last_rates
+
+    cache = get_response_cache()
+    rates = _cached_rates(cache)
+    if rates is not None:
+        _last_rates = rates
+        return rates
+
+    if not breaker.allow():
+        rates = _last_rates if _last_rates is not None else _cached_rates(cache, allow_stale=True)
+        if rates is not None:
+            breaker.record_snapshot_served()
+            return rates
+        raise CircuitOpenError("Failed to fetch rates: circuit breaker is open")
+
+    with cache.lock(API_URL) if cache is not None else contextlib.nullcontext():
+        # Пока ждали блокировку, другой процесс мог уже обновить кэш
+        rates = _cached_rates(cache)
+        if rates is None:
+            try:
+                resp = requests.get(API_URL, timeout=FETCH_TIMEOUT)
+                resp.raise_for_status()
+                rates = _extract_rates(resp.json())
+            except Exception as e:
+                breaker.record_failure()
+                raise RuntimeError(f"Failed to fetch rates: {e}")
+            if cache is not None and isinstance(resp.content, bytes):
+                with contextlib.suppress(OSError):
+                    cache.put(API_URL, resp.content)
+
+    breaker.record_success()
+    _last_rates = rates
+    return rates
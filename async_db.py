@@ -0,0 +1,153 @@
+import asyncio
+import queue
+import threading
+
+import db
+
+MAX_BATCH = 256
+
+_READ = "read"
+_WRITE = "write"
+
+
+def _resolve(future: asyncio.Future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class AsyncRateStore:
+    # Все обращения к SQLite выполняет один поток; корутины только ставят
+    # запросы в очередь и ждут future, поэтому event loop не блокируется
+    def __init__(self, max_batch: int = MAX_BATCH):
+        self.max_batch = max_batch
+        self.stats = {"requests": 0, "batches": 0, "commits": 0}
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _ensure_thread(self):
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("AsyncRateStore is closed")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="rates-db", daemon=True)
+                self._thread.start()
+
+    def _submit(self, kind: str, func, *args) -> asyncio.Future:
+        self._ensure_thread()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put((kind, func, args, loop, future))
+        return future
+
+    def _run(self):
+        conn = db.connect()
+        try:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    break
+                batch = [item]
+                while len(batch) < self.max_batch:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is None:
+                        self._process(conn, batch)
+                        return
+                    batch.append(item)
+                self._process(conn, batch)
+        finally:
+            conn.close()
+
+    def _process(self, conn, batch: list):
+        self.stats["batches"] += 1
+        self.stats["requests"] += len(batch)
+        pending = []
+        for kind, func, args, loop, future in batch:
+            if kind == _READ:
+                # Чтение должно видеть все записи, поставленные в очередь раньше
+                self._commit(conn, pending)
+                pending = []
+                try:
+                    result, error = func(conn.cursor(), *args), None
+                except Exception as e:
+                    result, error = None, e
+                loop.call_soon_threadsafe(_resolve, future, result, error)
+            else:
+                if not conn.in_transaction:
+                    conn.execute("BEGIN")
+                try:
+                    # Ошибка одного запроса не должна откатывать остальные записи пакета
+                    conn.execute("SAVEPOINT request")
+                    result = func(conn.cursor(), *args)
+                    conn.execute("RELEASE request")
+                    pending.append((loop, future, result))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO request")
+                    conn.execute("RELEASE request")
+                    loop.call_soon_threadsafe(_resolve, future, None, e)
+        self._commit(conn, pending)
+
+    def _commit(self, conn, pending: list):
+        if not pending:
+            return
+        try:
+            conn.commit()
+            self.stats["commits"] += 1
+        except Exception as e:
+            conn.rollback()
+            for loop, future, _ in pending:
+                loop.call_soon_threadsafe(_resolve, future, None, e)
+            return
+        for loop, future, result in pending:
+            if isinstance(result, list):
+                db.notify_rate_listeners(result)
+            loop.call_soon_threadsafe(_resolve, future, result, None)
+
+    async def get_saved_rate(self, target_currency: str = 'USD') -> float:
+        return await self._submit(_READ, _get_saved_rate, target_currency)
+
+    async def get_all_rates(self) -> dict:
+        return await self._submit(_READ, _get_all_rates)
+
+    async def save_rate(self, id: int, target_currency: str, rate: float):
+        await self._submit(_WRITE, _save_rate, id, target_currency, rate)
+
+    async def update_rates(self, rates: dict) -> list:
+        return await self._submit(_WRITE, db.write_rate_changes, rates)
+
+    async def close(self):
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            await asyncio.get_running_loop().run_in_executor(None, thread.join)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+def _get_saved_rate(cur, target_currency: str):
+    cur.execute("SELECT rate FROM rates WHERE currency=?", (target_currency,))
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+def _get_all_rates(cur) -> dict:
+    cur.execute("SELECT currency, rate FROM rates")
+    return dict(cur.fetchall())
+
+
+def _save_rate(cur, id: int, target_currency: str, rate: float):
+    cur.execute(db.UPSERT_RATE_SQL, (id, target_currency, rate, db._fetched_at()))
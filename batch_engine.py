@@ -0,0 +1,111 @@
+import numpy as np
+
+from day_count import ACT_365, payment_calendar
+from engine import DifferentiatedQuote, LoanQuote
+
+
+def annuity_payments(loans, months, annuals) -> np.ndarray:
+    loans = np.asarray(loans, dtype=np.float64)
+    months = np.asarray(months, dtype=np.float64)
+    monthly = np.asarray(annuals, dtype=np.float64) / 12 / 100
+    with np.errstate(divide="ignore", invalid="ignore"):
+        payments = (loans * monthly) / (1 - (1 + monthly) ** -months)
+    return np.where(1 + monthly == 1, loans / months, payments)
+
+
+def quote_batch(loans, months, annuals) -> tuple:
+    payments = annuity_payments(loans, months, annuals)
+    totals = payments * np.asarray(months, dtype=np.float64)
+    return payments, totals, totals - np.asarray(loans, dtype=np.float64)
+
+
+def quote_loans(loans, months, annuals) -> list:
+    payments, totals, interests = quote_batch(loans, months, annuals)
+    return [LoanQuote(*row) for row in zip(payments.tolist(), totals.tolist(), interests.tolist())]
+
+
+def schedule_columns(loans, months, annuals) -> tuple:
+    # Графики всех кредитов подряд: номер кредита, месяц, платёж, проценты,
+    # тело и остаток, посчитанные в замкнутой форме без цикла по месяцам
+    loans = np.asarray(loans, dtype=np.float64)
+    terms = np.asarray(months, dtype=np.int64)
+    monthly = np.asarray(annuals, dtype=np.float64) / 12 / 100
+    payments = annuity_payments(loans, terms, annuals)
+
+    index = np.repeat(np.arange(len(terms), dtype=np.int64), terms)
+    starts = np.cumsum(terms) - terms
+    month = np.arange(len(index), dtype=np.int64) - np.repeat(starts, terms) + 1
+
+    rate, payment, loan = monthly[index], payments[index], loans[index]
+    growth = (1 + rate) ** (month - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        opening = loan * growth - payment * (growth - 1) / rate
+    opening = np.where(1 + rate == 1, loan - payment * (month - 1), opening)
+    interest = opening * rate
+    principal = payment - interest
+    balance = np.where(month == terms[index], 0.0, opening - principal)
+    return index, month, payment, interest, principal, balance
+
+
+def differentiated_batch(loans, months, annuals) -> tuple:
+    loans = np.asarray(loans, dtype=np.float64)
+    terms = np.asarray(months, dtype=np.float64)
+    monthly = np.asarray(annuals, dtype=np.float64) / 12 / 100
+    principal = loans / terms
+    interest = monthly * loans * (terms + 1) / 2
+    return principal + loans * monthly, principal * (1 + monthly), loans + interest, interest
+
+
+def quote_differentiated_loans(loans, months, annuals) -> list:
+    columns = (column.tolist() for column in differentiated_batch(loans, months, annuals))
+    return [DifferentiatedQuote(*row) for row in zip(*columns)]
+
+
+def differentiated_columns(loans, months, annuals) -> tuple:
+    # Те же столбцы, что у schedule_columns, для дифференцированных платежей
+    loans = np.asarray(loans, dtype=np.float64)
+    terms = np.asarray(months, dtype=np.int64)
+    monthly = np.asarray(annuals, dtype=np.float64) / 12 / 100
+
+    index = np.repeat(np.arange(len(terms), dtype=np.int64), terms)
+    starts = np.cumsum(terms) - terms
+    month = np.arange(len(index), dtype=np.int64) - np.repeat(starts, terms) + 1
+
+    principal = (loans / terms)[index]
+    opening = loans[index] - principal * (month - 1)
+    interest = opening * monthly[index]
+    balance = np.where(month == terms[index], 0.0, opening - principal)
+    return index, month, principal + interest, interest, principal, balance
+
+
+def dated_schedule_columns(loans, months, annuals, start, convention: str = ACT_365) -> tuple:
+    # Те же столбцы, что у schedule_columns, с процентами по фактическим дням.
+    # Кредиты группируются по сроку: календарь продукта берётся из кэша
+    # payment_calendar, а графики группы считаются одной матрицей
+    loans = np.asarray(loans, dtype=np.float64)
+    terms = np.asarray(months, dtype=np.int64)
+    annuals = np.asarray(annuals, dtype=np.float64)
+
+    index = np.repeat(np.arange(len(terms), dtype=np.int64), terms)
+    starts = np.cumsum(terms) - terms
+    month = np.arange(len(index), dtype=np.int64) - np.repeat(starts, terms) + 1
+    payment, interest, principal, balance = (np.empty(len(index)) for _ in range(4))
+
+    for term in np.unique(terms):
+        group = np.flatnonzero(terms == term)
+        fractions = np.asarray(payment_calendar(start, int(term), convention).fractions)
+        rates = annuals[group, None] / 100 * fractions
+        growth = np.cumprod(1 + rates, axis=1)
+        discounts = np.cumsum(1 / growth, axis=1)
+        payments = loans[group] / discounts[:, -1]
+        # Остаток после k платежей: G_k * (loan - P * sum_{j<=k} 1 / G_j)
+        closing = growth * (loans[group, None] - payments[:, None] * discounts)
+        closing[:, -1] = 0.0
+        opening = np.hstack([loans[group, None], closing[:, :-1]])
+
+        rows = (starts[group, None] + np.arange(term)).ravel()
+        payment[rows] = np.repeat(payments, term)
+        interest[rows] = (opening * rates).ravel()
+        principal[rows] = payment[rows] - interest[rows]
+        balance[rows] = closing.ravel()
+    return index, month, payment, interest, principal, balance
@@ -0,0 +1,62 @@
+import asyncio
+
+from batch_engine import quote_loans
+from engine import LoanQuote
+
+DEFAULT_MAX_BATCH = 256
+DEFAULT_MAX_DELAY = 0.002
+
+
+class QuoteBatcher:
+    # Собирает запросы до max_batch штук или max_delay секунд и считает их
+    # одним векторным вызовом; одинаковые запросы внутри окна считаются один раз.
+    # max_delay ограничивает добавочную задержку, max_batch — размер пакета
+    def __init__(self, max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY):
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.stats = {"requests": 0, "coalesced": 0, "batches": 0, "computed": 0}
+        self._pending = {}
+        self._size = 0
+        self._timer = None
+
+    async def quote(self, loan: float, months: int, annual: float) -> LoanQuote:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        key = (float(loan), int(months), float(annual))
+        self.stats["requests"] += 1
+        waiters = self._pending.get(key)
+        if waiters is None:
+            self._pending[key] = [future]
+        else:
+            waiters.append(future)
+            self.stats["coalesced"] += 1
+        self._size += 1
+
+        if self._size >= self.max_batch or self.max_delay <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self.flush)
+        return await future
+
+    def flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+        pending, self._pending, self._size = self._pending, {}, 0
+        keys = list(pending)
+        self.stats["batches"] += 1
+        self.stats["computed"] += len(keys)
+        try:
+            quotes = quote_loans(*zip(*keys))
+        except Exception as e:
+            for waiters in pending.values():
+                for future in waiters:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+        for key, quote in zip(keys, quotes):
+            for future in pending[key]:
+                if not future.done():
+                    future.set_result(quote)
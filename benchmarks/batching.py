@@ -0,0 +1,75 @@
+"""Throughput vs latency of the quote micro-batcher for different knob settings.
+
+    python -m benchmarks.batching --connections 32 --pipeline 8 --duration 3
+"""
+import argparse
+import asyncio
+import subprocess
+import sys
+import time
+
+from batching import QuoteBatcher
+from benchmarks.load_service import _free_port, run as run_load
+from engine import quote_loan
+
+SETTINGS = [(1, 0.0), (64, 0.0005), (256, 0.002), (1024, 0.005)]
+
+
+async def _in_process(max_batch: int, max_delay: float, callers: int, per_caller: int) -> dict:
+    batcher = QuoteBatcher(max_batch, max_delay) if max_delay > 0 else None
+    latencies = []
+
+    async def caller(seed: int):
+        for i in range(per_caller):
+            loan, months, annual = 1000.0 * (seed + i + 1), 12 + (i % 5) * 12, 9.5 + seed % 7
+            started = time.perf_counter()
+            if batcher is None:
+                quote_loan(loan, months, annual)
+                await asyncio.sleep(0)
+            else:
+                await batcher.quote(loan, months, annual)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(caller(seed) for seed in range(callers)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return {"qps": len(latencies) / elapsed,
+            "p50_ms": latencies[len(latencies) // 2] * 1000,
+            "p99_ms": latencies[int(len(latencies) * 0.99)] * 1000,
+            "batches": batcher.stats["batches"] if batcher else len(latencies)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--pipeline", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--callers", type=int, default=1000)
+    parser.add_argument("--per-caller", type=int, default=100)
+    args = parser.parse_args()
+
+    print("In-process dispatcher (no HTTP):")
+    for max_batch, max_delay in SETTINGS:
+        stats = asyncio.run(_in_process(max_batch, max_delay, args.callers, args.per_caller))
+        print(f"  max_batch={max_batch:>5} max_delay={max_delay * 1000:5.1f}ms  {stats['qps']:>10.0f} quotes/s  "
+              f"p50={stats['p50_ms']:7.3f}ms p99={stats['p99_ms']:7.3f}ms batches={stats['batches']}")
+
+    print("HTTP service /quote:")
+    for max_batch, max_delay in SETTINGS:
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, "service.py", "--port", str(port), "--max-batch", str(max_batch),
+                                   "--max-delay-ms", str(max_delay * 1000)], stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()
+        try:
+            stats = asyncio.run(run_load("127.0.0.1", port, "/quote", args.connections, args.pipeline,
+                                         args.duration, 1))
+        finally:
+            server.terminate()
+            server.wait()
+        print(f"  max_batch={max_batch:>5} max_delay={max_delay * 1000:5.1f}ms  {stats['rps']:>10.0f} req/s     "
+              f"p50={stats['p50_ms']:7.3f}ms p99={stats['p99_ms']:7.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Batched ПСК and XIRR: loans solved per second and Newton iterations.
+
+    python -m benchmarks.credit_cost --loans 100000
+"""
+import argparse
+import time
+
+import numpy as np
+
+from credit_cost import full_cost, loan_flows, xirr
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loans", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    loans = rng.uniform(1e5, 5e6, args.loans)
+    months = rng.integers(12, 121, args.loans)
+    annuals = rng.uniform(5, 25, args.loans)
+    monthly = annuals / 1200
+
+    started = time.perf_counter()
+    index, dates, amounts = loan_flows(loans, months, annuals, "2026-03-10", loans * 0.01, 500.0)
+    print(f"  {'cash flows':<10} {len(amounts):>11,} flows  {time.perf_counter() - started:8.3f} s")
+
+    for name, solve, guess in (("ПСК", full_cost, monthly), ("XIRR", xirr, (1 + monthly) ** 12 - 1)):
+        started = time.perf_counter()
+        _, converged, iterations = solve(index, dates, amounts, guess=guess)
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<10} {args.loans / elapsed:>11,.0f} loans/s {elapsed:8.3f} s  "
+              f"iterations max {iterations.max()}, mean {iterations.mean():.1f}  not converged {(~converged).sum()}")
+
+
+if __name__ == "__main__":
+    main()
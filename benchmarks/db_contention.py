@@ -0,0 +1,113 @@
+"""Reader latency under a concurrent writer: rollback journal vs WAL.
+
+    python -m benchmarks.db_contention --readers 4 --duration 3
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import db
+
+LEGACY_PRAGMAS = {"journal_mode": "DELETE"}
+CURRENCIES = [f"C{i:02d}" for i in range(40)]
+
+
+def _percentile(values: list, p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _reader(path: str, pragmas: dict, stop_at: float, results):
+    db.DB_NAME = path
+    db.STORAGE_PRAGMAS = pragmas
+    latencies = []
+    errors = 0
+    conn = db.connect()
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        try:
+            conn.execute("SELECT rate FROM rates WHERE currency=?", (random.choice(CURRENCIES),)).fetchone()
+        except sqlite3.OperationalError:
+            errors += 1
+            continue
+        latencies.append(time.perf_counter() - started)
+    conn.close()
+    results.put((latencies, errors))
+
+
+def _writer(path: str, pragmas: dict, stop_at: float, results):
+    db.DB_NAME = path
+    db.STORAGE_PRAGMAS = pragmas
+    writes = 0
+    while time.time() < stop_at:
+        payload = {c: {"Value": random.uniform(1, 100)} for c in CURRENCIES}
+        try:
+            db.update_rates(payload)
+            writes += 1
+        except sqlite3.OperationalError:
+            pass
+    results.put(writes)
+
+
+def run(pragmas: dict, readers: int, duration: float) -> dict:
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        db.DB_NAME = path
+        db.STORAGE_PRAGMAS = pragmas
+        db.init_db()
+        db.update_rates({c: {"Value": 1.0} for c in CURRENCIES})
+
+        ctx = multiprocessing.get_context("spawn")
+        reader_results, writer_results = ctx.Queue(), ctx.Queue()
+        stop_at = time.time() + duration + 1.0
+        procs = [ctx.Process(target=_reader, args=(path, pragmas, stop_at, reader_results)) for _ in range(readers)]
+        procs.append(ctx.Process(target=_writer, args=(path, pragmas, stop_at, writer_results)))
+        for proc in procs:
+            proc.start()
+
+        latencies, errors = [], 0
+        for _ in range(readers):
+            chunk, chunk_errors = reader_results.get()
+            latencies.extend(chunk)
+            errors += chunk_errors
+        writes = writer_results.get()
+        for proc in procs:
+            proc.join()
+    finally:
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(path + suffix):
+                os.unlink(path + suffix)
+
+    return {
+        "reads": len(latencies),
+        "errors": errors,
+        "writes": writes,
+        "p50_us": _percentile(latencies, 0.50) * 1e6,
+        "p99_us": _percentile(latencies, 0.99) * 1e6,
+        "max_us": max(latencies, default=float("nan")) * 1e6,
+        "mean_us": (statistics.fmean(latencies) if latencies else float("nan")) * 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=3.0)
+    args = parser.parse_args()
+
+    for label, pragmas in (("rollback journal", LEGACY_PRAGMAS), ("WAL + tuned pragmas", dict(db.STORAGE_PRAGMAS))):
+        stats = run(pragmas, args.readers, args.duration)
+        print(f"{label:22} reads={stats['reads']:>8} writes={stats['writes']:>6} errors={stats['errors']:>4} "
+              f"p50={stats['p50_us']:8.1f}us p99={stats['p99_us']:9.1f}us max={stats['max_us']:10.1f}us")
+
+
+if __name__ == "__main__":
+    main()
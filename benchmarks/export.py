@@ -0,0 +1,57 @@
+"""Schedule export throughput: per-row f-strings vs block CSV vs binary columnar.
+
+    python -m benchmarks.export --loans 20000 --months 360
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from engine import schedule
+from export import read_schedule_binary, write_schedule_binary, write_schedule_csv
+
+
+def _loans(count: int, months: int):
+    return [(100000.0 + 1000 * (i % 500), months, 9.5 + (i % 12)) for i in range(count)]
+
+
+def _naive_csv(loans, path: str) -> int:
+    rows = 0
+    with open(path, "w") as f:
+        f.write("loan,month,payment,interest,principal,balance\n")
+        for index, (loan, months, annual) in enumerate(loans):
+            for row in schedule(loan, months, annual):
+                f.write(f"{index},{row.month},{row.payment:.2f},{row.interest:.2f},"
+                        f"{row.principal:.2f},{row.balance:.2f}\n")
+                rows += 1
+    return rows
+
+
+def _measure(name: str, func, loans, path: str):
+    started = time.perf_counter()
+    rows = func(loans, path)
+    elapsed = time.perf_counter() - started
+    size = os.path.getsize(path)
+    print(f"  {name:<22} {rows:>11,} rows  {rows / elapsed:>12,.0f} rows/s  {size / elapsed / 2 ** 20:>8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loans", type=int, default=20000)
+    parser.add_argument("--months", type=int, default=360)
+    args = parser.parse_args()
+
+    loans = _loans(args.loans, args.months)
+    with tempfile.TemporaryDirectory() as directory:
+        _measure("row-by-row f-strings", _naive_csv, loans, os.path.join(directory, "naive.csv"))
+        _measure("block CSV", write_schedule_csv, loans, os.path.join(directory, "block.csv"))
+        path = os.path.join(directory, "book.sched")
+        _measure("binary columnar", write_schedule_binary, loans, path)
+
+        started = time.perf_counter()
+        rows = sum(len(block[0]) for block in read_schedule_binary(path))
+        print(f"  {'binary read back':<22} {rows:>11,} rows  {rows / (time.perf_counter() - started):>12,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Cold import time of the headless entry points and which heavy modules they pull in.
+
+    python -m benchmarks.import_time --runs 7
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+
+TARGET_MS = 30.0
+MODULES = ["cli", "engine", "db", "api", "async_db", "pipeline", "service", "main"]
+HEAVY = ["tkinter", "requests", "numpy"]
+
+
+def import_time_ms(module: str) -> float:
+    # -X importtime пишет в stderr накопленное время каждого импорта в мкс;
+    # последняя строка — сам модуль вместе со всеми зависимостями
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, check=True)
+    line = [line for line in result.stderr.splitlines() if line.rstrip().endswith(f"| {module}")][-1]
+    return int(line.split("|")[1]) / 1000
+
+
+def loaded_heavy(module: str) -> list:
+    code = f"import sys, {module}; print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    return subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout.split()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    for module in MODULES:
+        median = statistics.median(import_time_ms(module) for _ in range(args.runs))
+        heavy = ", ".join(loaded_heavy(module)) or "-"
+        print(f"  {module:<10} {median:7.1f} ms   loads: {heavy}")
+
+    cli = statistics.median(import_time_ms("cli") for _ in range(args.runs))
+    verdict = "OK" if cli < TARGET_MS else "OVER"
+    print(f"\n  headless CLI import: {cli:.1f} ms (target < {TARGET_MS:.0f} ms) {verdict}")
+    sys.exit(0 if cli < TARGET_MS else 1)
+
+
+if __name__ == "__main__":
+    main()
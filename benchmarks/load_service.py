@@ -0,0 +1,117 @@
+"""Load test for service.py: requests per second and p50/p99 latency on localhost.
+
+    python -m benchmarks.load_service --connections 16 --pipeline 8 --duration 5
+    python -m benchmarks.load_service --port 8080 --endpoint /batch --batch-size 100
+"""
+import argparse
+import asyncio
+import json
+import random
+import socket
+import subprocess
+import sys
+import time
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _body(endpoint: str, batch_size: int) -> bytes:
+    def loan():
+        return {"loan": random.randint(10, 5000) * 1000, "months": random.choice([12, 24, 36, 60, 120, 360]),
+                "annual": random.choice([9.5, 12.0, 14.9, 17.0, 21.5])}
+
+    if endpoint == "/batch":
+        return json.dumps({"loans": [loan() for _ in range(batch_size)]}).encode()
+    if endpoint == "/convert":
+        return json.dumps({"amount": random.uniform(100, 10000), "currency": "USD"}).encode()
+    return json.dumps(loan()).encode()
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = 0
+    for line in head.split(b"\r\n"):
+        if line.lower().startswith(b"content-length:"):
+            length = int(line.split(b":", 1)[1])
+    await reader.readexactly(length)
+    return status
+
+
+async def _connection(host, port, endpoint, pipeline, batch_size, stop_at, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < stop_at:
+            sent = []
+            for _ in range(pipeline):
+                body = _body(endpoint, batch_size)
+                writer.write(
+                    f"POST {endpoint} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+                )
+                sent.append(time.perf_counter())
+            await writer.drain()
+            for started in sent:
+                status = await _read_response(reader)
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+    finally:
+        writer.close()
+
+
+async def run(host, port, endpoint, connections, pipeline, duration, batch_size) -> dict:
+    latencies, statuses = [], {}
+    started = time.perf_counter()
+    stop_at = started + duration
+    await asyncio.gather(*(
+        _connection(host, port, endpoint, pipeline, batch_size, stop_at, latencies, statuses)
+        for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float("nan")
+
+    return {"requests": len(latencies), "rps": len(latencies) / elapsed, "p50_ms": percentile(0.50),
+            "p99_ms": percentile(0.99), "statuses": statuses}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, help="Target a running service instead of starting one")
+    parser.add_argument("--endpoint", default="/quote", choices=["/quote", "/schedule", "/convert", "/batch"])
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--pipeline", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+
+    server = None
+    port = args.port
+    if port is None:
+        port = _free_port()
+        server = subprocess.Popen([sys.executable, "service.py", "--host", args.host, "--port", str(port)],
+                                  stdout=subprocess.PIPE, text=True)
+        server.stdout.readline()
+    try:
+        stats = asyncio.run(run(args.host, port, args.endpoint, args.connections, args.pipeline,
+                                args.duration, args.batch_size))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    per_request = args.batch_size if args.endpoint == "/batch" else 1
+    print(f"{args.endpoint}: {stats['requests']} requests, {stats['rps']:.0f} req/s "
+          f"({stats['rps'] * per_request:.0f} loans/s), p50={stats['p50_ms']:.2f}ms p99={stats['p99_ms']:.2f}ms, "
+          f"statuses={stats['statuses']}")
+
+
+if __name__ == "__main__":
+    main()
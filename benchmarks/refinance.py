@@ -0,0 +1,45 @@
+"""Refinancing offer scoring: per-request latency of score + top-k vs a full sort.
+
+    python -m benchmarks.refinance --offers 10000 --top 10
+"""
+import argparse
+import time
+
+import numpy as np
+
+from refinance import best_offers, score_offers
+
+
+def _median_ms(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--offers", type=int, default=10000)
+    parser.add_argument("--top", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    annuals = rng.uniform(3, 20, args.offers)
+    terms = rng.integers(6, 240, args.offers)
+    fees = rng.choice([0.0, 1000.0, 5000.0, 20000.0], args.offers)
+
+    def score():
+        return score_offers(3000000.0, 240, 14.0, annuals, terms, fees, paid_months=36)
+
+    scores = score()
+    print(f"  {'score all offers':<22} {_median_ms(score, args.repeats):8.3f} ms")
+    print(f"  {'top-k argpartition':<22} {_median_ms(lambda: best_offers(scores, args.top), args.repeats):8.3f} ms")
+    print(f"  {'full argsort':<22} {_median_ms(lambda: np.argsort(-scores.npv), args.repeats):8.3f} ms")
+    print(f"  {'request total':<22} {_median_ms(lambda: best_offers(score(), args.top), args.repeats):8.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
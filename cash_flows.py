@@ -0,0 +1,173 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from collections import namedtuple
+
+import numpy as np
+
+import db
+from batch_engine import annuity_payments
+from pipeline import parse_record
+
+DEFAULT_HORIZON = 120
+
+CashFlowForecast = namedtuple("CashFlowForecast", ["months", "interest", "principal", "beyond_interest",
+                                                   "beyond_principal", "currency"])
+
+
+def accumulate_shard(loans, months, annuals, offsets, horizon: int) -> tuple:
+    # Ожидаемые проценты и тело по месяцам для части портфеля. offsets — номер
+    # корзины первого платежа каждого кредита (отрицательный — кредит выдан раньше
+    # начала прогноза). Графики кредитов не строятся: за месяц все живые кредиты
+    # сдвигаются на один платёж векторно, и в корзину попадают только суммы.
+    # Последний элемент массивов — всё, что приходится на месяцы после горизонта
+    loans = np.asarray(loans, dtype=np.float64)
+    terms = np.asarray(months, dtype=np.int64)
+    monthly = np.asarray(annuals, dtype=np.float64) / 12 / 100
+    offsets = np.asarray(offsets, dtype=np.int64)
+    payments = annuity_payments(loans, terms, annuals)
+    interest, principal = np.zeros(horizon + 1), np.zeros(horizon + 1)
+
+    # Платежи до начала прогноза пропускаются замкнутой формулой остатка
+    paid = np.clip(-offsets, 0, terms)
+    growth = (1 + monthly) ** paid
+    with np.errstate(divide="ignore", invalid="ignore"):
+        balances = loans * growth - payments * (growth - 1) / monthly
+    balances = np.where(1 + monthly == 1, loans - payments * paid, balances)
+    remaining = terms - paid
+    starts = np.maximum(offsets, 0)
+
+    order = np.argsort(starts, kind="stable")
+    order = order[remaining[order] > 0]
+    starts, balances, monthly, payments, remaining = (column[order] for column in
+                                                      (starts, balances, monthly, payments, remaining))
+
+    live = [np.zeros(0), np.zeros(0), np.zeros(0), np.zeros(0, dtype=np.int64)]
+    joined = 0
+    for month in range(horizon):
+        # Кредиты с первым платежом в этом месяце присоединяются к живым
+        until = np.searchsorted(starts, month, side="right")
+        if until > joined:
+            live = [np.concatenate([current, new[joined:until]]) for current, new in
+                    zip(live, (balances, monthly, payments, remaining))]
+            joined = until
+        balance, rate, payment, left = live
+        if not len(balance):
+            if joined == len(starts):
+                break
+            continue
+
+        # Последний платёж гасит остаток целиком; у погашенных, но ещё не
+        # отброшенных кредитов остаток нулевой, и они ничего не добавляют
+        accrued = balance * rate
+        repaid = np.where(left > 1, payment - accrued, balance)
+        interest[month] = accrued.sum()
+        principal[month] = repaid.sum()
+        balance -= repaid
+        left -= 1
+
+        finished = np.count_nonzero(left <= 0)
+        if finished * 4 > len(left):
+            keep = left > 0
+            live = [column[keep] for column in live]
+
+    # После горизонта: остаток долга и проценты по оставшимся аннуитетным платежам
+    balance, _, payment, left = live
+    left = np.maximum(left, 0)
+    waiting = slice(joined, None)
+    interest[horizon] = (payment * left).sum() - balance.sum() + \
+        (payments[waiting] * remaining[waiting]).sum() - balances[waiting].sum()
+    principal[horizon] = balance.sum() + balances[waiting].sum()
+    return interest, principal
+
+
+def aggregate_book(loans, months, annuals, starts, first, horizon: int = DEFAULT_HORIZON, processes: int = 1,
+                   currency: str = None, rates: dict = None) -> CashFlowForecast:
+    # starts — месяц первого платежа каждого кредита ("ГГГГ-ММ"), first — первый
+    # месяц прогноза. Портфель делится на processes частей, частичные суммы
+    # складываются; при currency итог пересчитывается по сохранённому курсу
+    rate = None
+    if currency is not None:
+        rates = db.get_all_rates() if rates is None else rates
+        if currency not in rates:
+            raise KeyError(f"No saved rate for {currency}")
+        rate = rates[currency]
+
+    first = np.datetime64(first, "M")
+    offsets = (np.asarray(starts, dtype="datetime64[M]") - first).astype(np.int64)
+    columns = (np.asarray(loans, dtype=np.float64), np.asarray(months, dtype=np.int64),
+               np.asarray(annuals, dtype=np.float64), offsets)
+
+    if processes > 1 and len(offsets) > processes:
+        splits = [np.array_split(column, processes) for column in columns]
+        shards = [[split[number] for split in splits] + [horizon] for number in range(processes)]
+        with multiprocessing.Pool(processes) as pool:
+            partials = pool.starmap(accumulate_shard, shards)
+        interest = np.sum([part[0] for part in partials], axis=0)
+        principal = np.sum([part[1] for part in partials], axis=0)
+    else:
+        interest, principal = accumulate_shard(*columns, horizon)
+
+    if rate is not None:
+        interest, principal = interest / rate, principal / rate
+    return CashFlowForecast(first + np.arange(horizon), interest[:horizon], principal[:horizon], interest[horizon],
+                            principal[horizon], currency or "RUB")
+
+
+def read_book(source) -> tuple:
+    # NDJSON с полями loan, months, annual и start — месяцем первого платежа
+    loans, months, annuals, starts = [], [], [], []
+    errors = 0
+    for line in source:
+        if not line.strip():
+            continue
+        try:
+            record, (loan, term, annual) = parse_record(line)
+            start = np.datetime64(record["start"], "M")
+        except (KeyError, TypeError, ValueError):
+            errors += 1
+            continue
+        loans.append(loan)
+        months.append(term)
+        annuals.append(annual)
+        starts.append(start)
+    return (loans, months, annuals, np.array(starts, dtype="datetime64[M]")), errors
+
+
+def write_forecast(forecast: CashFlowForecast, out):
+    out.write("month,interest,principal,total,currency\n")
+    for month, interest, principal in zip(forecast.months, forecast.interest, forecast.principal):
+        out.write("%s,%.2f,%.2f,%.2f,%s\n" % (month, interest, principal, interest + principal, forecast.currency))
+    out.write("beyond,%.2f,%.2f,%.2f,%s\n" % (forecast.beyond_interest, forecast.beyond_principal,
+                                            forecast.beyond_interest + forecast.beyond_principal,
+                                            forecast.currency))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aggregate expected loan book cash flows by calendar month")
+    parser.add_argument("--first", required=True, help="First forecast month, YYYY-MM")
+    parser.add_argument("--horizon", type=int, default=DEFAULT_HORIZON, help="Number of monthly buckets")
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1,
+                        help="Worker processes the book is sharded across")
+    parser.add_argument("--currency", help="Report in this currency using the saved rate")
+    parser.add_argument("--stats", action="store_true", help="Print record counts to stderr")
+    args = parser.parse_args()
+
+    book, errors = read_book(sys.stdin)
+    try:
+        forecast = aggregate_book(*book, args.first, args.horizon, args.processes, args.currency)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        sys.exit(2)
+    try:
+        write_forecast(forecast, sys.stdout)
+    except BrokenPipeError:
+        sys.exit(1)
+    if args.stats:
+        print(json.dumps({"loans": len(book[0]), "errors": errors}), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
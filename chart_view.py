@@ -0,0 +1,110 @@
+import tkinter as tk
+
+import numpy as np
+
+from batch_engine import schedule_columns
+
+CHART_WIDTH = 440
+CHART_HEIGHT = 300
+PADDING = 30
+
+SERIES = (
+    ("balance", "#1f77b4", "Остаток"),
+    ("interest", "#d62728", "Проценты"),
+    ("principal", "#2ca02c", "Тело"),
+)
+
+
+def decimate(values: np.ndarray, columns: int, months: int = None) -> tuple:
+    # Для длинного ряда на каждый столбец пикселей остаются минимум и
+    # максимум, поэтому пики не теряются, а точек не больше 2 * columns.
+    # months — общий диапазон месяцев всех рядов графика: короткий кредит
+    # занимает только свою долю ширины, и месяц везде на одном x
+    count = len(values)
+    months = max(months or count, count)
+    if months <= 2 * columns:
+        return np.arange(count) * (columns - 1) / max(months - 1, 1), values
+    # Первый индекс каждого столбца: ceil(c * months / columns)
+    starts = (np.arange(columns) * months + columns - 1) // columns
+    starts = starts[starts < count]
+    columns = len(starts)
+    lows = np.minimum.reduceat(values, starts)
+    highs = np.maximum.reduceat(values, starts)
+    xs = np.repeat(np.arange(columns, dtype=np.float64), 2)
+    ys = np.empty(2 * columns)
+    ys[0::2], ys[1::2] = lows, highs
+    return xs, ys
+
+
+def polyline(xs: np.ndarray, ys: np.ndarray, left: float, top: float, height: float, scale: float) -> list:
+    points = np.empty(2 * len(xs))
+    points[0::2] = left + xs
+    points[1::2] = top + height - ys * (height / scale if scale else 0.0)
+    return points.tolist()
+
+
+class BalanceChart(tk.Canvas):
+    # Линии создаются один раз и при перерисовке только получают новые
+    # координаты; лишние линии скрываются, а не удаляются
+    def __init__(self, master, width: int = CHART_WIDTH, height: int = CHART_HEIGHT):
+        super().__init__(master, width=width, height=height, background="white", highlightthickness=0)
+        self.series = []
+        self._lines = {}
+        self._frame = self.create_rectangle(0, 0, 0, 0, outline="#999999")
+        self._labels = [self.create_text(0, 0, anchor="w", fill=color, text=title) for _, color, title in SERIES]
+        self._balance_axis = self.create_text(0, 0, anchor="nw", fill="#555555")
+        self._payment_axis = self.create_text(0, 0, anchor="ne", fill="#555555")
+        self.bind("<Configure>", lambda event: self.redraw(event.width, event.height))
+
+    def set_loans(self, loans):
+        # Графики считаются один раз векторно; перерисовка их только прореживает
+        self.series = []
+        if loans:
+            index, _, _, interest, principal, balance = schedule_columns(*zip(*loans))
+            bounds = np.searchsorted(index, np.arange(len(loans) + 1))
+            for start, end in zip(bounds[:-1], bounds[1:]):
+                self.series.append({"balance": balance[start:end], "interest": interest[start:end],
+                                    "principal": principal[start:end]})
+        self.redraw()
+
+    def _line(self, key: tuple, color: str) -> int:
+        item = self._lines.get(key)
+        if item is None:
+            item = self._lines[key] = self.create_line(0, 0, 0, 0, fill=color, width=1)
+        return item
+
+    def redraw(self, width: int = None, height: int = None):
+        width = width or int(self.cget("width"))
+        height = height or int(self.cget("height"))
+        left, top = PADDING, PADDING
+        plot_width, plot_height = max(width - 2 * PADDING, 2), max(height - 2 * PADDING, 2)
+
+        # Остаток — в масштабе суммы кредита, проценты и тело — в масштабе платежа
+        balance_scale = max((s["balance"][0] + s["principal"][0] for s in self.series), default=0.0)
+        payment_scale = max((max(s["interest"].max(), s["principal"].max()) for s in self.series), default=0.0)
+
+        months = max((len(s["balance"]) for s in self.series), default=0)
+        used = set()
+        for number, series in enumerate(self.series):
+            for name, color, _ in SERIES:
+                xs, ys = decimate(series[name], plot_width, months)
+                scale = balance_scale if name == "balance" else payment_scale
+                coords = polyline(xs, ys, left, top, plot_height, scale)
+                if len(coords) < 4:
+                    # Однострочный график: линии нужно хотя бы две точки
+                    coords = coords * 2
+                item = self._line((number, name), color)
+                self.coords(item, *coords)
+                self.itemconfigure(item, state="normal")
+                used.add(item)
+        for item in self._lines.values():
+            if item not in used:
+                self.itemconfigure(item, state="hidden")
+
+        self.coords(self._frame, left, top, left + plot_width, top + plot_height)
+        for offset, label in enumerate(self._labels):
+            self.coords(label, left + offset * 90, top - 15)
+        self.coords(self._balance_axis, left + 2, top + 2)
+        self.itemconfigure(self._balance_axis, text=f"{balance_scale:,.0f}" if self.series else "")
+        self.coords(self._payment_axis, left + plot_width - 2, top + 2)
+        self.itemconfigure(self._payment_axis, text=f"{payment_scale:,.0f} / мес." if self.series else "")
@@ -0,0 +1,184 @@
+import argparse
+import sys
+from datetime import date
+
+import db
+from day_count import CONVENTIONS, dated_schedule
+from loan_events import PaymentHoliday, Prepayment, RateReset, REDUCE_TERM, plan_loan
+from engine import differentiated_schedule, quote_differentiated, quote_loan, schedule, validate_loan
+
+
+def cmd_quote(args) -> int:
+    if args.differentiated:
+        quote = quote_differentiated(args.loan, args.months, args.annual)
+        print(f"Первый платеж: {round(quote.first_payment, 2)} RUB")
+        print(f"Последний платеж: {round(quote.last_payment, 2)} RUB")
+        print(f"Сумма всех платежей: {round(quote.total, 2)} RUB")
+        print(f"Начисленные проценты: {round(quote.interest, 2)} RUB")
+        return 0
+    quote = quote_loan(args.loan, args.months, args.annual)
+    print(f"Ежемесячный платеж: {round(quote.payment, 2)} RUB")
+    print(f"Сумма всех платежей: {round(quote.total, 2)} RUB")
+    print(f"Начисленные проценты: {round(quote.interest, 2)} RUB")
+    return 0
+
+
+def cmd_schedule(args) -> int:
+    out = sys.stdout
+    if args.day_count:
+        if args.differentiated:
+            raise ValueError("--day-count applies to annuity schedules only")
+        out.write("month,date,payment,interest,principal,balance\n")
+        for row in dated_schedule(args.loan, args.months, args.annual, args.start, args.day_count):
+            out.write("%d,%s,%.2f,%.2f,%.2f,%.2f\n" % row)
+        return 0
+    out.write("month,payment,interest,principal,balance\n")
+    rows = differentiated_schedule if args.differentiated else schedule
+    for row in rows(args.loan, args.months, args.annual):
+        out.write("%d,%.2f,%.2f,%.2f,%.2f\n" % row)
+    return 0
+
+
+def cmd_plan(args) -> int:
+    plan = plan_loan(args.loan, args.months, args.annual, args.prepay + args.rate + args.holiday)
+    for segment in plan.segments:
+        print(f"{segment.start:>4}-{segment.end:<4} {segment.annual:6.2f}% {segment.payment:12.2f} "
+              f"{segment.opening:14.2f} -> {segment.closing:14.2f}")
+    print(f"Срок: {plan.months} мес.")
+    print(f"Сумма всех платежей: {round(plan.total_paid, 2)} RUB")
+    print(f"Начисленные проценты: {round(plan.total_interest, 2)} RUB")
+    return 0
+
+
+def cmd_cost(args) -> int:
+    # numpy нужен только этой команде, поэтому импорт ленивый
+    from credit_cost import loan_costs
+
+    psk, effective, converged = loan_costs([args.loan], [args.months], [args.annual], args.start,
+                                           args.upfront_fee, args.monthly_fee)
+    if not converged[0]:
+        print("Расчёт ПСК не сошёлся", file=sys.stderr)
+        return 1
+    print(f"ПСК: {psk[0]:.3f} %")
+    print(f"Эффективная ставка: {effective[0]:.3f} %")
+    return 0
+
+
+def _event(kind):
+    # Разбор "месяц:значение[:режим]" из командной строки
+    def parse(text: str):
+        parts = text.split(":")
+        try:
+            if kind is Prepayment and len(parts) in (2, 3):
+                return Prepayment(int(parts[0]), float(parts[1]), parts[2] if len(parts) == 3 else REDUCE_TERM)
+            if kind is RateReset and len(parts) == 2:
+                return RateReset(int(parts[0]), float(parts[1]))
+            if kind is PaymentHoliday and len(parts) == 2:
+                return PaymentHoliday(int(parts[0]), int(parts[1]))
+        except ValueError:
+            pass
+        raise argparse.ArgumentTypeError(f"invalid {kind.__name__} {text!r}")
+    return parse
+
+
+def cmd_convert(args) -> int:
+    target = args.currency.upper()
+    rate = db.get_saved_rate(target)
+    if rate is None:
+        print(f"No saved rate for {target}, run update-rates first", file=sys.stderr)
+        return 1
+    print(f"{args.amount:.2f} RUB = {args.amount / rate:.2f} {target}")
+    return 0
+
+
+def cmd_update_rates(args) -> int:
+    # Клиент API и снимок курсов нужны только этой команде; остальные запускаются без них
+    import api
+    from rates_snapshot import refresh_rates
+
+    try:
+        rates = api.fetch_rates()
+    except (RuntimeError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    db.init_db()
+    changes = refresh_rates(rates, on_export_error=lambda e: print(f"Snapshot export error: {e}", file=sys.stderr))
+    print(f"Fetched {len(rates)} rates, {len(changes)} changed and saved to DB")
+    return 0
+
+
+def _add_loan_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("loan", type=float, help="Сумма кредита, RUB")
+    parser.add_argument("months", type=int, help="Срок кредита, мес.")
+    parser.add_argument("annual", type=float, help="Процентная ставка, %%")
+
+
+def _add_repayment_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--differentiated", action="store_true",
+                        help="Дифференцированные платежи вместо аннуитетных")
+
+
+def _add_start_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--start", type=date.fromisoformat, default=date.today(), help="Дата выдачи, ГГГГ-ММ-ДД")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Headless loan calculator and currency converter")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    quote = commands.add_parser("quote", help="Monthly payment, total and interest")
+    _add_loan_arguments(quote)
+    _add_repayment_argument(quote)
+    quote.set_defaults(func=cmd_quote, loan_inputs=True)
+
+    rows = commands.add_parser("schedule", help="Payment schedule as CSV")
+    _add_loan_arguments(rows)
+    _add_repayment_argument(rows)
+    rows.add_argument("--day-count", choices=CONVENTIONS,
+                      help="Проценты по фактическим датам платежей с переносом выходных и праздников")
+    _add_start_argument(rows)
+    rows.set_defaults(func=cmd_schedule, loan_inputs=True)
+
+    plan = commands.add_parser("plan", help="Schedule with prepayments, rate resets and payment holidays")
+    _add_loan_arguments(plan)
+    plan.add_argument("--prepay", type=_event(Prepayment), action="append", default=[],
+                      metavar="MONTH:AMOUNT[:MODE]", help="MODE is reduce_term (default) or reduce_payment")
+    plan.add_argument("--rate", type=_event(RateReset), action="append", default=[], metavar="MONTH:ANNUAL")
+    plan.add_argument("--holiday", type=_event(PaymentHoliday), action="append", default=[],
+                      metavar="MONTH:MONTHS")
+    plan.set_defaults(func=cmd_plan, loan_inputs=True)
+
+    cost = commands.add_parser("cost", help="Full cost of credit (ПСК) and effective rate with fees")
+    _add_loan_arguments(cost)
+    cost.add_argument("--upfront-fee", type=float, default=0.0, help="Разовая комиссия при выдаче, RUB")
+    cost.add_argument("--monthly-fee", type=float, default=0.0, help="Ежемесячная комиссия, RUB")
+    _add_start_argument(cost)
+    cost.set_defaults(func=cmd_cost, loan_inputs=True)
+
+    convert = commands.add_parser("convert", help="Convert an amount in RUB with the saved rate")
+    convert.add_argument("amount", type=float)
+    convert.add_argument("--currency", default="USD")
+    convert.set_defaults(func=cmd_convert)
+
+    update = commands.add_parser("update-rates", help="Fetch current rates and save changes to the DB")
+    update.set_defaults(func=cmd_update_rates)
+    return parser
+
+
+def main(argv=None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if getattr(args, "loan_inputs", False):
+        try:
+            validate_loan(args.loan, args.months, args.annual)
+        except ValueError as e:
+            parser.error(str(e))
+    try:
+        return args.func(args)
+    except ValueError as e:
+        # Противоречивые события плана и т. п.
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
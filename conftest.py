@@ -0,0 +1,7 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def isolate_snapshot(tmp_path, monkeypatch):
+    """Keep binary rate snapshots written by update_db out of the working tree"""
+    monkeypatch.setattr('rates_snapshot.SNAPSHOT_PATH', str(tmp_path / 'rates_snapshot.bin'))
@@ -0,0 +1,170 @@
+import numpy as np
+
+from batch_engine import annuity_payments
+
+DAYS_IN_YEAR = 365
+BASE_PERIODS = 12
+TOLERANCE = 1e-10
+# Допустимая невязка суммы потоков относительно суммы их модулей
+RESIDUAL = 1e-8
+MAX_ITERATIONS = 50
+
+
+def _calendar(dates: np.ndarray) -> tuple:
+    # Календарь по диапазону дат: номер месяца, число месяца и длина месяца
+    # для каждого дня считаются один раз, а потоки получают их выборкой по индексу
+    low = (dates.min().astype("datetime64[M]") - 1).astype("datetime64[D]")
+    days = np.arange(low, dates.max() + 1)
+    months = days.astype("datetime64[M]")
+    starts = months.astype("datetime64[D]")
+    lengths = ((months + 1).astype("datetime64[D]") - starts).astype(np.int64)
+    return low, months.astype(np.int64), (days - starts).astype(np.int64) + 1, lengths
+
+
+def add_months(dates, counts) -> np.ndarray:
+    # Та же дата через counts месяцев; 31-е число переходит на последний день месяца
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    months = dates.astype("datetime64[M]")
+    day = dates - months.astype("datetime64[D]")
+    target = months + np.asarray(counts, dtype=np.int64)
+    last = (target + 1).astype("datetime64[D]") - 1
+    return np.minimum(target.astype("datetime64[D]") + day, last)
+
+
+def loan_flows(loans, months, annuals, start, upfront_fees=0.0, monthly_fees=0.0) -> tuple:
+    # Денежные потоки заёмщика по всем кредитам подряд: выдача за вычетом
+    # разовой комиссии (+) и платежи с ежемесячной комиссией (-) в даты графика
+    loans = np.asarray(loans, dtype=np.float64)
+    terms = np.asarray(months, dtype=np.int64)
+    count = len(loans)
+    payments = annuity_payments(loans, terms, annuals)
+    upfront = np.broadcast_to(np.asarray(upfront_fees, dtype=np.float64), count)
+    monthly = np.broadcast_to(np.asarray(monthly_fees, dtype=np.float64), count)
+
+    # Строка 0 каждого кредита — выдача, строки 1..term — платежи
+    index = np.repeat(np.arange(count, dtype=np.int64), terms + 1)
+    firsts = np.cumsum(terms + 1) - (terms + 1)
+    offsets = np.arange(len(index), dtype=np.int64) - np.repeat(firsts, terms + 1)
+    amounts = -(payments + monthly)[index]
+    amounts[firsts] = loans - upfront
+
+    # Даты платежей считаются один раз для каждой различной даты выдачи
+    starts, inverse = np.unique(np.broadcast_to(np.asarray(start, dtype="datetime64[D]"), count),
+                                return_inverse=True)
+    calendar = add_months(starts[:, None], np.arange(terms.max(initial=0) + 1)[None, :])
+    return index, calendar[inverse[index], offsets], amounts
+
+
+def _solve(index, periods, fractions, amounts, guess, count: int, tolerance: float, max_iterations: int) -> tuple:
+    # Метод Ньютона сразу для всех кредитов: сумма дисконтированных потоков
+    # sum a / ((1 + e*i) * (1 + i)^q) = 0; сошедшиеся кредиты выбывают из расчёта
+    rates = np.array(np.broadcast_to(np.asarray(guess, dtype=np.float64), count))
+    converged = np.zeros(count, dtype=bool)
+    iterations = np.zeros(count, dtype=np.int64)
+
+    # Без смены знака потоков корня нет
+    has_in = np.bincount(index, weights=amounts > 0, minlength=count) > 0
+    has_out = np.bincount(index, weights=amounts < 0, minlength=count) > 0
+    active = has_in & has_out
+    scale = np.bincount(index, weights=np.abs(amounts), minlength=count)
+    keep = active[index]
+    index, periods, fractions, amounts = index[keep], periods[keep], fractions[keep], amounts[keep]
+    # Потоки ровно в даты базовых периодов (e = 0) — обычный случай для графика
+    regular = not fractions.any()
+    for _ in range(max_iterations):
+        if not len(index):
+            break
+        # (1 + i)^q через exp(q * log(1 + i)): логарифм берётся один раз на кредит
+        discounted = amounts * np.exp(-periods * np.log1p(rates)[index])
+        weights = periods * (1 / (1 + rates))[index]
+        if not regular:
+            linear = 1 + fractions * rates[index]
+            discounted /= linear
+            weights += fractions / linear
+        value = np.bincount(index, weights=discounted, minlength=count)
+        slope = -np.bincount(index, weights=discounted * weights, minlength=count)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            step = value / slope
+        # Нулевая производная или переполнение: дальше Ньютон не сойдётся,
+        # кредит выбывает без отметки о сходимости
+        failed = active & ~np.isfinite(step)
+        active &= ~failed
+        step = np.where(active, step, 0.0)
+        # Ставка не может опуститься до -100 %: шаг укорачивается
+        new = rates - step
+        new = np.where(new <= -1, (rates - 1) / 2, new)
+        iterations += active | failed
+        # Сходимость — и короткий шаг, и малая невязка в текущей точке
+        done = active & (np.abs(new - rates) <= tolerance * np.maximum(1.0, np.abs(new))) \
+            & (np.abs(value) <= RESIDUAL * scale)
+        rates = np.where(active, new, rates)
+        converged |= done
+        active &= ~done & np.isfinite(rates)
+        # Потоки сошедшихся кредитов отбрасываются, когда их становится больше половины
+        keep = active[index]
+        if keep.sum() * 2 < len(keep):
+            index, periods, fractions, amounts = index[keep], periods[keep], fractions[keep], amounts[keep]
+
+    rates[~converged] = np.nan
+    return rates, converged, iterations
+
+
+def xirr(index, dates, amounts, guess=0.1, tolerance: float = TOLERANCE,
+         max_iterations: int = MAX_ITERATIONS) -> tuple:
+    # Эффективная годовая ставка по датированным потокам, act/365 от первого
+    # потока каждого кредита; потоки одного кредита идут подряд
+    index = np.asarray(index, dtype=np.int64)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    count = int(index.max()) + 1 if len(index) else 0
+    first = dates[np.searchsorted(index, np.arange(count))]
+    periods = (dates - first[index]).astype(np.float64) / DAYS_IN_YEAR
+    return _solve(index, periods, np.zeros(len(index)), np.asarray(amounts, dtype=np.float64), guess, count,
+                  tolerance, max_iterations)
+
+
+def month_periods(first, dates) -> tuple:
+    # Разложение срока от first до dates на целые месяцы q и остаток дней
+    first = np.asarray(first, dtype="datetime64[D]")
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    if not dates.size:
+        return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    low, month_of, day_of, length_of = _calendar(np.concatenate([first.ravel(), dates.ravel()]))
+    at_first = (first - low).astype(np.int64)
+    at_date = (dates - low).astype(np.int64)
+    day = day_of[at_date]
+    anchor = np.minimum(day_of[at_first], length_of[at_date])
+    back = anchor > day
+    periods = month_of[at_date] - month_of[at_first] - back
+    # Если годовщина выдачи в этом месяце ещё не наступила, остаток считается
+    # от неё в предыдущем месяце
+    previous = length_of[np.maximum(at_date - day, 0)]
+    previous_anchor = np.minimum(day_of[at_first], previous)
+    remainder = np.where(back, previous - previous_anchor + day, day - anchor)
+    return periods, remainder
+
+
+def full_cost(index, dates, amounts, guess=0.01, tolerance: float = TOLERANCE,
+              max_iterations: int = MAX_ITERATIONS) -> tuple:
+    # ПСК по 353-ФЗ: базовый период — месяц, q — целые месяцы от выдачи,
+    # e — остаток дней в долях месяца; ПСК = i * 12 * 100 %
+    index = np.asarray(index, dtype=np.int64)
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    count = int(index.max()) + 1 if len(index) else 0
+    first = dates[np.searchsorted(index, np.arange(count))]
+    periods, remainder = month_periods(first[index], dates)
+    fractions = remainder / (DAYS_IN_YEAR / BASE_PERIODS)
+    rates, converged, iterations = _solve(index, periods.astype(np.float64), fractions,
+                                          np.asarray(amounts, dtype=np.float64), guess, count, tolerance,
+                                          max_iterations)
+    return rates * BASE_PERIODS * 100, converged, iterations
+
+
+def loan_costs(loans, months, annuals, start, upfront_fees=0.0, monthly_fees=0.0) -> tuple:
+    # ПСК и эффективная ставка (XIRR) пакета кредитов, %; старт Ньютона —
+    # номинальная ставка, поэтому обычно хватает нескольких итераций
+    index, dates, amounts = loan_flows(loans, months, annuals, start, upfront_fees, monthly_fees)
+    monthly = np.asarray(annuals, dtype=np.float64) / 12 / 100
+    psk, psk_converged, _ = full_cost(index, dates, amounts, guess=monthly)
+    effective, xirr_converged, _ = xirr(index, dates, amounts, guess=(1 + monthly) ** 12 - 1)
+    return psk, effective * 100, psk_converged & xirr_converged
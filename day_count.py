@@ -0,0 +1,100 @@
+from collections import namedtuple
+from datetime import date, timedelta
+from functools import lru_cache
+
+from engine import validate_loan
+
+THIRTY_360 = "30/360"
+ACT_365 = "act/365"
+ACT_ACT = "act/act"
+CONVENTIONS = (THIRTY_360, ACT_365, ACT_ACT)
+
+# Нерабочие праздничные дни РФ (месяц, число); переносы выходных задаются отдельно
+RU_HOLIDAYS = frozenset([(1, day) for day in range(1, 9)] + [(2, 23), (3, 8), (5, 1), (5, 9), (6, 12), (11, 4)])
+
+PaymentCalendar = namedtuple("PaymentCalendar", ["dates", "fractions"])
+DatedRow = namedtuple("DatedRow", ["month", "date", "payment", "interest", "principal", "balance"])
+
+
+def _is_leap(year: int) -> bool:
+    # calendar не импортируется: он заметно замедляет запуск консольного интерфейса
+    return year % 4 == 0 and (year % 100 != 0 or year % 400 == 0)
+
+
+def _days_in_year(year: int) -> int:
+    return 366 if _is_leap(year) else 365
+
+
+def add_months(start: date, months: int) -> date:
+    # 31-е число переходит на последний день более короткого месяца
+    year, month = divmod(start.month - 1 + months, 12)
+    year += start.year
+    following = date(year + (month == 11), (month + 1) % 12 + 1, 1)
+    return date(year, month + 1, min(start.day, (following - timedelta(days=1)).day))
+
+
+def is_business_day(day: date, holidays=RU_HOLIDAYS) -> bool:
+    return day.weekday() < 5 and (day.month, day.day) not in holidays
+
+
+def roll(day: date, holidays=RU_HOLIDAYS) -> date:
+    # Modified following: на следующий рабочий день, а если он уже в другом
+    # месяце — на предыдущий рабочий день
+    rolled = day
+    while not is_business_day(rolled, holidays):
+        rolled += timedelta(days=1)
+    if rolled.month == day.month:
+        return rolled
+    rolled = day
+    while not is_business_day(rolled, holidays):
+        rolled -= timedelta(days=1)
+    return rolled
+
+
+def year_fraction(start: date, end: date, convention: str) -> float:
+    if convention == THIRTY_360:
+        return 1 / 12
+    if convention == ACT_365:
+        return (end - start).days / 365
+    if convention == ACT_ACT:
+        # ISDA: дни каждого календарного года делятся на длину этого года
+        fraction, current = 0.0, start
+        while current.year < end.year:
+            boundary = date(current.year + 1, 1, 1)
+            fraction += (boundary - current).days / _days_in_year(current.year)
+            current = boundary
+        return fraction + (end - current).days / _days_in_year(end.year)
+    raise ValueError(f"Unknown day count convention {convention!r}")
+
+
+@lru_cache(maxsize=256)
+def payment_calendar(start: date, months: int, convention: str = ACT_365,
+                     holidays: frozenset = RU_HOLIDAYS) -> PaymentCalendar:
+    # Даты платежей и доли года процентных периодов зависят только от продукта,
+    # поэтому кредиты с одинаковыми датой выдачи и сроком делят одну таблицу.
+    # Проценты начисляются между фактическими датами платежей после переноса
+    dates = tuple(roll(add_months(start, month), holidays) for month in range(1, months + 1))
+    fractions = tuple(year_fraction(begin, end, convention) for begin, end in zip((start,) + dates, dates))
+    return PaymentCalendar(dates, fractions)
+
+
+def dated_payment(loan: float, fractions, annual: float) -> float:
+    # Аннуитет, который гасит долг при разных длинах периодов: loan / sum(1 / prod(1 + r_k))
+    discount, total = 1.0, 0.0
+    for fraction in fractions:
+        discount /= 1 + annual / 100 * fraction
+        total += discount
+    return loan / total
+
+
+def dated_schedule(loan: float, months: int, annual: float, start: date, convention: str = ACT_365,
+                   holidays: frozenset = RU_HOLIDAYS):
+    validate_loan(loan, months, annual)
+    dates, fractions = payment_calendar(start, months, convention, holidays)
+    payment = dated_payment(loan, fractions, annual)
+    balance = loan
+    for month, (day, fraction) in enumerate(zip(dates, fractions), start=1):
+        interest = balance * annual / 100 * fraction
+        principal = payment - interest
+        balance = 0.0 if month == months else balance - principal
+        yield DatedRow(month, day, payment, interest, principal, balance)
@@ -1,12 +1,57 @@
 import sqlite3
 import datetime
-from tkinter import messagebox
+import time
+from collections import namedtuple
 
 DB_NAME = "currency_rates.db"
 
-def init_db():
+RateChange = namedtuple("RateChange", ["currency", "old", "new", "percent"])
+
+# WAL позволяет читателям не ждать писателя; journal_mode хранится в самом
+# файле БД, остальные прагмы действуют на одно соединение
+STORAGE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,
+    "mmap_size": 64 * 1024 * 1024,
+    "cache_size": -16000,
+    "auto_vacuum": "INCREMENTAL",
+}
+_PERSISTENT_PRAGMAS = ("journal_mode", "auto_vacuum")
+_AUTO_VACUUM_MODES = {"NONE": 0, "FULL": 1, "INCREMENTAL": 2}
+
+UPSERT_RATE_SQL = """
+        INSERT INTO rates (id, currency, rate, fetched_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(id) DO UPDATE SET
+        rate = excluded.rate,
+        fetched_at = excluded.fetched_at
+"""
+
+_rate_listeners = []
+
+def connect() -> sqlite3.Connection:
     conn = sqlite3.connect(DB_NAME)
+    for name, value in STORAGE_PRAGMAS.items():
+        if name not in _PERSISTENT_PRAGMAS:
+            conn.execute(f"PRAGMA {name}={value}")
+    return conn
+
+def _ensure_auto_vacuum(cur: sqlite3.Cursor, mode: str):
+    if cur.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_MODES[mode.upper()]:
+        return
+    cur.execute(f"PRAGMA auto_vacuum={mode}")
+    # В уже созданном файле новый режим вступает в силу только после VACUUM
+    if cur.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()[0]:
+        cur.execute("VACUUM")
+
+def init_db():
+    conn = connect()
     cur = conn.cursor()
+    if "auto_vacuum" in STORAGE_PRAGMAS:
+        _ensure_auto_vacuum(cur, STORAGE_PRAGMAS["auto_vacuum"])
+    if "journal_mode" in STORAGE_PRAGMAS:
+        cur.execute(f"PRAGMA journal_mode={STORAGE_PRAGMAS['journal_mode']}")
     cur.execute("""
         CREATE TABLE IF NOT EXISTS rates (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -15,32 +60,120 @@ def init_db():
             fetched_at TEXT NOT NULL
         )
     """)
+    # granularity: intraday — каждое изменение, daily — закрытие дня, monthly — среднее за месяц
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS rate_history (
+            currency TEXT NOT NULL,
+            rate REAL NOT NULL,
+            recorded_at REAL NOT NULL,
+            granularity TEXT NOT NULL DEFAULT 'intraday'
+        )
+    """)
+    cur.execute("CREATE INDEX IF NOT EXISTS rate_history_currency ON rate_history (currency, recorded_at)")
+    cur.execute("CREATE INDEX IF NOT EXISTS rate_history_granularity ON rate_history (granularity, recorded_at)")
     conn.commit()
     conn.close()
 
+def _fetched_at() -> str:
+    date_now = datetime.datetime.now()
+    return f"{date_now.day}-{date_now.month}-{date_now.year} {date_now.strftime('%H:%M')}"
+
 def save_rate(id: int, target_currency: str, rate: float):
-    conn = sqlite3.connect(DB_NAME)
+    conn = connect()
     cur = conn.cursor()
-    date_now = datetime.datetime.now()
-    date_str = f"{date_now.day}-{date_now.month}-{date_now.year} {date_now.strftime('%H:%M')}"
-    cur.execute("""
-        INSERT INTO rates (id, currency, rate, fetched_at)
-        VALUES (?, ?, ?, ?)
-        ON CONFLICT(id) DO UPDATE SET
-        rate = excluded.rate,
-        fetched_at = excluded.fetched_at
-    """, (id, target_currency, rate, date_str))
+    date_str = _fetched_at()
+    cur.execute(UPSERT_RATE_SQL, (id, target_currency, rate, date_str))
     conn.commit()
     conn.close()
 
 def get_saved_rate(target_currency: str = 'USD') -> float:
-    conn = sqlite3.connect(DB_NAME)
-    cur = conn.cursor()
+    # None — курса нет в базе; ошибки SQLite уходят вызывающему коду
+    conn = connect()
     try:
-        cur.execute(f"SELECT rate FROM rates WHERE currency='{target_currency}'")
-        rate = cur.fetchone()[0]
-        return rate
-    except Exception as e:
-        messagebox.showerror("Ошибка", "Обновите валютные курсы")
-    conn.close()
-    return None
\ No newline at end of file
+        cur = conn.cursor()
+        cur.execute("SELECT rate FROM rates WHERE currency=?", (target_currency,))
+        row = cur.fetchone()
+        return row[0] if row else None
+    finally:
+        conn.close()
+
+def get_all_rates() -> dict:
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT currency, rate FROM rates")
+        return dict(cur.fetchall())
+    finally:
+        conn.close()
+
+def get_rate_history(target_currency: str, since: float = 0.0) -> list:
+    conn = connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("""
+            SELECT recorded_at, rate, granularity FROM rate_history
+            WHERE currency=? AND recorded_at>=?
+            ORDER BY recorded_at
+        """, (target_currency, since))
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+def add_rate_listener(callback):
+    _rate_listeners.append(callback)
+
+def remove_rate_listener(callback):
+    if callback in _rate_listeners:
+        _rate_listeners.remove(callback)
+
+def diff_rates(new_rates: dict, stored: dict) -> list:
+    changes = []
+    for currency, new in new_rates.items():
+        old = stored.get(currency)
+        if old == new:
+            continue
+        percent = (new - old) / old * 100 if old else None
+        changes.append(RateChange(currency, old, new, percent))
+    return changes
+
+def write_rate_changes(cur: sqlite3.Cursor, rates: dict) -> list:
+    # Пишет изменившиеся курсы в открытой транзакции; commit остаётся за вызывающим
+    new_rates = {currency: rate['Value'] for currency, rate in rates.items()}
+    cur.execute("SELECT id, currency, rate FROM rates")
+    rows = cur.fetchall()
+    ids = {currency: id for id, currency, _ in rows}
+    changes = diff_rates(new_rates, {currency: rate for _, currency, rate in rows})
+    if changes:
+        next_id = max(ids.values(), default=0) + 1
+        date_str = _fetched_at()
+        params = []
+        for change in changes:
+            id = ids.get(change.currency)
+            if id is None:
+                id, next_id = next_id, next_id + 1
+            params.append((id, change.currency, change.new, date_str))
+        cur.executemany(UPSERT_RATE_SQL, params)
+        recorded_at = time.time()
+        cur.executemany(
+            "INSERT INTO rate_history (currency, rate, recorded_at, granularity) VALUES (?, ?, ?, 'intraday')",
+            [(change.currency, change.new, recorded_at) for change in changes],
+        )
+    return changes
+
+def notify_rate_listeners(changes: list):
+    if changes:
+        for callback in list(_rate_listeners):
+            callback(changes)
+
+def update_rates(rates: dict) -> list:
+    # Принимает ответ fetch_rates() и записывает только изменившиеся курсы
+    conn = connect()
+    try:
+        changes = write_rate_changes(conn.cursor(), rates)
+        if changes:
+            conn.commit()
+    finally:
+        conn.close()
+
+    notify_rate_listeners(changes)
+    return changes
@@ -0,0 +1,136 @@
+import math
+from collections import namedtuple
+
+LoanQuote = namedtuple("LoanQuote", ["payment", "total", "interest"])
+DifferentiatedQuote = namedtuple("DifferentiatedQuote", ["first_payment", "last_payment", "total", "interest"])
+ScheduleRow = namedtuple("ScheduleRow", ["month", "payment", "interest", "principal", "balance"])
+
+
+def _is_finite(value) -> bool:
+    # Целое больше float тоже не годится: его нельзя использовать в формулах
+    try:
+        return math.isfinite(value)
+    except OverflowError:
+        return False
+
+
+def validate_loan(loan: float, months: int, annual: float):
+    # Те же правила, что и в форме CurrencyConverterApp; NaN и бесконечность
+    # проходят сравнения с нулём, поэтому проверяются отдельно
+    if not all(_is_finite(value) for value in (loan, months, annual)):
+        raise ValueError("Сумма, срок и ставка должны быть конечными числами")
+    if loan <= 0:
+        raise ValueError("Сумма кредита должна быть > 0 RUB")
+    if months <= 0:
+        raise ValueError("Срок кредита должен быть > 0 мес.")
+    if annual <= 0:
+        raise ValueError("Процентная ставка должна быть > 0 %")
+
+
+def parse_loan_fields(data) -> tuple:
+    # Общий разбор кредита из JSON для сервиса, конвейера и портфельного расчёта;
+    # любая ошибка входных данных — ValueError с понятным сообщением
+    if not isinstance(data, dict):
+        raise ValueError("Loan must be a JSON object")
+    try:
+        loan = float(data["loan"])
+        months = data["months"]
+        annual = float(data["annual"])
+    except KeyError as e:
+        raise ValueError(f"Missing field: {e.args[0]}")
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("loan and annual must be numbers")
+    try:
+        # int(nan) и int(inf) падают: 1e400 в JSON разбирается как бесконечность
+        integral = not isinstance(months, bool) and isinstance(months, (int, float)) and months == int(months)
+    except (ValueError, OverflowError):
+        integral = False
+    if not integral:
+        raise ValueError("months must be an integer")
+    months = int(months)
+    validate_loan(loan, months, annual)
+    return loan, months, annual
+
+
+def monthly_rate(annual: float) -> float:
+    return annual / 12 / 100
+
+
+def annuity_payment(loan: float, months: int, annual: float) -> float:
+    monthly = monthly_rate(annual)
+    # Ставка меньше машинной точности неотличима от нулевой: 1 + monthly == 1,
+    # и знаменатель формулы аннуитета обращается в ноль
+    if 1 + monthly == 1:
+        return loan / months
+    return (loan * monthly) / (1 - (1 + monthly) ** -months)
+
+
+def annuity_factor(months: int, annual: float) -> float:
+    # Платёж на рубль долга: при смене только суммы платёж = сумма * множитель
+    monthly = monthly_rate(annual)
+    if 1 + monthly == 1:
+        return 1 / months
+    return monthly / (1 - (1 + monthly) ** -months)
+
+
+def quote_loan(loan: float, months: int, annual: float) -> LoanQuote:
+    payment = annuity_payment(loan, months, annual)
+    return LoanQuote(payment, payment * months, payment * months - loan)
+
+
+def balance_after(loan: float, months: int, annual: float, month: int, payment: float = None) -> float:
+    # Остаток долга после month платежей в замкнутой форме, без цикла по месяцам
+    if payment is None:
+        payment = annuity_payment(loan, months, annual)
+    monthly = monthly_rate(annual)
+    if 1 + monthly == 1:
+        return loan - payment * month
+    growth = (1 + monthly) ** month
+    return loan * growth - payment * (growth - 1) / monthly
+
+
+def schedule_row(loan: float, months: int, annual: float, month: int, payment: float = None) -> ScheduleRow:
+    if not 1 <= month <= months:
+        raise IndexError(f"Month {month} is outside 1..{months}")
+    if payment is None:
+        payment = annuity_payment(loan, months, annual)
+    opening = balance_after(loan, months, annual, month - 1, payment)
+    interest = opening * monthly_rate(annual)
+    principal = payment - interest
+    balance = 0.0 if month == months else opening - principal
+    return ScheduleRow(month, payment, interest, principal, balance)
+
+
+def schedule(loan: float, months: int, annual: float):
+    payment = annuity_payment(loan, months, annual)
+    monthly = monthly_rate(annual)
+    balance = loan
+    for month in range(1, months + 1):
+        interest = balance * monthly
+        principal = payment - interest
+        balance = 0.0 if month == months else balance - principal
+        yield ScheduleRow(month, payment, interest, principal, balance)
+
+
+def quote_differentiated(loan: float, months: int, annual: float) -> DifferentiatedQuote:
+    # Тело гасится равными долями loan / months, проценты начисляются на
+    # остаток; сумма процентов — арифметическая прогрессия: r * loan * (n + 1) / 2
+    monthly = monthly_rate(annual)
+    principal = loan / months
+    interest = monthly * loan * (months + 1) / 2
+    return DifferentiatedQuote(principal + loan * monthly, principal * (1 + monthly), loan + interest, interest)
+
+
+def differentiated_row(loan: float, months: int, annual: float, month: int) -> ScheduleRow:
+    if not 1 <= month <= months:
+        raise IndexError(f"Month {month} is outside 1..{months}")
+    principal = loan / months
+    opening = loan - principal * (month - 1)
+    interest = opening * monthly_rate(annual)
+    balance = 0.0 if month == months else opening - principal
+    return ScheduleRow(month, principal + interest, interest, principal, balance)
+
+
+def differentiated_schedule(loan: float, months: int, annual: float):
+    for month in range(1, months + 1):
+        yield differentiated_row(loan, months, annual, month)
@@ -0,0 +1,132 @@
+import os
+import struct
+import tempfile
+from itertools import chain
+
+import numpy as np
+
+from batch_engine import schedule_columns
+
+DEFAULT_BLOCK_ROWS = 1 << 16
+
+COLUMNS = ("loan", "month", "payment", "interest", "principal", "balance")
+CSV_HEADER = ",".join(COLUMNS) + "\n"
+CSV_ROW = "%d,%d,%.2f,%.2f,%.2f,%.2f\n"
+
+# Формат .sched (little-endian), записывается блоками по мере расчёта:
+#   заголовок: magic, версия, число столбцов
+#   блок: число строк (uint64), затем столбцы подряд —
+#         loan и month как int32, payment/interest/principal/balance как float64
+MAGIC = b"CBSC"
+VERSION = 1
+HEADER = struct.Struct("<4sHH")
+BLOCK = struct.Struct("<Q")
+_DTYPES = (np.dtype("<i4"), np.dtype("<i4"), np.dtype("<f8"), np.dtype("<f8"), np.dtype("<f8"), np.dtype("<f8"))
+
+
+class ScheduleFormatError(ValueError):
+    pass
+
+
+def schedule_blocks(loans, block_rows: int = DEFAULT_BLOCK_ROWS):
+    # loans — итерируемое (сумма, срок, ставка); кредиты копятся, пока их
+    # строки не наберут block_rows, и считаются одним векторным вызовом
+    batch, rows, offset = [], 0, 0
+    for loan in loans:
+        batch.append(loan)
+        rows += int(loan[1])
+        if rows >= block_rows:
+            yield _block(batch, offset)
+            offset += len(batch)
+            batch, rows = [], 0
+    if batch:
+        yield _block(batch, offset)
+
+
+def _block(batch: list, offset: int) -> tuple:
+    index, *rest = schedule_columns(*zip(*batch))
+    return (index + offset, *rest)
+
+
+def _open_atomic(path: str):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".export-")
+    return os.fdopen(fd, "wb", buffering=1 << 20), tmp
+
+
+def _replace(handle, tmp: str, path: str):
+    try:
+        handle.close()
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+
+
+def format_csv_block(columns: tuple) -> str:
+    # Один оператор % на весь блок вместо f-строки на каждую строку
+    values = chain.from_iterable(zip(*(column.tolist() for column in columns)))
+    return (CSV_ROW * len(columns[0])) % tuple(values)
+
+
+def write_schedule_csv(loans, path: str, block_rows: int = DEFAULT_BLOCK_ROWS) -> int:
+    handle, tmp = _open_atomic(path)
+    total = 0
+    try:
+        handle.write(CSV_HEADER.encode("ascii"))
+        for columns in schedule_blocks(loans, block_rows):
+            handle.write(format_csv_block(columns).encode("ascii"))
+            total += len(columns[0])
+    except BaseException:
+        handle.close()
+        os.unlink(tmp)
+        raise
+    _replace(handle, tmp, path)
+    return total
+
+
+def write_schedule_binary(loans, path: str, block_rows: int = DEFAULT_BLOCK_ROWS) -> int:
+    handle, tmp = _open_atomic(path)
+    total = 0
+    try:
+        handle.write(HEADER.pack(MAGIC, VERSION, len(COLUMNS)))
+        for columns in schedule_blocks(loans, block_rows):
+            count = len(columns[0])
+            handle.write(BLOCK.pack(count))
+            for column, dtype in zip(columns, _DTYPES):
+                handle.write(np.ascontiguousarray(column, dtype=dtype).tobytes())
+            total += count
+    except BaseException:
+        handle.close()
+        os.unlink(tmp)
+        raise
+    _replace(handle, tmp, path)
+    return total
+
+
+def read_schedule_binary(path: str):
+    with open(path, "rb") as f:
+        header = f.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ScheduleFormatError("Schedule file is truncated")
+        magic, version, ncols = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise ScheduleFormatError("Not a schedule export")
+        if version != VERSION or ncols != len(COLUMNS):
+            raise ScheduleFormatError(f"Unsupported schedule export version {version}")
+        while True:
+            head = f.read(BLOCK.size)
+            if not head:
+                return
+            if len(head) < BLOCK.size:
+                raise ScheduleFormatError("Schedule file is truncated")
+            (count,) = BLOCK.unpack(head)
+            columns = []
+            for dtype in _DTYPES:
+                size = count * dtype.itemsize
+                data = f.read(size)
+                if len(data) < size:
+                    raise ScheduleFormatError("Schedule file is truncated")
+                columns.append(np.frombuffer(data, dtype=dtype))
+            yield tuple(columns)
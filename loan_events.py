@@ -0,0 +1,249 @@
+import math
+from bisect import bisect_right
+from collections import namedtuple
+from numbers import Integral
+
+from engine import ScheduleRow, annuity_payment, balance_after, monthly_rate, validate_loan
+
+REDUCE_TERM = "reduce_term"
+REDUCE_PAYMENT = "reduce_payment"
+
+# month — номер месяца, после платежа которого событие вступает в силу
+Prepayment = namedtuple("Prepayment", ["month", "amount", "mode"], defaults=[REDUCE_TERM])
+RateReset = namedtuple("RateReset", ["month", "annual"])
+PaymentHoliday = namedtuple("PaymentHoliday", ["month", "months"])
+
+# Отрезок графика с постоянными ставкой и платежом: месяцы start..end
+Segment = namedtuple("Segment", ["start", "end", "annual", "payment", "opening", "closing"])
+# starts — первые месяцы отрезков для бинарного поиска в plan_row
+LoanPlan = namedtuple("LoanPlan", ["segments", "prepayments", "total_paid", "total_interest", "months",
+                                   "last_payment", "starts"])
+# Правка плана: строки с месяца start заменяются на rows, всего в графике months строк
+ScheduleDiff = namedtuple("ScheduleDiff", ["start", "rows", "months"])
+
+_EPSILON = 1e-7
+
+
+def remaining_term(balance: float, payment: float, annual: float) -> int:
+    # Сколько платежей payment нужно, чтобы погасить balance; последний может быть меньше
+    monthly = monthly_rate(annual)
+    if 1 + monthly == 1:
+        return math.ceil(balance / payment - _EPSILON)
+    if payment <= balance * monthly:
+        raise ValueError("Payment does not cover the monthly interest")
+    return max(1, math.ceil(math.log(payment / (payment - balance * monthly)) / math.log(1 + monthly) - _EPSILON))
+
+
+class _Planner:
+    # Состояние расчёта между событиями; snapshot/restore позволяют
+    # продолжить расчёт с любой границы события
+    def __init__(self, loan: float, months: int, annual: float):
+        validate_loan(loan, months, annual)
+        self.loan = float(loan)
+        self.month, self.balance, self.left = 0, float(loan), months
+        self.annual = annual
+        self.payment = annuity_payment(self.balance, self.left, annual)
+        self.paid = 0.0
+        self.segments = []
+        self.prepayments = []
+
+    def snapshot(self) -> tuple:
+        return (self.month, self.balance, self.left, self.annual, self.payment, self.paid,
+                len(self.segments), len(self.prepayments))
+
+    def restore(self, state: tuple):
+        self.month, self.balance, self.left, self.annual, self.payment, self.paid, segments, prepayments = state
+        del self.segments[segments:]
+        del self.prepayments[prepayments:]
+
+    def advance(self, count: int):
+        if count <= 0:
+            return
+        closing = balance_after(self.balance, self.left, self.annual, count, self.payment)
+        self.segments.append(Segment(self.month + 1, self.month + count, self.annual, self.payment,
+                                     self.balance, closing))
+        self.paid += self.payment * count
+        self.month, self.balance, self.left = self.month + count, closing, self.left - count
+
+    def apply(self, event) -> bool:
+        # False — кредит погашен раньше события, дальнейшие события не нужны
+        validate_event(event)
+        if event.month < self.month:
+            raise ValueError(f"Event at month {event.month} falls inside a payment holiday")
+        if self.left == 0 or event.month >= self.month + self.left:
+            return False
+        self.advance(event.month - self.month)
+
+        if isinstance(event, Prepayment):
+            amount = min(float(event.amount), self.balance)
+            self.balance -= amount
+            self.prepayments.append((self.month, amount))
+            if self.balance <= _EPSILON:
+                self.balance, self.left = 0.0, 0
+            elif event.mode == REDUCE_PAYMENT:
+                self.payment = annuity_payment(self.balance, self.left, self.annual)
+            elif event.mode == REDUCE_TERM:
+                self.left = remaining_term(self.balance, self.payment, self.annual)
+            else:
+                raise ValueError(f"Unknown prepayment mode {event.mode!r}")
+        elif isinstance(event, RateReset):
+            self.annual = event.annual
+            self.payment = annuity_payment(self.balance, self.left, self.annual)
+        elif isinstance(event, PaymentHoliday):
+            # Платежей нет, проценты капитализируются; число оставшихся платежей
+            # не меняется, поэтому срок сдвигается на длину каникул
+            closing = self.balance * (1 + monthly_rate(self.annual)) ** event.months
+            self.segments.append(Segment(self.month + 1, self.month + event.months, self.annual, 0.0,
+                                         self.balance, closing))
+            self.month, self.balance = self.month + event.months, closing
+            self.payment = annuity_payment(self.balance, self.left, self.annual)
+        else:
+            raise TypeError(f"Unknown event {event!r}")
+        return True
+
+    def finish(self) -> LoanPlan:
+        last_payment = 0.0
+        if self.left > 0:
+            # Последний платёж закрывает остаток целиком, поэтому график
+            # заканчивается ровно на нуле и при сокращённом сроке
+            self.advance(self.left - 1)
+            last_payment = self.balance * (1 + monthly_rate(self.annual))
+            self.segments.append(Segment(self.month + 1, self.month + 1, self.annual, last_payment,
+                                         self.balance, 0.0))
+            self.paid += last_payment
+            self.month, self.balance, self.left = self.month + 1, 0.0, 0
+
+        prepayments = {}
+        for month, amount in self.prepayments:
+            prepayments[month] = prepayments.get(month, 0.0) + amount
+        total_paid = self.paid + sum(prepayments.values())
+        return LoanPlan(list(self.segments), prepayments, total_paid, total_paid - self.loan, self.month,
+                        last_payment, [segment.start for segment in self.segments])
+
+
+def validate_event(event):
+    # Событие вступает в силу после платежа месяца month, поэтому month >= 1
+    if isinstance(event.month, bool) or not isinstance(event.month, Integral) or event.month < 1:
+        raise ValueError(f"Event month must be an integer >= 1, got {event.month!r}")
+    if isinstance(event, Prepayment):
+        if not math.isfinite(event.amount) or event.amount <= 0:
+            raise ValueError(f"Prepayment amount must be > 0, got {event.amount!r}")
+    elif isinstance(event, RateReset):
+        if not math.isfinite(event.annual) or event.annual <= 0:
+            raise ValueError(f"Rate must be > 0 %, got {event.annual!r}")
+    elif isinstance(event, PaymentHoliday):
+        if isinstance(event.months, bool) or not isinstance(event.months, Integral) or event.months < 1:
+            raise ValueError(f"Payment holiday must last at least 1 month, got {event.months!r}")
+
+
+def _by_month(event) -> int:
+    return event.month
+
+
+def plan_loan(loan: float, months: int, annual: float, events=()) -> LoanPlan:
+    # Между событиями график — замкнутая формула, поэтому каждый отрезок
+    # считается за O(1), а весь план — за O(числа событий)
+    planner = _Planner(loan, months, annual)
+    for event in sorted(events, key=_by_month):
+        if not planner.apply(event):
+            break
+    return planner.finish()
+
+
+def plan_rows(plan: LoanPlan):
+    # Помесячный график строится лениво из отрезков; досрочный платёж
+    # добавляется к платежу и телу того месяца, после которого он внесён
+    for segment in plan.segments:
+        monthly = monthly_rate(segment.annual)
+        balance = segment.opening
+        for month in range(segment.start, segment.end + 1):
+            interest = balance * monthly
+            if segment.payment == 0:
+                # Каникулы: проценты капитализируются; досрочный платёж возможен
+                # только в последнем месяце каникул
+                principal = -interest
+                balance += interest
+            else:
+                principal = segment.payment - interest
+                balance = segment.closing if month == segment.end else balance - principal
+            extra = plan.prepayments.get(month, 0.0)
+            balance = max(balance - extra, 0.0) if extra else balance
+            yield ScheduleRow(month, segment.payment + extra, interest, principal + extra, balance)
+
+
+def plan_row(plan: LoanPlan, month: int) -> ScheduleRow:
+    # Одна строка за O(log отрезков): поиск отрезка и замкнутая формула внутри него
+    if not 1 <= month <= plan.months:
+        raise IndexError(f"Month {month} is outside 1..{plan.months}")
+    segment = plan.segments[bisect_right(plan.starts, month) - 1]
+    opening = balance_after(segment.opening, 1, segment.annual, month - segment.start, segment.payment)
+    interest = opening * monthly_rate(segment.annual)
+    if segment.payment == 0:
+        principal, balance = -interest, opening + interest
+    else:
+        principal = segment.payment - interest
+        balance = segment.closing if month == segment.end else opening - principal
+    extra = plan.prepayments.get(month, 0.0)
+    balance = max(balance - extra, 0.0) if extra else balance
+    return ScheduleRow(month, segment.payment + extra, interest, principal + extra, balance)
+
+
+class IncrementalPlan:
+    # Перед каждым событием хранится состояние расчёта; правка события
+    # пересчитывает только хвост начиная с него и возвращает изменившиеся строки
+    def __init__(self, loan: float, months: int, annual: float, events=()):
+        self.events = sorted(events, key=_by_month)
+        self._planner = _Planner(loan, months, annual)
+        self._checkpoints = []
+        self.plan = None
+        self.stats = {"replays": 0, "events_replayed": 0}
+        self._replay(0)
+
+    def _replay(self, index: int):
+        index = min(index, len(self._checkpoints) - 1) if self._checkpoints else 0
+        if self._checkpoints:
+            self._planner.restore(self._checkpoints[index])
+            del self._checkpoints[index:]
+        self.stats["replays"] += 1
+        for event in self.events[index:]:
+            self._checkpoints.append(self._planner.snapshot())
+            self.stats["events_replayed"] += 1
+            if not self._planner.apply(event):
+                break
+        else:
+            self._checkpoints.append(self._planner.snapshot())
+        self.plan = self._planner.finish()
+
+    def _edit(self, events: list, index: int, month: int) -> ScheduleDiff:
+        previous = self.events
+        self.events = events
+        try:
+            self._replay(index)
+        except Exception:
+            self.events = previous
+            self._replay(index)
+            raise
+        start = max(month, 1)
+        rows = [plan_row(self.plan, m) for m in range(start, self.plan.months + 1)]
+        return ScheduleDiff(start, rows, self.plan.months)
+
+    def add_event(self, event) -> ScheduleDiff:
+        index = bisect_right([e.month for e in self.events], event.month)
+        return self._edit(self.events[:index] + [event] + self.events[index:], index, event.month)
+
+    def remove_event(self, index: int) -> ScheduleDiff:
+        event = self.events[index]
+        return self._edit(self.events[:index] + self.events[index + 1:], index, event.month)
+
+    def move_event(self, index: int, month: int) -> ScheduleDiff:
+        event = self.events[index]
+        events = self.events[:index] + self.events[index + 1:]
+        position = bisect_right([e.month for e in events], month)
+        events.insert(position, event._replace(month=month))
+        return self._edit(events, min(index, position), min(event.month, month))
+
+    def row(self, month: int) -> ScheduleRow:
+        return plan_row(self.plan, month)
+
+    def rows(self):
+        return plan_rows(self.plan)
@@ -0,0 +1,71 @@
+import logging
+import os
+import tkinter as tk
+from collections import deque
+from logging.handlers import RotatingFileHandler
+
+LOG_FILE = os.environ.get("LOAN_CALCULATOR_LOG")
+MAX_LINES = 1000
+FLUSH_DELAY_MS = 16
+LOG_FILE_BYTES = 1024 * 1024
+LOG_FILE_BACKUPS = 3
+
+
+class LogPane:
+    # Строки копятся в кольцевом буфере и попадают в виджет одной вставкой
+    # на кадр; ни в буфере, ни в виджете никогда не больше max_lines строк,
+    # даже если цикл событий долго не получает управления
+    def __init__(self, widget, after, max_lines: int = MAX_LINES, log_file: str = LOG_FILE,
+                 max_bytes: int = LOG_FILE_BYTES, backup_count: int = LOG_FILE_BACKUPS):
+        self.widget = widget
+        self.after = after
+        self.max_lines = max_lines
+        self._pending = deque(maxlen=max_lines)
+        self._shown = 0
+        self._scheduled = False
+        self._file_logger = None
+        if log_file:
+            handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8")
+            self._file_logger = logging.getLogger(f"{__name__}.{id(self)}")
+            self._file_logger.propagate = False
+            self._file_logger.setLevel(logging.INFO)
+            self._file_logger.addHandler(handler)
+
+    def write(self, line: str):
+        # В файл пишется каждая строка: из буфера старые строки вытесняются
+        if self._file_logger is not None:
+            self._file_logger.info(line)
+        self._pending.append(line)
+        if not self._scheduled:
+            self._scheduled = True
+            self.after(FLUSH_DELAY_MS, self.flush)
+
+    def flush(self):
+        self._scheduled = False
+        if not self._pending:
+            return
+        lines = list(self._pending)
+        self._pending.clear()
+
+        self.widget.configure(state="normal")
+        if len(lines) >= self.max_lines:
+            # За кадр пришло не меньше строк, чем помещается: старое содержимое
+            # целиком вытеснено, показываются только последние max_lines
+            self.widget.delete("1.0", tk.END)
+            self._shown = 0
+        self.widget.insert(tk.END, "".join(f"{line}\n" for line in lines))
+        self._shown += len(lines)
+        excess = self._shown - self.max_lines
+        if excess > 0:
+            self.widget.delete("1.0", f"{excess + 1}.0")
+            self._shown -= excess
+        self.widget.see(tk.END)
+        self.widget.configure(state="disabled")
+
+    def close(self):
+        self.flush()
+        if self._file_logger is not None:
+            for handler in list(self._file_logger.handlers):
+                self._file_logger.removeHandler(handler)
+                handler.close()
+            self._file_logger = None
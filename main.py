@@ -1,19 +1,36 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import datetime
+import queue
 
-from db import init_db, save_rate, get_saved_rate
-from api import fetch_rates
+from db import init_db, get_saved_rate
+from api import fetch_rates, breaker, CircuitOpenError
+from rates_snapshot import refresh_rates
+from engine import annuity_payment, annuity_factor, validate_loan
+from retention import HistoryMaintenance
+from schedule_view import ScheduleView, LoanSchedule
+from log_pane import LogPane
+from chart_view import BalanceChart
+
+RECALC_DELAY_MS = 50
+MAINTENANCE_POLL_MS = 500
+MAINTENANCE_STOP_TIMEOUT = 5
 
 class CurrencyConverterApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Конвертер валют")
-        self.geometry("465x670")
+        self.geometry("925x930")
         self.resizable(False, False)
 
         self.create_widgets()
+        self.bind_live_recalculation()
         init_db()
+        breaker.add_listener(self.on_breaker_change)
+        self.maintenance = None
+        self._maintenance_errors = queue.SimpleQueue()
+        self._maintenance_job = None
+        self.protocol("WM_DELETE_WINDOW", self.on_close)
 
     def create_widgets(self):
         # Выбор cуммы кредита
@@ -74,12 +91,100 @@ class CurrencyConverterApp(tk.Tk):
         # Логгер
         self.log_text = tk.Text(self, height=8, width=55, state="disabled", wrap="word")
         self.log_text.grid(row=12, column=0, columnspan=2, padx=10, pady=10)
+        self.log_pane = LogPane(self.log_text, self.after)
+
+        # График платежей
+        self.schedule_view = ScheduleView(self)
+        self.schedule_view.grid(row=13, column=0, columnspan=2, padx=10, pady=10)
+
+        # График остатка и структуры платежа
+        self.chart = BalanceChart(self)
+        self.chart.grid(row=0, column=2, rowspan=7, padx=10, pady=10, sticky="n")
+
+    def bind_live_recalculation(self):
+        # Пересчёт при вводе: после последнего изменения ждём RECALC_DELAY_MS,
+        # чтобы не считать на каждое нажатие клавиши
+        self._recalc_job = None
+        self._factor_key = None
+        self._factor = None
+        for var in (self.loan_var, self.loan_time_var, self.annual_interest_var):
+            var.trace_add("write", self.schedule_recalculation)
+
+    def schedule_recalculation(self, *args):
+        if self._recalc_job is not None:
+            self.after_cancel(self._recalc_job)
+        self._recalc_job = self.after(RECALC_DELAY_MS, self.recalculate)
+
+    def recalculate(self):
+        self._recalc_job = None
+        try:
+            loan = self.loan_var.get()
+            months = self.loan_time_var.get()
+            annual = self.annual_interest_var.get()
+            validate_loan(loan, months, annual)
+        except (tk.TclError, ValueError):
+            # Поле ещё не дописано — оставляем прежний результат
+            return
+
+        # Множитель зависит только от срока и ставки; при изменении суммы
+        # платёж получается одним умножением
+        if self._factor_key != (months, annual):
+            self._factor_key = (months, annual)
+            self._factor = annuity_factor(months, annual)
+        self.show_quote(loan, months, annual, loan * self._factor)
+
+    def show_quote(self, loan: float, months: int, annual: float, payment: float) -> tuple:
+        self.payment = payment
+
+        monthly_total = round(self.payment, 2)
+        loan_sum_total = round(self.payment * months, 2)
+        interest_total = round(self.payment * months - loan, 2)
+
+        self.monthly_label.config(text=f"Ежемесячный платеж: {monthly_total} RUB")
+        self.loan_sum_label.config(text=f"Сумма всех платежей: {loan_sum_total} RUB")
+        self.interest_label.config(text=f"Начисленные проценты: {interest_total} RUB")
+
+        self.schedule_view.set_source(LoanSchedule(loan, months, annual, self.payment))
+        self.chart.set_loans([(loan, months, annual)])
+
+        self.convert_btn.config(state=tk.ACTIVE)
+        return monthly_total, loan_sum_total, interest_total
 
     def log(self, message: str):
-        self.log_text.configure(state="normal")
-        self.log_text.insert(tk.END, f"{datetime.datetime.now().strftime('%H:%M:%S')} - {message}\n")
-        self.log_text.see(tk.END)
-        self.log_text.configure(state="disabled")
+        self.log_pane.write(f"{datetime.datetime.now().strftime('%H:%M:%S')} - {message}")
+
+    def on_breaker_change(self, old_state: str, new_state: str):
+        self.log(f"API circuit breaker: {old_state} → {new_state}")
+
+    def start_maintenance(self):
+        # Поток обслуживания истории не трогает Tk: ошибки складываются
+        # в очередь, которую разбирает цикл событий
+        self.maintenance = HistoryMaintenance(on_error=self._maintenance_errors.put)
+        self.maintenance.start()
+        self._maintenance_job = self.after(MAINTENANCE_POLL_MS, self.poll_maintenance_errors)
+
+    def poll_maintenance_errors(self):
+        self.log_maintenance_errors()
+        self._maintenance_job = self.after(MAINTENANCE_POLL_MS, self.poll_maintenance_errors)
+
+    def log_maintenance_errors(self):
+        while True:
+            try:
+                error = self._maintenance_errors.get_nowait()
+            except queue.Empty:
+                return
+            self.log(f"History maintenance error: {error}")
+
+    def on_close(self):
+        # Всё, что ещё не показано, дописывается в лог, пока виджет существует
+        if self._maintenance_job is not None:
+            self.after_cancel(self._maintenance_job)
+            self._maintenance_job = None
+        if self.maintenance is not None:
+            self.maintenance.stop(timeout=MAINTENANCE_STOP_TIMEOUT)
+        self.log_maintenance_errors()
+        self.log_pane.close()
+        self.destroy()
 
     def is_loan_invalid(self, value: float, message: str) -> bool:
         if value <= 0.0:
@@ -98,23 +203,13 @@ class CurrencyConverterApp(tk.Tk):
         months = self.loan_time_var.get()
         annual = self.annual_interest_var.get()
 
-        monthly = annual / 12 / 100
-        self.payment = (loan * monthly) / (1 - (1 + monthly) ** -months)
-
-        monthly_total = round(self.payment, 2)
-        loan_sum_total = round(self.payment * months, 2)
-        interest_total = round(self.payment * months - loan, 2)
-
-        self.monthly_label.config(text=f"Ежемесячный платеж: {monthly_total} RUB")
-        self.loan_sum_label.config(text=f"Сумма всех платежей: {loan_sum_total} RUB")
-        self.interest_label.config(text=f"Начисленные проценты: {interest_total} RUB")
+        monthly_total, loan_sum_total, interest_total = self.show_quote(
+            loan, months, annual, annuity_payment(loan, months, annual))
 
         self.log(f"Ежемесячный платеж: {monthly_total} RUB")
         self.log(f"Сумма всех платежей: {loan_sum_total} RUB")
         self.log(f"Начисленные проценты: {interest_total} RUB")
 
-        self.convert_btn.config(state=tk.ACTIVE)
-
     def convert(self):
         base = self.base_var.get().upper()
         target = self.target_var.get().upper()
@@ -122,7 +217,10 @@ class CurrencyConverterApp(tk.Tk):
 
         try:
             rate = get_saved_rate(target)
-            if rate is None: return
+            if rate is None:
+                messagebox.showerror("Ошибка", "Обновите валютные курсы")
+                self.log(f"No saved rate for {target}")
+                return
 
             converted = amount / rate
             converted = round(converted, 2)
@@ -136,16 +234,20 @@ class CurrencyConverterApp(tk.Tk):
         target = self.target_var.get().upper()
         try:
             rates = fetch_rates()
-            id = 1
-            for target, rate in rates.items():
-                save_rate(id, target, rate['Value'])
-                id = id + 1
-            self.log(f"Fetched {len(rates)} rates and saved to DB")
+            changes = refresh_rates(rates, on_export_error=lambda e: self.log(f"Snapshot export error: {e}"))
+            self.log(f"Fetched {len(rates)} rates, {len(changes)} changed and saved to DB")
+            for change in changes:
+                if change.percent is not None:
+                    self.log(f"{change.currency}: {change.old} → {change.new} ({change.percent:+.2f}%)")
             messagebox.showinfo("Успех", f"Сохранено {len(rates)} курсов в базе данных.")
+        except CircuitOpenError as e:
+            messagebox.showwarning("Внимание", "Сервис курсов недоступен, используются сохранённые курсы")
+            self.log(f"{e}; breaker metrics: {breaker.metrics()}")
         except Exception as e:
             messagebox.showerror("Ошибка", str(e))
             self.log(f"Fetch/save error: {e}")
 
 if __name__ == "__main__":
     app = CurrencyConverterApp()
+    app.start_maintenance()
     app.mainloop()
@@ -0,0 +1,177 @@
+import argparse
+import json
+import queue
+import sys
+import threading
+
+import db
+from batch_engine import quote_loans
+from engine import parse_loan_fields
+
+DEFAULT_CHUNK_SIZE = 512
+DEFAULT_QUEUE_DEPTH = 8
+
+_DONE = None
+
+
+def parse_record(line: str) -> tuple:
+    record = json.loads(line)
+    if not isinstance(record, dict):
+        raise ValueError("Record must be a JSON object")
+    return record, parse_loan_fields(record)
+
+
+def price_chunk(chunk: list, currency: str = None, rate: float = None) -> list:
+    # chunk — список (номер строки, запись, входные данные или ошибка)
+    valid = [item for item in chunk if item[2] is not None]
+    quotes = iter(quote_loans(*zip(*(inputs for _, _, inputs, _ in valid)))) if valid else iter(())
+    out = []
+    for number, record, inputs, error in chunk:
+        if inputs is None:
+            out.append({"line": number, "error": error})
+            continue
+        quote = next(quotes)
+        priced = dict(record, payment=round(quote.payment, 2), total=round(quote.total, 2),
+                      interest=round(quote.interest, 2))
+        if currency is not None:
+            priced["converted"] = {
+                "currency": currency,
+                "rate": rate,
+                "payment": round(quote.payment / rate, 2),
+                "total": round(quote.total / rate, 2),
+                "interest": round(quote.interest / rate, 2),
+            }
+        out.append(priced)
+    return out
+
+
+class QuotePipeline:
+    # Три стадии — разбор, расчёт и запись — работают в своих потоках и
+    # связаны очередями ограниченной длины: если запись отстаёт, разбор
+    # блокируется, и в памяти никогда не больше queue_depth пачек на стадию
+    def __init__(self, source, sink, currency: str = None, rates: dict = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, queue_depth: int = DEFAULT_QUEUE_DEPTH):
+        self.source = source
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.currency = currency.upper() if currency else None
+        self.rate = None
+        if self.currency is not None:
+            rates = db.get_all_rates() if rates is None else rates
+            if self.currency not in rates:
+                raise KeyError(f"No saved rate for {self.currency}")
+            self.rate = rates[self.currency]
+        self.stats = {"records": 0, "priced": 0, "errors": 0, "chunks": 0}
+        self._parsed = queue.Queue(queue_depth)
+        self._priced = queue.Queue(queue_depth)
+        self._failed = threading.Event()
+        self._errors = []
+
+    def _fail(self, error: Exception):
+        self._errors.append(error)
+        self._failed.set()
+
+    def _read(self):
+        try:
+            chunk = []
+            for number, line in enumerate(self.source, start=1):
+                if self._failed.is_set():
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    record, inputs = parse_record(line)
+                    chunk.append((number, record, inputs, None))
+                except ValueError as e:
+                    chunk.append((number, None, None, str(e)))
+                if len(chunk) >= self.chunk_size:
+                    self._parsed.put(chunk)
+                    chunk = []
+            if chunk:
+                self._parsed.put(chunk)
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._parsed.put(_DONE)
+
+    def _compute(self):
+        try:
+            while True:
+                chunk = self._parsed.get()
+                if chunk is _DONE:
+                    break
+                # После сбоя стадия продолжает вычитывать очередь, чтобы
+                # разбор не завис на put() в заполненную очередь
+                if not self._failed.is_set():
+                    try:
+                        self._priced.put(price_chunk(chunk, self.currency, self.rate))
+                    except Exception as e:
+                        self._fail(e)
+        finally:
+            self._priced.put(_DONE)
+
+    def _write(self):
+        while True:
+            chunk = self._priced.get()
+            if chunk is _DONE:
+                break
+            if self._failed.is_set():
+                continue
+            try:
+                self.sink.write("".join(json.dumps(item, ensure_ascii=False) + "\n" for item in chunk))
+                self.stats["chunks"] += 1
+                self.stats["records"] += len(chunk)
+                errors = sum(1 for item in chunk if "error" in item)
+                self.stats["errors"] += errors
+                self.stats["priced"] += len(chunk) - errors
+            except Exception as e:
+                self._fail(e)
+        if not self._failed.is_set():
+            try:
+                self.sink.flush()
+            except Exception as e:
+                self._fail(e)
+
+    def run(self) -> dict:
+        threads = [
+            threading.Thread(target=self._read, name="pipeline-read", daemon=True),
+            threading.Thread(target=self._compute, name="pipeline-compute", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        self._write()
+        for thread in threads:
+            thread.join()
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
+
+
+def run_pipeline(source, sink, currency: str = None, rates: dict = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, queue_depth: int = DEFAULT_QUEUE_DEPTH) -> dict:
+    return QuotePipeline(source, sink, currency, rates, chunk_size, queue_depth).run()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Price NDJSON loan records from stdin to stdout")
+    parser.add_argument("--currency", help="Also convert payment, total and interest using the saved rate")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Records per chunk passed between stages")
+    parser.add_argument("--queue-depth", type=int, default=DEFAULT_QUEUE_DEPTH,
+                        help="Chunks buffered between stages")
+    parser.add_argument("--stats", action="store_true", help="Print record counts to stderr")
+    args = parser.parse_args()
+    try:
+        stats = run_pipeline(sys.stdin, sys.stdout, args.currency, chunk_size=args.chunk_size,
+                             queue_depth=args.queue_depth)
+    except KeyError as e:
+        print(e.args[0], file=sys.stderr)
+        sys.exit(2)
+    except BrokenPipeError:
+        sys.exit(1)
+    if args.stats:
+        print(json.dumps(stats), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
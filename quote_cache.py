@@ -0,0 +1,164 @@
+import hashlib
+import json
+import threading
+import time
+
+import db
+from engine import LoanQuote, ScheduleRow, quote_loan, schedule
+
+DEFAULT_MAX_ENTRIES = 10000
+DEFAULT_TTL = 24 * 3600.0
+DEFAULT_FLUSH_EVERY = 64
+DEFAULT_FLUSH_INTERVAL = 5.0
+
+
+def normalize_inputs(loan: float, months: int, annual: float) -> tuple:
+    # 100000, 100000.0 и 100000.001 — один и тот же запрос с точностью до копейки
+    return f"{float(loan):.2f}", int(months), f"{float(annual):.6f}"
+
+
+def quote_key(kind: str, loan: float, months: int, annual: float) -> str:
+    raw = json.dumps([kind, *normalize_inputs(loan, months, annual)])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class QuoteCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, ttl: float = DEFAULT_TTL, clock=time.time,
+                 flush_every: int = DEFAULT_FLUSH_EVERY, flush_interval: float = DEFAULT_FLUSH_INTERVAL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._touched = {}
+        self._hits = 0
+        self._flushed_at = clock()
+        conn = db.connect()
+        try:
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS quote_cache (
+                    key TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    last_used REAL NOT NULL
+                );
+                CREATE INDEX IF NOT EXISTS quote_cache_last_used ON quote_cache (last_used);
+                CREATE TABLE IF NOT EXISTS quote_cache_stats (
+                    name TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                );
+                INSERT OR IGNORE INTO quote_cache_stats (name, value)
+                VALUES ('hits', 0), ('misses', 0), ('evictions', 0);
+            """)
+        finally:
+            conn.close()
+
+    def _lookup(self, kind: str, loan: float, months: int, annual: float, compute):
+        key = quote_key(kind, loan, months, annual)
+        now = self._clock()
+        conn = db.connect()
+        try:
+            row = conn.execute("SELECT payload, created_at FROM quote_cache WHERE key=?", (key,)).fetchone()
+            if row is not None and row[1] + self.ttl > now:
+                # Попадание только читает: last_used и счётчик попаданий копятся
+                # в памяти и записываются одной транзакцией
+                with self._lock:
+                    self._touched[key] = now
+                    self._hits += 1
+                    due = self._hits >= self.flush_every or now - self._flushed_at >= self.flush_interval
+                if due:
+                    with conn:
+                        self._write_touched(conn)
+                return json.loads(row[0])
+
+            payload = compute()
+            with conn:
+                # Накопленные попадания пишутся до вытеснения, чтобы LRU видел свежие last_used
+                self._write_touched(conn)
+                conn.execute("""
+                    INSERT INTO quote_cache (key, kind, payload, created_at, last_used)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(key) DO UPDATE SET
+                    payload = excluded.payload,
+                    created_at = excluded.created_at,
+                    last_used = excluded.last_used
+                """, (key, kind, json.dumps(payload), now, now))
+                conn.execute("UPDATE quote_cache_stats SET value = value + 1 WHERE name='misses'")
+                self._evict(conn)
+            return payload
+        finally:
+            conn.close()
+
+    def _write_touched(self, conn):
+        with self._lock:
+            touched, hits = self._touched, self._hits
+            self._touched, self._hits = {}, 0
+            self._flushed_at = self._clock()
+        if touched:
+            conn.executemany("UPDATE quote_cache SET last_used = MAX(last_used, ?) WHERE key=?",
+                             [(used, key) for key, used in touched.items()])
+        if hits:
+            conn.execute("UPDATE quote_cache_stats SET value = value + ? WHERE name='hits'", (hits,))
+
+    def flush(self):
+        conn = db.connect()
+        try:
+            with conn:
+                self._write_touched(conn)
+        finally:
+            conn.close()
+
+    def _evict(self, conn):
+        excess = conn.execute("SELECT COUNT(*) FROM quote_cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute("""
+                DELETE FROM quote_cache WHERE key IN (
+                    SELECT key FROM quote_cache ORDER BY last_used LIMIT ?
+                )
+            """, (excess,))
+            conn.execute("UPDATE quote_cache_stats SET value = value + ? WHERE name='evictions'", (excess,))
+
+    def get_quote(self, loan: float, months: int, annual: float) -> LoanQuote:
+        payload = self._lookup("quote", loan, months, annual, lambda: list(quote_loan(loan, months, annual)))
+        return LoanQuote(*payload)
+
+    def get_schedule(self, loan: float, months: int, annual: float) -> list:
+        payload = self._lookup("schedule", loan, months, annual,
+                               lambda: [list(row) for row in schedule(loan, months, annual)])
+        return [ScheduleRow(*row) for row in payload]
+
+    def purge_expired(self) -> int:
+        conn = db.connect()
+        try:
+            with conn:
+                self._write_touched(conn)
+                cur = conn.execute("DELETE FROM quote_cache WHERE created_at + ? <= ?", (self.ttl, self._clock()))
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def clear(self):
+        with self._lock:
+            self._touched, self._hits = {}, 0
+        conn = db.connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM quote_cache")
+                conn.execute("UPDATE quote_cache_stats SET value = 0")
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        conn = db.connect()
+        try:
+            with conn:
+                self._write_touched(conn)
+            stats = dict(conn.execute("SELECT name, value FROM quote_cache_stats").fetchall())
+            stats["entries"] = conn.execute("SELECT COUNT(*) FROM quote_cache").fetchone()[0]
+        finally:
+            conn.close()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,179 @@
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import time
+
+import db
+
+SNAPSHOT_PATH = os.environ.get("RATES_SNAPSHOT_PATH", "rates_snapshot.bin")
+
+# Формат файла (little-endian):
+#   заголовок: magic, версия, ширина кода, число валют, время выгрузки
+#   таблица кодов: count * CODE_WIDTH байт ASCII, отсортирована, дополнена нулями
+#   значения: count * float64 (Value), выровнены по 8 байт
+#   номиналы: count * float64 (Nominal)
+MAGIC = b"CBRS"
+VERSION = 1
+CODE_WIDTH = 4
+HEADER = struct.Struct("<4sHHId")
+HEADER_SIZE = 24
+
+_NATIVE_LE = sys.byteorder == "little"
+
+
+class SnapshotFormatError(ValueError):
+    pass
+
+
+def _align8(offset: int) -> int:
+    return (offset + 7) & ~7
+
+
+def _layout(count: int):
+    values_offset = _align8(HEADER_SIZE + count * CODE_WIDTH)
+    nominals_offset = values_offset + count * 8
+    return values_offset, nominals_offset, nominals_offset + count * 8
+
+
+def pack_snapshot(rates: dict, created_at: float = None) -> bytes:
+    created_at = time.time() if created_at is None else created_at
+    codes = sorted(rates)
+    count = len(codes)
+    values_offset, nominals_offset, size = _layout(count)
+
+    buf = bytearray(size)
+    HEADER.pack_into(buf, 0, MAGIC, VERSION, CODE_WIDTH, count, created_at)
+    for i, code in enumerate(codes):
+        raw = code.encode("ascii")
+        if len(raw) > CODE_WIDTH:
+            raise ValueError(f"Currency code too long: {code!r}")
+        buf[HEADER_SIZE + i * CODE_WIDTH:HEADER_SIZE + i * CODE_WIDTH + len(raw)] = raw
+    struct.pack_into(f"<{count}d", buf, values_offset, *(float(rates[c]["Value"]) for c in codes))
+    struct.pack_into(f"<{count}d", buf, nominals_offset, *(float(rates[c].get("Nominal", 1)) for c in codes))
+    return bytes(buf)
+
+
+def export_snapshot(rates: dict, path: str = None) -> str:
+    path = path or SNAPSHOT_PATH
+    data = pack_snapshot(rates)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        # Воркеры, уже отобразившие старый файл, продолжают читать его inode
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return path
+
+
+def refresh_rates(rates: dict, on_export_error=None) -> list:
+    # Общий шаг обновления для GUI и CLI: курсы сохраняются в БД, затем
+    # выгружается снимок. Ошибка выгрузки не отменяет уже сохранённых курсов
+    changes = db.update_rates(rates)
+    try:
+        export_snapshot(rates)
+    except (OSError, ValueError) as e:
+        if on_export_error is None:
+            raise
+        on_export_error(e)
+    return changes
+
+
+class RatesSnapshot:
+    def __init__(self, path: str = None):
+        path = path or SNAPSHOT_PATH
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        try:
+            self._parse_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def _parse_header(self):
+        if len(self._view) < HEADER_SIZE:
+            raise SnapshotFormatError("Snapshot is truncated")
+        magic, version, code_width, count, created_at = HEADER.unpack_from(self._view, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError("Not a rates snapshot")
+        if version != VERSION or code_width != CODE_WIDTH:
+            raise SnapshotFormatError(f"Unsupported snapshot version {version}")
+        values_offset, nominals_offset, size = _layout(count)
+        if len(self._view) < size:
+            raise SnapshotFormatError("Snapshot is truncated")
+
+        self.count = count
+        self.created_at = created_at
+        self._codes = self._view[HEADER_SIZE:HEADER_SIZE + count * CODE_WIDTH]
+        if _NATIVE_LE:
+            self._values = self._view[values_offset:nominals_offset].cast("d")
+            self._nominals = self._view[nominals_offset:size].cast("d")
+        else:
+            self._values = _UnpackedColumn(self._view, values_offset)
+            self._nominals = _UnpackedColumn(self._view, nominals_offset)
+
+    def _code_at(self, i: int) -> bytes:
+        return self._codes[i * CODE_WIDTH:(i + 1) * CODE_WIDTH].tobytes()
+
+    def index(self, code: str) -> int:
+        # Таблица кодов отсортирована: двоичный поиск прямо по отображённой памяти
+        key = code.encode("ascii", "replace").ljust(CODE_WIDTH, b"\0")
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._code_at(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._code_at(lo) == key:
+            return lo
+        return -1
+
+    def get(self, code: str, default=None):
+        i = self.index(code)
+        return self._values[i] if i >= 0 else default
+
+    def nominal(self, code: str, default=None):
+        i = self.index(code)
+        return self._nominals[i] if i >= 0 else default
+
+    def codes(self):
+        return [self._code_at(i).rstrip(b"\0").decode("ascii") for i in range(self.count)]
+
+    def __contains__(self, code: str) -> bool:
+        return self.index(code) >= 0
+
+    def __len__(self) -> int:
+        return self.count
+
+    def close(self):
+        for name in ("_values", "_nominals", "_codes", "_view"):
+            view = self.__dict__.pop(name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, "_mmap", None) is not None:
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _UnpackedColumn:
+    # Запасной путь для big-endian платформ, где cast("d") дал бы неверный порядок байт
+    def __init__(self, view: memoryview, offset: int):
+        self._view = view
+        self._offset = offset
+
+    def __getitem__(self, i: int) -> float:
+        return struct.unpack_from("<d", self._view, self._offset + i * 8)[0]
@@ -0,0 +1,79 @@
+from collections import namedtuple
+
+import numpy as np
+
+from batch_engine import annuity_payments
+from engine import annuity_payment, balance_after, validate_loan
+
+OfferScores = namedtuple("OfferScores", ["payment", "savings", "npv", "break_even"])
+RANKINGS = ("npv", "savings")
+
+_EPSILON = 1e-9
+
+
+def _annuity_values(months: np.ndarray, monthly: float) -> np.ndarray:
+    # Приведённая стоимость платежа 1 RUB в месяц в течение months месяцев
+    if 1 + monthly == 1:
+        return months.astype(np.float64)
+    return (1 - (1 + monthly) ** -months) / monthly
+
+
+def score_offers(loan: float, months: int, annual: float, offer_annuals, offer_months, offer_fees=0.0,
+                 paid_months: int = 0, discount_annual: float = None) -> OfferScores:
+    # Все предложения оцениваются одним векторным проходом. Текущий кредит —
+    # аннуитет с остатком после paid_months платежей; новый кредит берётся на этот
+    # остаток, комиссия платится сразу. NPV считается по ставке discount_annual
+    # (по умолчанию — ставка текущего кредита)
+    validate_loan(loan, months, annual)
+    if not 0 <= paid_months < months:
+        raise ValueError(f"paid_months must be in 0..{months - 1}")
+    payment = annuity_payment(loan, months, annual)
+    balance = balance_after(loan, months, annual, paid_months, payment)
+    left = months - paid_months
+
+    terms = np.asarray(offer_months, dtype=np.int64)
+    fees = np.broadcast_to(np.asarray(offer_fees, dtype=np.float64), terms.shape)
+    payments = annuity_payments(np.full(terms.shape, balance), terms, offer_annuals)
+    savings = payment * left - payments * terms - fees
+
+    monthly = (annual if discount_annual is None else discount_annual) / 12 / 100
+    npv = payment * _annuity_values(np.int64(left), monthly) - payments * _annuity_values(terms, monthly) - fees
+    return OfferScores(payments, savings, npv, break_even_months(payment, left, payments, terms, fees))
+
+
+def break_even_months(payment: float, left: int, payments: np.ndarray, terms: np.ndarray,
+                      fees: np.ndarray) -> np.ndarray:
+    # Первый месяц, к которому накопленная экономия покрыла комиссию; -1 — никогда.
+    # Экономия кусочно-линейна: до min(сроков) растёт на payment - новый платёж,
+    # дальше — на payment (новый кредит закрыт) или падает на новый платёж
+    shorter = np.minimum(terms, left)
+    longer = np.maximum(terms, left)
+    first_slope = payment - payments
+    later_slope = np.where(terms < left, payment, -payments)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        first = np.ceil(fees / first_slope - _EPSILON)
+        at_shorter = shorter * first_slope - fees
+        second = shorter + np.ceil(-at_shorter / later_slope - _EPSILON)
+    first = np.maximum(first, 1)
+    result = np.full(terms.shape, -1, dtype=np.int64)
+    in_second = (later_slope > 0) & (second <= longer)
+    result[in_second] = second[in_second]
+    in_first = (first_slope > 0) & (first <= shorter)
+    result[in_first] = first[in_first]
+    # Без комиссии и без переплаты окупаемость сразу
+    result[(fees <= 0) & (first_slope >= 0)] = 1
+    return result
+
+
+def best_offers(scores: OfferScores, k: int, by: str = "npv") -> np.ndarray:
+    # Индексы k лучших предложений по убыванию: argpartition выбирает их за O(n),
+    # сортируются только сами k
+    if by not in RANKINGS:
+        raise ValueError(f"Unknown ranking {by!r}, expected one of {RANKINGS}")
+    values = np.where(np.isnan(getattr(scores, by)), -np.inf, getattr(scores, by))
+    k = min(k, len(values))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-values, k - 1)[:k]
+    return top[np.argsort(-values[top], kind="stable")]
@@ -0,0 +1,137 @@
+import contextlib
+import datetime
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CACHE_DIR = os.environ.get("RATES_CACHE_DIR", ".rates_cache")
+FALLBACK_TTL = 3600.0
+
+
+def _parse_time(value: str) -> float:
+    return datetime.datetime.fromisoformat(value).timestamp()
+
+
+def payload_expiry(payload: bytes, now: float = None) -> float:
+    # ЦБ публикует курсы раз в день: ответ актуален до NextDate,
+    # а если его нет — сутки от Timestamp
+    now = time.time() if now is None else now
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        return now + FALLBACK_TTL
+    try:
+        if data.get("NextDate"):
+            return _parse_time(data["NextDate"])
+        if data.get("Timestamp"):
+            return _parse_time(data["Timestamp"]) + 24 * 3600
+    except (TypeError, ValueError):
+        pass
+    return now + FALLBACK_TTL
+
+
+class ResponseCache:
+    def __init__(self, directory: str = CACHE_DIR):
+        self.directory = directory
+        self.blobs_dir = os.path.join(directory, "blobs")
+        self.index_dir = os.path.join(directory, "index")
+        os.makedirs(self.blobs_dir, exist_ok=True)
+        os.makedirs(self.index_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.blobs_dir, digest)
+
+    def _index_path(self, url: str) -> str:
+        return os.path.join(self.index_dir, self._key(url) + ".json")
+
+    def _write_atomic(self, path: str, data: bytes):
+        # Читатели видят либо старый файл, либо новый целиком: rename атомарен
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp_path)
+            raise
+
+    def get(self, url: str, now: float = None, allow_stale: bool = False):
+        now = time.time() if now is None else now
+        try:
+            with open(self._index_path(url), "rb") as f:
+                entry = json.loads(f.read())
+            if not allow_stale and entry["expires_at"] <= now:
+                return None
+            with open(self._blob_path(entry["digest"]), "rb") as f:
+                payload = f.read()
+        except (OSError, ValueError, KeyError):
+            return None
+        if hashlib.sha256(payload).hexdigest() != entry["digest"]:
+            return None
+        return payload
+
+    def put(self, url: str, payload: bytes, expires_at: float = None) -> str:
+        digest = hashlib.sha256(payload).hexdigest()
+        if expires_at is None:
+            expires_at = payload_expiry(payload)
+        blob_path = self._blob_path(digest)
+        if not os.path.exists(blob_path):
+            self._write_atomic(blob_path, payload)
+        previous = self._indexed_digest(self._index_path(url))
+        entry = {"url": url, "digest": digest, "expires_at": expires_at, "stored_at": time.time()}
+        self._write_atomic(self._index_path(url), json.dumps(entry).encode("utf-8"))
+        # Каждый день приходит новый ответ: прежний blob больше не нужен,
+        # иначе каталог растёт без ограничения
+        if previous is not None and previous != digest:
+            self.purge()
+        return digest
+
+    @staticmethod
+    def _indexed_digest(path: str):
+        try:
+            with open(path, "rb") as f:
+                return json.loads(f.read())["digest"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @contextlib.contextmanager
+    def lock(self, url: str):
+        # Межпроцессная блокировка на время запроса к сети: остальные
+        # процессы дождутся записи в кэш вместо повторного запроса
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.index_dir, self._key(url) + ".lock"), "a+b") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def purge(self) -> int:
+        referenced = set()
+        for name in os.listdir(self.index_dir):
+            if name.endswith(".json"):
+                referenced.add(self._indexed_digest(os.path.join(self.index_dir, name)))
+        removed = 0
+        for name in os.listdir(self.blobs_dir):
+            if name.startswith(".tmp-") or name in referenced:
+                continue
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self._blob_path(name))
+                removed += 1
+        return removed
@@ -0,0 +1,103 @@
+import datetime
+import threading
+import time
+from collections import namedtuple
+
+import db
+
+RetentionPolicy = namedtuple("RetentionPolicy", ["intraday_days", "daily_days"])
+
+DEFAULT_POLICY = RetentionPolicy(intraday_days=7, daily_days=365)
+MAINTENANCE_INTERVAL = 6 * 3600.0
+DAY = 86400
+
+
+def _day_start(ts: float) -> float:
+    return float(int(ts // DAY) * DAY)
+
+
+def _month_start(ts: float) -> float:
+    moment = datetime.datetime.fromtimestamp(ts, tz=datetime.timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0).timestamp()
+
+
+def compact_history(policy: RetentionPolicy = DEFAULT_POLICY, now: float = None) -> dict:
+    # Границы выровнены по дням и месяцам (UTC), чтобы не разрезать период
+    # и не получить две дневные точки за одни сутки
+    now = time.time() if now is None else now
+    intraday_cutoff = _day_start(now - policy.intraday_days * DAY)
+    daily_cutoff = _month_start(now - policy.daily_days * DAY)
+
+    conn = db.connect()
+    try:
+        cur = conn.cursor()
+        with conn:
+            cur.execute("""
+                INSERT INTO rate_history (currency, rate, recorded_at, granularity)
+                SELECT h.currency, h.rate, h.recorded_at, 'daily'
+                FROM rate_history h
+                JOIN (
+                    SELECT currency, MAX(recorded_at) AS closed_at
+                    FROM rate_history
+                    WHERE granularity='intraday' AND recorded_at<?
+                    GROUP BY currency, CAST(recorded_at / 86400 AS INTEGER)
+                ) c ON h.currency=c.currency AND h.recorded_at=c.closed_at
+                WHERE h.granularity='intraday'
+            """, (intraday_cutoff,))
+            daily = cur.rowcount
+            cur.execute("DELETE FROM rate_history WHERE granularity='intraday' AND recorded_at<?", (intraday_cutoff,))
+            intraday_removed = cur.rowcount
+
+            cur.execute("""
+                INSERT INTO rate_history (currency, rate, recorded_at, granularity)
+                SELECT currency, AVG(rate),
+                       CAST(strftime('%s', recorded_at, 'unixepoch', 'start of month') AS REAL),
+                       'monthly'
+                FROM rate_history
+                WHERE granularity='daily' AND recorded_at<?
+                GROUP BY currency, strftime('%Y-%m', recorded_at, 'unixepoch')
+            """, (daily_cutoff,))
+            monthly = cur.rowcount
+            cur.execute("DELETE FROM rate_history WHERE granularity='daily' AND recorded_at<?", (daily_cutoff,))
+            daily_removed = cur.rowcount
+
+        free_before = cur.execute("PRAGMA freelist_count").fetchone()[0]
+        # execute() делает один шаг прагмы и освобождает одну страницу;
+        # executescript() прогоняет её до конца
+        conn.executescript("PRAGMA incremental_vacuum;")
+        free_after = cur.execute("PRAGMA freelist_count").fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        "daily_created": daily,
+        "intraday_removed": intraday_removed,
+        "monthly_created": monthly,
+        "daily_removed": daily_removed,
+        "pages_freed": free_before - free_after,
+    }
+
+
+class HistoryMaintenance(threading.Thread):
+    def __init__(self, policy: RetentionPolicy = DEFAULT_POLICY, interval: float = MAINTENANCE_INTERVAL,
+                 on_error=None):
+        super().__init__(name="rates-history-maintenance", daemon=True)
+        self.policy = policy
+        self.interval = interval
+        self.on_error = on_error
+        self.last_result = None
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while True:
+            try:
+                self.last_result = compact_history(self.policy)
+            except Exception as e:
+                if self.on_error is not None:
+                    self.on_error(e)
+            if self._stop_event.wait(self.interval):
+                break
+
+    def stop(self, timeout: float = None):
+        self._stop_event.set()
+        self.join(timeout)
@@ -0,0 +1,164 @@
+import tkinter as tk
+from tkinter import ttk
+from bisect import bisect_right
+from itertools import accumulate
+
+from engine import annuity_payment, schedule_row
+
+VISIBLE_ROWS = 10
+WHEEL_ROWS = 3
+
+COLUMNS = (
+    ("loan", "№", 40),
+    ("month", "Месяц", 50),
+    ("payment", "Платёж", 85),
+    ("interest", "Проценты", 85),
+    ("principal", "Тело", 85),
+    ("balance", "Остаток", 95),
+)
+
+
+class LoanSchedule:
+    # Строки графика считаются по запросу в замкнутой форме — в памяти
+    # хранятся только параметры кредита
+    show_loan = False
+
+    def __init__(self, loan: float, months: int, annual: float, payment: float = None):
+        self.loan = loan
+        self.months = months
+        self.annual = annual
+        self.payment = annuity_payment(loan, months, annual) if payment is None else payment
+
+    def __len__(self) -> int:
+        return self.months
+
+    def row(self, index: int) -> tuple:
+        return 1, schedule_row(self.loan, self.months, self.annual, index + 1, self.payment)
+
+
+class BookSchedule:
+    # Графики нескольких кредитов подряд; номер кредита находится бинарным
+    # поиском по накопленным срокам
+    show_loan = True
+
+    def __init__(self, loans):
+        self.loans = [LoanSchedule(loan, months, annual) for loan, months, annual in loans]
+        self._starts = list(accumulate((len(loan) for loan in self.loans), initial=0))
+
+    def __len__(self) -> int:
+        return self._starts[-1]
+
+    def row(self, index: int) -> tuple:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Row {index} is outside 0..{len(self) - 1}")
+        number = bisect_right(self._starts, index) - 1
+        return number + 1, self.loans[number].row(index - self._starts[number])[1]
+
+
+class PlanSchedule:
+    # График с событиями из loan_events.IncrementalPlan; строки считаются по
+    # запросу, правки событий меняют его на месте
+    show_loan = False
+
+    def __init__(self, plan):
+        self.plan = plan
+
+    def __len__(self) -> int:
+        return self.plan.plan.months
+
+    def row(self, index: int) -> tuple:
+        return 1, self.plan.row(index + 1)
+
+
+def format_row(number: int, row) -> tuple:
+    return (number, row.month, f"{row.payment:.2f}", f"{row.interest:.2f}",
+            f"{row.principal:.2f}", f"{row.balance:.2f}")
+
+
+class ScheduleView(ttk.Frame):
+    # В Treeview всегда ровно height элементов: при прокрутке меняются только
+    # их значения, а полоса прокрутки управляется вручную по номеру первой строки
+    def __init__(self, master, height: int = VISIBLE_ROWS):
+        super().__init__(master)
+        self.height = height
+        self.source = None
+        self.first = 0
+
+        self.tree = ttk.Treeview(self, columns=[name for name, _, _ in COLUMNS], show="headings",
+                                 height=height, selectmode="none")
+        for name, title, width in COLUMNS:
+            self.tree.heading(name, text=title)
+            self.tree.column(name, width=width, anchor="e", stretch=False)
+        self.tree.grid(row=0, column=0, sticky="nsew")
+
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", self._on_wheel)
+        self.tree.bind("<Button-5>", self._on_wheel)
+        self.tree.bind("<Prior>", lambda event: self._scroll_by(-self.height))
+        self.tree.bind("<Next>", lambda event: self._scroll_by(self.height))
+
+        self._items = [self.tree.insert("", tk.END, values=()) for _ in range(height)]
+        self.render()
+
+    def set_source(self, source):
+        self.source = source
+        self.first = 0
+        names = [name for name, _, _ in COLUMNS]
+        self.tree.configure(displaycolumns=names if source is not None and source.show_loan else names[1:])
+        self.render()
+
+    def apply_diff(self, diff):
+        # Правка графика (loan_events.ScheduleDiff): перерисовка нужна, только если
+        # изменились видимые строки или длина графика сдвинула окно
+        first = max(0, min(self.first, diff.months - self.height))
+        if first != self.first or diff.start - 1 < first + self.height:
+            self.first = first
+            self.render()
+        else:
+            total = self.total()
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.height) / total))
+
+    def total(self) -> int:
+        return len(self.source) if self.source is not None else 0
+
+    def scroll_to(self, first: int):
+        first = max(0, min(int(first), self.total() - self.height))
+        if first != self.first:
+            self.first = first
+            self.render()
+
+    def _scroll_by(self, rows: int) -> str:
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def yview(self, *args):
+        # Протокол команды ttk.Scrollbar: ("moveto", доля) или ("scroll", n, "units"/"pages")
+        if not args:
+            return
+        if args[0] == "moveto":
+            self.scroll_to(round(float(args[1]) * self.total()))
+        elif args[0] == "scroll":
+            step = self.height if args[2] == "pages" else 1
+            self._scroll_by(int(args[1]) * step)
+
+    def _on_wheel(self, event) -> str:
+        if getattr(event, "num", None) == 4 or getattr(event, "delta", 0) > 0:
+            return self._scroll_by(-WHEEL_ROWS)
+        return self._scroll_by(WHEEL_ROWS)
+
+    def visible_rows(self) -> list:
+        end = min(self.first + self.height, self.total())
+        return [format_row(*self.source.row(index)) for index in range(self.first, end)]
+
+    def render(self):
+        rows = self.visible_rows()
+        for offset, item in enumerate(self._items):
+            self.tree.item(item, values=rows[offset] if offset < len(rows) else ())
+        total = self.total()
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.height) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
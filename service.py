@@ -0,0 +1,349 @@
+import argparse
+import asyncio
+import json
+import math
+from collections import namedtuple
+
+import numpy as np
+
+import api
+from async_db import AsyncRateStore
+from batch_engine import quote_loans
+from batching import QuoteBatcher, DEFAULT_MAX_BATCH, DEFAULT_MAX_DELAY
+from engine import LoanQuote, parse_loan_fields, schedule
+from quote_cache import QuoteCache
+from refinance import RANKINGS, best_offers, score_offers
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+MAX_PIPELINE = 64
+MAX_BODY = 8 * 1024 * 1024
+MAX_BATCH_LOANS = 10000
+MAX_SCHEDULE_MONTHS = 1200
+MAX_OFFERS = 100000
+DEFAULT_TOP_OFFERS = 10
+
+Request = namedtuple("Request", ["method", "path", "headers", "body", "keep_alive"])
+
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+            413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_request(reader: asyncio.StreamReader):
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError as e:
+        if not e.partial.strip():
+            return None
+        raise HttpError(400, "Incomplete request")
+    except asyncio.LimitOverrunError:
+        raise HttpError(400, "Request head too large")
+
+    lines = head.decode("latin-1").split("\r\n")
+    try:
+        method, target, version = lines[0].split(" ", 2)
+    except ValueError:
+        raise HttpError(400, "Malformed request line")
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get("content-length", "0"))
+    except ValueError:
+        raise HttpError(400, "Invalid Content-Length")
+    if length < 0:
+        raise HttpError(400, "Invalid Content-Length")
+    if length > MAX_BODY:
+        raise HttpError(413, "Request body too large")
+    try:
+        body = await reader.readexactly(length) if length else b""
+    except asyncio.IncompleteReadError:
+        raise HttpError(400, "Incomplete request body")
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+    return Request(method.upper(), target.split("?", 1)[0], headers, body, keep_alive)
+
+
+def encode_response(status: int, payload, keep_alive: bool) -> bytes:
+    # NaN и Infinity — не JSON: такой ответ не должен уйти клиенту
+    body = json.dumps(payload, ensure_ascii=False, allow_nan=False).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {_REASONS.get(status, 'Error')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+def parse_loan(data) -> tuple:
+    try:
+        return parse_loan_fields(data)
+    except ValueError as e:
+        raise HttpError(400, str(e))
+
+
+def quote_json(quote: LoanQuote) -> dict:
+    return {
+        "payment": round(quote.payment, 2),
+        "total": round(quote.total, 2),
+        "interest": round(quote.interest, 2),
+    }
+
+
+class QuoteService:
+    def __init__(self, store: AsyncRateStore = None, max_pipeline: int = MAX_PIPELINE,
+                 batcher: QuoteBatcher = None, cache: QuoteCache = None):
+        self.store = store or AsyncRateStore()
+        self.batcher = batcher or QuoteBatcher()
+        self.cache = cache
+        self.max_pipeline = max_pipeline
+        self.stats = {"connections": 0, "requests": 0, "errors": 0}
+        self.routes = {
+            ("GET", "/health"): self.handle_health,
+            ("GET", "/metrics"): self.handle_metrics,
+            ("POST", "/quote"): self.handle_quote,
+            ("POST", "/schedule"): self.handle_schedule,
+            ("POST", "/convert"): self.handle_convert,
+            ("POST", "/batch"): self.handle_batch,
+            ("POST", "/refinance"): self.handle_refinance,
+        }
+
+    async def start(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+    async def close(self):
+        if self.cache is not None:
+            await asyncio.get_running_loop().run_in_executor(None, self.cache.flush)
+        await self.store.close()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        # Конвейер HTTP/1.1: запросы разбираются и считаются параллельно,
+        # а ответы уходят строго в порядке поступления
+        self.stats["connections"] += 1
+        responses = asyncio.Queue(self.max_pipeline)
+        writer_task = asyncio.create_task(self._write_responses(responses, writer))
+        try:
+            while not writer_task.done():
+                try:
+                    request = await read_request(reader)
+                except HttpError as e:
+                    await responses.put((self._error(e.status, str(e)), False))
+                    break
+                except ConnectionError:
+                    break
+                if request is None:
+                    break
+                await responses.put((asyncio.create_task(self.respond(request)), request.keep_alive))
+                if not request.keep_alive:
+                    break
+        finally:
+            await responses.put(None)
+            await writer_task
+            writer.close()
+
+    async def _write_responses(self, responses: asyncio.Queue, writer: asyncio.StreamWriter):
+        alive = True
+        while True:
+            item = await responses.get()
+            if item is None:
+                return
+            response, keep_alive = item
+            data = await response
+            if not alive:
+                continue
+            try:
+                writer.write(data)
+                await writer.drain()
+            except ConnectionError:
+                alive = False
+
+    def _error(self, status: int, message: str) -> asyncio.Future:
+        self.stats["errors"] += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(encode_response(status, {"error": message}, False))
+        return future
+
+    async def respond(self, request: Request) -> bytes:
+        status, payload = await self.dispatch(request.method, request.path, request.body)
+        try:
+            return encode_response(status, payload, request.keep_alive)
+        except ValueError:
+            self.stats["errors"] += 1
+            return encode_response(500, {"error": "Result is not a finite number"}, request.keep_alive)
+
+    async def dispatch(self, method: str, path: str, body: bytes) -> tuple:
+        self.stats["requests"] += 1
+        handler = self.routes.get((method, path))
+        try:
+            if handler is None:
+                if any(route_path == path for _, route_path in self.routes):
+                    raise HttpError(405, f"{method} not allowed on {path}")
+                raise HttpError(404, f"Unknown endpoint {path}")
+            data = None
+            if method == "POST":
+                try:
+                    data = json.loads(body or b"null")
+                except ValueError:
+                    raise HttpError(400, "Body must be valid JSON")
+            return 200, await handler(data)
+        except HttpError as e:
+            self.stats["errors"] += 1
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            self.stats["errors"] += 1
+            return 500, {"error": str(e)}
+
+    async def handle_health(self, data) -> dict:
+        return {"status": "ok"}
+
+    async def handle_metrics(self, data) -> dict:
+        return {"service": dict(self.stats), "rates_api": api.breaker.metrics(),
+                "rate_store": dict(self.store.stats), "batcher": dict(self.batcher.stats)}
+
+    async def handle_quote(self, data) -> dict:
+        inputs = parse_loan(data)
+        if self.cache is not None:
+            # SQLite кэша не должен блокировать event loop
+            return quote_json(await asyncio.get_running_loop().run_in_executor(None, self.cache.get_quote, *inputs))
+        return quote_json(await self.batcher.quote(*inputs))
+
+    async def handle_schedule(self, data) -> dict:
+        loan, months, annual = parse_loan(data)
+        if months > MAX_SCHEDULE_MONTHS:
+            raise HttpError(400, f"Schedules are limited to {MAX_SCHEDULE_MONTHS} months")
+        if self.cache is not None:
+            loan_rows = await asyncio.get_running_loop().run_in_executor(None, self.cache.get_schedule, loan, months,
+                                                                         annual)
+        else:
+            loan_rows = schedule(loan, months, annual)
+        rows = [
+            [row.month, round(row.payment, 2), round(row.interest, 2), round(row.principal, 2), round(row.balance, 2)]
+            for row in loan_rows
+        ]
+        return {"columns": ["month", "payment", "interest", "principal", "balance"], "rows": rows}
+
+    async def handle_convert(self, data) -> dict:
+        if not isinstance(data, dict) or "amount" not in data:
+            raise HttpError(400, "Missing field: amount")
+        try:
+            amount = float(data["amount"])
+        except (TypeError, ValueError, OverflowError):
+            raise HttpError(400, "amount must be a number")
+        if not math.isfinite(amount):
+            raise HttpError(400, "amount must be a finite number")
+        target = str(data.get("currency", "USD")).upper()
+        rate = await self.store.get_saved_rate(target)
+        if rate is None:
+            raise HttpError(404, f"No saved rate for {target}")
+        return {"amount": amount, "base": "RUB", "currency": target, "rate": rate,
+                "converted": round(amount / rate, 2)}
+
+    async def handle_batch(self, data) -> dict:
+        loans = data.get("loans") if isinstance(data, dict) else None
+        if not isinstance(loans, list):
+            raise HttpError(400, "Body must contain a list of loans")
+        if len(loans) > MAX_BATCH_LOANS:
+            raise HttpError(413, f"At most {MAX_BATCH_LOANS} loans per batch")
+        quotes, valid = [], []
+        for item in loans:
+            try:
+                valid.append((len(quotes), parse_loan(item)))
+                quotes.append(None)
+            except HttpError as e:
+                quotes.append({"error": str(e)})
+        if valid:
+            for (index, _), quote in zip(valid, quote_loans(*zip(*(inputs for _, inputs in valid)))):
+                quotes[index] = quote_json(quote)
+        return {"quotes": quotes}
+
+    async def handle_refinance(self, data) -> dict:
+        if not isinstance(data, dict):
+            raise HttpError(400, "Body must be a JSON object")
+        loan, months, annual = parse_loan(data.get("loan"))
+        offers = data.get("offers")
+        if not isinstance(offers, list) or not offers:
+            raise HttpError(400, "Body must contain a non-empty list of offers")
+        if len(offers) > MAX_OFFERS:
+            raise HttpError(413, f"At most {MAX_OFFERS} offers per request")
+        try:
+            columns = np.array([[offer["annual"], offer["months"], offer.get("fee", 0.0)] for offer in offers],
+                               dtype=np.float64)
+        except KeyError as e:
+            raise HttpError(400, f"Missing offer field: {e.args[0]}")
+        except (TypeError, ValueError, OverflowError, AttributeError):
+            raise HttpError(400, "Offers must be objects with numeric annual, months and fee")
+        try:
+            k = int(data.get("k", DEFAULT_TOP_OFFERS))
+            paid_months = int(data.get("paid_months", 0))
+            discount = data.get("discount_annual")
+            discount = None if discount is None else float(discount)
+        except (TypeError, ValueError, OverflowError):
+            raise HttpError(400, "k, paid_months and discount_annual must be finite numbers")
+        if discount is not None and not math.isfinite(discount):
+            raise HttpError(400, "k, paid_months and discount_annual must be finite numbers")
+        by = data.get("by", "npv")
+        if by not in RANKINGS:
+            raise HttpError(400, f"by must be one of {', '.join(RANKINGS)}")
+        annuals, terms, fees = columns.T
+        # Сроки ограничены до приведения к int64: 1e300 — целое, но в int64 не помещается
+        bad = np.flatnonzero((annuals < 0) | (terms < 1) | (terms > MAX_SCHEDULE_MONTHS) | (terms != np.floor(terms))
+                             | (fees < 0) | ~np.isfinite(columns).all(axis=1))
+        if len(bad):
+            raise HttpError(400, f"Invalid offer at index {bad[0]}")
+
+        try:
+            scores = score_offers(loan, months, annual, annuals, terms.astype(np.int64), fees, paid_months, discount)
+        except ValueError as e:
+            raise HttpError(400, str(e))
+        best = [
+            {"index": int(i), "annual": annuals[i], "months": int(terms[i]), "fee": fees[i],
+             "payment": round(scores.payment[i], 2), "savings": round(scores.savings[i], 2),
+             "npv": round(scores.npv[i], 2), "break_even": int(scores.break_even[i])}
+            for i in best_offers(scores, k, by).tolist()
+        ]
+        return {"count": len(offers), "by": by, "offers": best}
+
+
+async def serve(host: str, port: int, max_batch: int = DEFAULT_MAX_BATCH, max_delay: float = DEFAULT_MAX_DELAY,
+                quote_cache: bool = False):
+    service = QuoteService(batcher=QuoteBatcher(max_batch, max_delay), cache=QuoteCache() if quote_cache else None)
+    server = await service.start(host, port)
+    print(f"Serving on http://{host}:{server.sockets[0].getsockname()[1]}", flush=True)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="JSON-over-HTTP loan quote and conversion service")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH,
+                        help="Quotes computed per vectorized batch (throughput)")
+    parser.add_argument("--max-delay-ms", type=float, default=DEFAULT_MAX_DELAY * 1000,
+                        help="Longest time a quote waits for its batch (latency); 0 disables batching")
+    parser.add_argument("--quote-cache", action="store_true",
+                        help="Serve repeat /quote and /schedule requests from the shared SQLite result cache")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_delay_ms / 1000, args.quote_cache))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import struct
+import time
+from multiprocessing import shared_memory
+
+from db import get_all_rates
+from rates_snapshot import CODE_WIDTH
+
+# Раскладка сегмента:
+#   generation uint64 — seqlock: нечётное значение означает, что идёт запись
+#   count uint32, capacity uint32
+#   таблица кодов: capacity * CODE_WIDTH байт
+#   значения: capacity * float64
+HEADER = struct.Struct("<QII")
+GENERATION = struct.Struct("<Q")
+DEFAULT_CAPACITY = 128
+
+
+def _segment_size(capacity: int) -> int:
+    return HEADER.size + capacity * CODE_WIDTH + capacity * 8
+
+
+class SharedRatesTable:
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self._shm = shm
+        self._owner = owner
+        self._buf = shm.buf
+        _, _, self.capacity = HEADER.unpack_from(self._buf, 0)
+        self._values_offset = HEADER.size + self.capacity * CODE_WIDTH
+        self._cached_generation = None
+        self._cached_rates = {}
+
+    @classmethod
+    def create(cls, rates: dict = None, capacity: int = DEFAULT_CAPACITY, name: str = None):
+        shm = shared_memory.SharedMemory(name=name, create=True, size=_segment_size(capacity))
+        HEADER.pack_into(shm.buf, 0, 0, 0, capacity)
+        table = cls(shm, owner=True)
+        if rates:
+            table.publish(rates)
+        return table
+
+    @classmethod
+    def from_db(cls, capacity: int = DEFAULT_CAPACITY, name: str = None):
+        return cls.create(get_all_rates(), capacity=capacity, name=name)
+
+    @classmethod
+    def attach(cls, name: str):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    @property
+    def generation(self) -> int:
+        return GENERATION.unpack_from(self._buf, 0)[0]
+
+    def publish(self, rates: dict) -> int:
+        # Пишет только владелец сегмента; читатели определяют гонку по generation
+        if not self._owner:
+            raise PermissionError("Only the creating process can publish rates")
+        if len(rates) > self.capacity:
+            raise ValueError(f"{len(rates)} rates do not fit into capacity {self.capacity}")
+
+        codes = sorted(rates)
+        table = bytearray(self.capacity * CODE_WIDTH)
+        for i, code in enumerate(codes):
+            raw = code.encode("ascii")
+            if len(raw) > CODE_WIDTH:
+                raise ValueError(f"Currency code too long: {code!r}")
+            table[i * CODE_WIDTH:i * CODE_WIDTH + len(raw)] = raw
+        values = [float(rates[c]) for c in codes]
+
+        generation = self.generation + 1
+        GENERATION.pack_into(self._buf, 0, generation)
+        self._buf[HEADER.size:self._values_offset] = table
+        struct.pack_into(f"<{len(codes)}d", self._buf, self._values_offset, *values)
+        HEADER.pack_into(self._buf, 0, generation, len(codes), self.capacity)
+
+        GENERATION.pack_into(self._buf, 0, generation + 1)
+        return generation + 1
+
+    def refresh_from_db(self) -> int:
+        return self.publish(get_all_rates())
+
+    def _read(self) -> tuple:
+        while True:
+            before = self.generation
+            if before & 1:
+                time.sleep(0)
+                continue
+            _, count, _ = HEADER.unpack_from(self._buf, 0)
+            codes = bytes(self._buf[HEADER.size:HEADER.size + count * CODE_WIDTH])
+            values = struct.unpack_from(f"<{count}d", self._buf, self._values_offset)
+            if self.generation == before:
+                break
+        rates = {
+            codes[i * CODE_WIDTH:(i + 1) * CODE_WIDTH].rstrip(b"\0").decode("ascii"): values[i]
+            for i in range(count)
+        }
+        return before, rates
+
+    def rates(self) -> dict:
+        # Словарь пересобирается только после публикации новой версии
+        if self._cached_generation != self.generation:
+            self._cached_generation, self._cached_rates = self._read()
+        return self._cached_rates
+
+    def get(self, code: str, default=None):
+        return self.rates().get(code, default)
+
+    def close(self):
+        self._buf = None
+        self._shm.close()
+
+    def unlink(self):
+        if self._owner:
+            self._shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        self.unlink()
+
+
+_worker_table = None
+
+
+def init_worker(name: str):
+    # Инициализатор для multiprocessing.Pool(initializer=init_worker, initargs=(table.name,))
+    global _worker_table
+    _worker_table = SharedRatesTable.attach(name)
+
+
+def worker_rate(code: str, default=None):
+    if _worker_table is None:
+        raise RuntimeError("Shared rates table is not attached in this process")
+    return _worker_table.get(code, default)
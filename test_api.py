@@ -1,7 +1,19 @@
 import pytest
 import requests
 from unittest.mock import patch, MagicMock
-from api import fetch_rates, API_URL
+import api
+from api import fetch_rates, API_URL, FETCH_TIMEOUT, CircuitBreaker, CircuitOpenError
+
+
+@pytest.fixture(autouse=True)
+def reset_breaker(monkeypatch):
+    """Start every test with a closed breaker and no cached snapshot"""
+    monkeypatch.setattr(api, 'RESPONSE_CACHE_DIR', None)
+    api.breaker.reset()
+    api._last_rates = None
+    yield
+    api.breaker.reset()
+    api._last_rates = None
 
 
 class TestFetchRates:
@@ -44,7 +56,7 @@ class TestFetchRates:
             result = fetch_rates()
             
             # Verify the function was called correctly
-            mock_get.assert_called_once_with(API_URL)
+            mock_get.assert_called_once_with(API_URL, timeout=FETCH_TIMEOUT)
             mock_response.raise_for_status.assert_called_once()
             mock_response.json.assert_called_once()
             
@@ -104,6 +116,7 @@ class TestFetchRates:
             
             with pytest.raises(RuntimeError, match="Failed to fetch rates: Request timed out"):
                 fetch_rates()
+            assert mock_get.call_args.kwargs["timeout"] == FETCH_TIMEOUT
     
     def test_fetch_rates_empty_valute(self):
         """Test API response with empty Valute field"""
@@ -196,5 +209,173 @@ class TestApiIntegration:
             assert isinstance(usd_data['Value'], (int, float))
 
 
+class FakeClock:
+    """Manually advanced clock for breaker timing tests"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestCircuitBreaker:
+    """Test class for CircuitBreaker and its use in fetch_rates"""
+
+    def test_opens_after_threshold_failures(self):
+        """Test that the breaker opens after the configured number of failures"""
+        cb = CircuitBreaker(failure_threshold=2, recovery_timeout=10, clock=FakeClock())
+
+        cb.record_failure()
+        assert cb.state == CircuitBreaker.CLOSED
+        cb.record_failure()
+        assert cb.state == CircuitBreaker.OPEN
+        assert cb.allow() is False
+        assert cb.metrics()["short_circuited"] == 1
+
+    def test_half_open_after_recovery_timeout(self):
+        """Test that a single probe is allowed once the recovery timeout elapses"""
+        clock = FakeClock()
+        cb = CircuitBreaker(failure_threshold=1, recovery_timeout=10, clock=clock)
+        cb.record_failure()
+
+        clock.now = 10.0
+        assert cb.allow() is True
+        assert cb.state == CircuitBreaker.HALF_OPEN
+        assert cb.allow() is False, "Only one probe should be let through"
+
+    def test_half_open_success_closes(self):
+        """Test that a successful probe closes the breaker"""
+        clock = FakeClock()
+        cb = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+        cb.record_failure()
+        clock.now = 5.0
+        cb.allow()
+
+        cb.record_success()
+
+        assert cb.state == CircuitBreaker.CLOSED
+        assert cb.metrics()["consecutive_failures"] == 0
+
+    def test_half_open_failure_reopens(self):
+        """Test that a failed probe reopens the breaker and restarts the timeout"""
+        clock = FakeClock()
+        cb = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=clock)
+        cb.record_failure()
+        clock.now = 5.0
+        cb.allow()
+
+        cb.record_failure()
+
+        assert cb.state == CircuitBreaker.OPEN
+        assert cb.metrics()["opened"] == 2
+        clock.now = 9.0
+        assert cb.allow() is False
+
+    def test_listeners_receive_transitions(self):
+        """Test that state change listeners are notified"""
+        cb = CircuitBreaker(failure_threshold=1, recovery_timeout=5, clock=FakeClock())
+        listener = MagicMock()
+        cb.add_listener(listener)
+
+        cb.record_failure()
+        cb.record_failure()
+
+        listener.assert_called_once_with(CircuitBreaker.CLOSED, CircuitBreaker.OPEN)
+
+    def test_fetch_rates_fails_fast_when_open(self):
+        """Test that fetch_rates does not hit the network while the breaker is open"""
+        with patch('api.requests.get') as mock_get:
+            mock_get.side_effect = requests.ConnectionError("Connection failed")
+            for _ in range(api.breaker.failure_threshold):
+                with pytest.raises(RuntimeError):
+                    fetch_rates()
+
+            mock_get.reset_mock()
+            with pytest.raises(CircuitOpenError):
+                fetch_rates()
+
+            mock_get.assert_not_called()
+
+    def test_fetch_rates_serves_snapshot_when_open(self):
+        """Test that the last good payload is served while the breaker is open"""
+        with patch('api.requests.get') as mock_get:
+            mock_response = MagicMock()
+            mock_response.json.return_value = {"Valute": {"USD": {"Value": 75.5}}}
+            mock_response.raise_for_status.return_value = None
+            mock_get.return_value = mock_response
+            fetch_rates()
+
+            mock_get.side_effect = requests.ConnectionError("Connection failed")
+            for _ in range(api.breaker.failure_threshold):
+                with pytest.raises(RuntimeError):
+                    fetch_rates()
+
+            mock_get.reset_mock()
+            result = fetch_rates()
+
+            mock_get.assert_not_called()
+            assert result == {"USD": {"Value": 75.5}}
+            assert api.breaker.metrics()["served_from_snapshot"] == 1
+
+
+class TestFetchRatesResponseCache:
+    """Test fetch_rates together with the on-disk response cache"""
+
+    PAYLOAD = b'{"NextDate": "2999-01-01T11:30:00+03:00", "Valute": {"USD": {"Value": 75.5}}}'
+
+    @pytest.fixture
+    def cache_dir(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(api, 'RESPONSE_CACHE_DIR', str(tmp_path))
+        return tmp_path
+
+    def mock_response(self, payload):
+        import json
+        mock_response = MagicMock()
+        mock_response.content = payload
+        mock_response.json.return_value = json.loads(payload)
+        mock_response.raise_for_status.return_value = None
+        return mock_response
+
+    def test_second_fetch_is_served_from_disk(self, cache_dir):
+        """Test that a fresh cached payload avoids the network call"""
+        with patch('api.requests.get') as mock_get:
+            mock_get.return_value = self.mock_response(self.PAYLOAD)
+            first = fetch_rates()
+
+            api._last_rates = None
+            second = fetch_rates()
+
+            mock_get.assert_called_once_with(API_URL, timeout=FETCH_TIMEOUT)
+            assert first == second == {"USD": {"Value": 75.5}}
+
+    def test_expired_payload_is_refetched(self, cache_dir):
+        """Test that an expired payload triggers a new request"""
+        expired = b'{"NextDate": "2000-01-01T11:30:00+03:00", "Valute": {"USD": {"Value": 70.0}}}'
+        with patch('api.requests.get') as mock_get:
+            mock_get.return_value = self.mock_response(expired)
+            fetch_rates()
+            mock_get.return_value = self.mock_response(self.PAYLOAD)
+
+            result = fetch_rates()
+
+            assert mock_get.call_count == 2
+            assert result["USD"]["Value"] == 75.5
+
+    def test_stale_payload_served_when_circuit_open(self, cache_dir):
+        """Test that an expired cached payload is served while the breaker is open"""
+        expired = b'{"NextDate": "2000-01-01T11:30:00+03:00", "Valute": {"USD": {"Value": 70.0}}}'
+        api.get_response_cache().put(API_URL, expired)
+        with patch('api.requests.get') as mock_get:
+            mock_get.side_effect = requests.ConnectionError("Connection failed")
+            for _ in range(api.breaker.failure_threshold):
+                with pytest.raises(RuntimeError):
+                    fetch_rates()
+
+            result = fetch_rates()
+
+            assert result == {"USD": {"Value": 70.0}}
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,126 @@
+import pytest
+import asyncio
+import os
+import tempfile
+from unittest.mock import patch, MagicMock
+from db import init_db, save_rate, get_saved_rate, add_rate_listener, remove_rate_listener, RateChange
+from async_db import AsyncRateStore
+
+
+class TestAsyncRateStore:
+    """Test class for the asyncio rate store backed by a DB thread"""
+
+    @pytest.fixture
+    def temp_db(self):
+        """Create a temporary database for testing"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        temp_file.close()
+
+        with patch('db.DB_NAME', temp_file.name):
+            init_db()
+            yield temp_file.name
+
+        try:
+            os.unlink(temp_file.name)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+    def test_save_and_get(self, temp_db):
+        """Test an async round trip through the DB thread"""
+        async def scenario():
+            async with AsyncRateStore() as store:
+                await store.save_rate(1, 'USD', 75.5)
+                return await store.get_saved_rate('USD')
+
+        assert asyncio.run(scenario()) == 75.5
+
+    def test_missing_currency_returns_none(self, temp_db):
+        """Test that an unknown currency resolves to None"""
+        async def scenario():
+            async with AsyncRateStore() as store:
+                return await store.get_saved_rate('XXX')
+
+        assert asyncio.run(scenario()) is None
+
+    def test_visible_to_sync_api(self, temp_db):
+        """Test that async writes are visible to the sync functions"""
+        async def scenario():
+            async with AsyncRateStore() as store:
+                await store.save_rate(1, 'EUR', 82.3)
+
+        asyncio.run(scenario())
+
+        assert get_saved_rate('EUR') == 82.3
+
+    def test_concurrent_writes_are_batched(self, temp_db):
+        """Test that concurrent writes share commits"""
+        async def scenario():
+            async with AsyncRateStore() as store:
+                await asyncio.gather(*(store.save_rate(i, f'C{i:03d}', float(i)) for i in range(1, 201)))
+                rates = await store.get_all_rates()
+                return store.stats, rates
+
+        stats, rates = asyncio.run(scenario())
+
+        assert len(rates) == 200
+        assert stats["commits"] < 200
+
+    def test_read_sees_earlier_write_in_same_batch(self, temp_db):
+        """Test that a read queued after a write observes it"""
+        async def scenario():
+            async with AsyncRateStore() as store:
+                _, rate = await asyncio.gather(store.save_rate(1, 'GBP', 95.0), store.get_saved_rate('GBP'))
+                return rate
+
+        assert asyncio.run(scenario()) == 95.0
+
+    def test_update_rates_returns_changes_and_notifies(self, temp_db):
+        """Test the async delta update and its listener notification"""
+        save_rate(1, 'USD', 75.0)
+        listener = MagicMock()
+        add_rate_listener(listener)
+
+        async def scenario():
+            async with AsyncRateStore() as store:
+                return await store.update_rates({'USD': {'Value': 80.0}, 'EUR': {'Value': 82.0}})
+
+        try:
+            changes = asyncio.run(scenario())
+        finally:
+            remove_rate_listener(listener)
+
+        assert [c.currency for c in changes] == ['USD', 'EUR']
+        listener.assert_called_once_with(changes)
+
+    def test_failed_write_does_not_affect_batch(self, temp_db):
+        """Test that one failing write is rolled back alone"""
+        async def scenario():
+            async with AsyncRateStore() as store:
+                results = await asyncio.gather(
+                    store.save_rate(1, 'USD', 75.0),
+                    store.save_rate(2, None, 1.0),
+                    store.save_rate(3, 'EUR', 82.0),
+                    return_exceptions=True,
+                )
+                return results, await store.get_all_rates()
+
+        results, rates = asyncio.run(scenario())
+
+        assert results[0] is None and results[2] is None
+        assert isinstance(results[1], Exception)
+        assert rates == {'USD': 75.0, 'EUR': 82.0}
+
+    def test_closed_store_rejects_requests(self, temp_db):
+        """Test that requests after close fail"""
+        async def scenario():
+            store = AsyncRateStore()
+            await store.get_all_rates()
+            await store.close()
+            await store.get_all_rates()
+
+        with pytest.raises(RuntimeError, match="closed"):
+            asyncio.run(scenario())
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,80 @@
+import pytest
+import numpy as np
+from datetime import date
+from batch_engine import (annuity_payments, quote_batch, quote_loans, differentiated_batch,
+                          quote_differentiated_loans, differentiated_columns, dated_schedule_columns)
+from day_count import ACT_ACT, dated_schedule
+from engine import annuity_payment, quote_loan, quote_differentiated, differentiated_schedule
+
+
+class TestBatchEngine:
+    """Test class for the vectorized annuity math"""
+
+    LOANS = [100000.0, 250000.0, 1200.0, 5000000.0]
+    MONTHS = [12, 60, 12, 360]
+    ANNUALS = [17.0, 9.5, 0.0, 12.0]
+
+    def test_matches_scalar_engine(self):
+        """Test that vectorized payments equal the scalar formula"""
+        payments = annuity_payments(self.LOANS, self.MONTHS, self.ANNUALS)
+
+        for payment, args in zip(payments, zip(self.LOANS, self.MONTHS, self.ANNUALS)):
+            assert payment == pytest.approx(annuity_payment(*args), rel=1e-12)
+
+    def test_zero_rate(self):
+        """Test that zero rates fall back to equal principal parts"""
+        assert annuity_payments([1200.0], [12], [0.0])[0] == 100.0
+
+    def test_quote_batch_totals(self):
+        """Test totals and interest of a batch"""
+        payments, totals, interests = quote_batch(self.LOANS, self.MONTHS, self.ANNUALS)
+
+        np.testing.assert_allclose(totals, payments * np.array(self.MONTHS))
+        np.testing.assert_allclose(interests, totals - np.array(self.LOANS))
+
+    def test_quote_loans_returns_loan_quotes(self):
+        """Test that quote_loans returns LoanQuote tuples of plain floats"""
+        quotes = quote_loans(self.LOANS, self.MONTHS, self.ANNUALS)
+
+        assert len(quotes) == 4
+        assert type(quotes[0].payment) is float
+        assert quotes[0] == pytest.approx(quote_loan(100000.0, 12, 17.0))
+
+    def test_differentiated_matches_scalar_engine(self):
+        """Test that vectorized differentiated totals equal the scalar ones"""
+        quotes = quote_differentiated_loans(self.LOANS, self.MONTHS, self.ANNUALS)
+
+        for quote, args in zip(quotes, zip(self.LOANS, self.MONTHS, self.ANNUALS)):
+            assert quote == pytest.approx(quote_differentiated(*args))
+        assert type(quotes[0].total) is float
+        assert len(differentiated_batch(self.LOANS, self.MONTHS, self.ANNUALS)[0]) == 4
+
+    def test_differentiated_columns(self):
+        """Test the vectorized differentiated schedule against the generator"""
+        index, month, payment, interest, principal, balance = differentiated_columns(
+            self.LOANS, self.MONTHS, self.ANNUALS)
+
+        expected = [row for args in zip(self.LOANS, self.MONTHS, self.ANNUALS)
+                    for row in differentiated_schedule(*args)]
+        assert len(index) == len(expected) == sum(self.MONTHS)
+        np.testing.assert_allclose(payment, [row.payment for row in expected])
+        np.testing.assert_allclose(balance, [row.balance for row in expected], atol=1e-6)
+
+    def test_dated_columns_match_scalar_schedule(self):
+        """Test that grouped day-count schedules equal the per-loan generator"""
+        loans, months, annuals = [100000.0, 200000.0, 50000.0], [12, 24, 12], [12.0, 10.0, 8.0]
+
+        index, month, payment, interest, principal, balance = dated_schedule_columns(
+            loans, months, annuals, date(2026, 1, 31), ACT_ACT)
+
+        rows = [row for args in zip(loans, months, annuals)
+                for row in dated_schedule(*args, date(2026, 1, 31), ACT_ACT)]
+        assert index.tolist() == [0] * 12 + [1] * 24 + [2] * 12
+        assert month.tolist() == [row.month for row in rows]
+        np.testing.assert_allclose(payment, [row.payment for row in rows])
+        np.testing.assert_allclose(interest, [row.interest for row in rows], atol=1e-6)
+        np.testing.assert_allclose(balance, [row.balance for row in rows], atol=1e-6)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
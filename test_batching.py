@@ -0,0 +1,73 @@
+import pytest
+import asyncio
+from unittest.mock import patch
+from batching import QuoteBatcher
+from engine import quote_loan
+
+
+class TestQuoteBatcher:
+    """Test class for the micro-batching quote dispatcher"""
+
+    def test_results_match_scalar_quotes(self):
+        """Test that every caller gets its own quote back"""
+        async def scenario():
+            batcher = QuoteBatcher(max_batch=100, max_delay=0.001)
+            return await asyncio.gather(*(batcher.quote(1000.0 * i, 12, 10.0) for i in range(1, 21))), batcher.stats
+
+        quotes, stats = asyncio.run(scenario())
+
+        for i, quote in enumerate(quotes, start=1):
+            assert quote == pytest.approx(quote_loan(1000.0 * i, 12, 10.0))
+        assert stats["batches"] == 1
+
+    def test_identical_requests_are_coalesced(self):
+        """Test that identical requests in one window are computed once"""
+        async def scenario():
+            batcher = QuoteBatcher(max_batch=100, max_delay=0.001)
+            quotes = await asyncio.gather(*(batcher.quote(5000, 24, 12.0) for _ in range(10)))
+            return quotes, batcher.stats
+
+        quotes, stats = asyncio.run(scenario())
+
+        assert len(set(quotes)) == 1
+        assert stats["computed"] == 1
+        assert stats["coalesced"] == 9
+
+    def test_full_batch_flushes_without_waiting(self):
+        """Test that reaching max_batch computes immediately"""
+        async def scenario():
+            batcher = QuoteBatcher(max_batch=4, max_delay=60)
+            quotes = await asyncio.wait_for(
+                asyncio.gather(*(batcher.quote(1000.0 * i, 12, 10.0) for i in range(1, 9))), timeout=5
+            )
+            return quotes, batcher.stats
+
+        quotes, stats = asyncio.run(scenario())
+
+        assert len(quotes) == 8
+        assert stats["batches"] == 2
+
+    def test_zero_delay_disables_batching(self):
+        """Test that max_delay=0 computes each request on its own"""
+        async def scenario():
+            batcher = QuoteBatcher(max_batch=100, max_delay=0)
+            await asyncio.gather(*(batcher.quote(1000.0 * i, 12, 10.0) for i in range(1, 6)))
+            return batcher.stats
+
+        assert asyncio.run(scenario())["batches"] == 5
+
+    def test_errors_reach_every_waiter(self):
+        """Test that a failing batch fails all of its callers"""
+        async def scenario():
+            batcher = QuoteBatcher(max_batch=100, max_delay=0.001)
+            with patch('batching.quote_loans', side_effect=RuntimeError("boom")):
+                return await asyncio.gather(batcher.quote(1, 12, 10), batcher.quote(2, 12, 10),
+                                            return_exceptions=True)
+
+        results = asyncio.run(scenario())
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,91 @@
+import io
+import json
+import pytest
+import numpy as np
+from cash_flows import accumulate_shard, aggregate_book, read_book, write_forecast
+from engine import schedule
+
+
+def reference(loans, months, annuals, offsets, horizon):
+    """Bucket every row of every generated schedule"""
+    interest, principal = np.zeros(horizon + 1), np.zeros(horizon + 1)
+    for loan, term, annual, offset in zip(loans, months, annuals, offsets):
+        for row in schedule(loan, term, annual):
+            bucket = offset + row.month - 1
+            if bucket >= 0:
+                interest[min(bucket, horizon)] += row.interest
+                principal[min(bucket, horizon)] += row.principal
+    return interest, principal
+
+
+@pytest.fixture
+def book():
+    """A random book with loans issued before, during and after the forecast window"""
+    rng = np.random.default_rng(2)
+    count = 300
+    starts = np.datetime64("2026-11", "M") + rng.integers(-40, 30, count)
+    return rng.uniform(1e4, 1e6, count), rng.integers(1, 60, count), rng.uniform(1, 25, count), starts
+
+
+class TestCashFlows:
+    """Test class for the monthly loan book cash-flow aggregation"""
+
+    def test_shard_matches_generated_schedules(self, book):
+        """Test buckets against summing every schedule row"""
+        loans, months, annuals, starts = book
+        offsets = (starts - np.datetime64("2026-11", "M")).astype(np.int64)
+
+        interest, principal = accumulate_shard(loans, months, annuals, offsets, 24)
+
+        expected_interest, expected_principal = reference(loans, months, annuals, offsets, 24)
+        np.testing.assert_allclose(interest, expected_interest, atol=1e-6)
+        np.testing.assert_allclose(principal, expected_principal, atol=1e-6)
+
+    def test_single_loan_buckets(self):
+        """Test calendar placement of a loan starting inside the window"""
+        forecast = aggregate_book([1200.0], [3], [12.0], ["2026-12"], "2026-11", horizon=3)
+
+        assert [str(month) for month in forecast.months] == ["2026-11", "2026-12", "2027-01"]
+        assert forecast.interest[0] == 0.0 and forecast.interest[1] == pytest.approx(12.0)
+        assert forecast.principal.sum() + forecast.beyond_principal == pytest.approx(1200.0)
+        assert forecast.currency == "RUB"
+
+    def test_processes_merge_to_same_totals(self, book):
+        """Test that sharding across processes does not change the result"""
+        single = aggregate_book(*book, "2026-11", horizon=24)
+        sharded = aggregate_book(*book, "2026-11", horizon=24, processes=2)
+
+        np.testing.assert_allclose(sharded.interest, single.interest)
+        np.testing.assert_allclose(sharded.principal, single.principal)
+        assert sharded.beyond_interest == pytest.approx(single.beyond_interest)
+
+    def test_reporting_currency(self, book):
+        """Test conversion with the stored rates"""
+        rub = aggregate_book(*book, "2026-11", horizon=12)
+        usd = aggregate_book(*book, "2026-11", horizon=12, currency="USD", rates={"USD": 80.0})
+
+        np.testing.assert_allclose(usd.interest, rub.interest / 80.0)
+        assert usd.currency == "USD"
+        with pytest.raises(KeyError):
+            aggregate_book(*book, "2026-11", horizon=12, currency="XXX", rates={"USD": 80.0})
+
+    def test_read_and_write(self):
+        """Test NDJSON input with bad records and the CSV output"""
+        lines = [json.dumps({"loan": 1200, "months": 3, "annual": 12, "start": "2026-11"}),
+                 json.dumps({"loan": 1200, "months": 3, "annual": 12}),
+                 json.dumps({"loan": -1, "months": 3, "annual": 12, "start": "2026-11"}),
+                 '{"loan": 1, "months": 1e400, "annual": 1, "start": "2026-11"}', ""]
+
+        book, errors = read_book(lines)
+        out = io.StringIO()
+        write_forecast(aggregate_book(*book, "2026-11", horizon=2), out)
+
+        assert errors == 3 and len(book[0]) == 1
+        rows = out.getvalue().splitlines()
+        assert rows[0] == "month,interest,principal,total,currency"
+        assert rows[1].startswith("2026-11,12.00,396.03,")
+        assert rows[-1].startswith("beyond,4.04,403.99,")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,135 @@
+import pytest
+import itertools
+import tkinter as tk
+import numpy as np
+from unittest.mock import patch, MagicMock
+from chart_view import BalanceChart, decimate, polyline
+
+
+class TestDecimate:
+    """Test class for min/max decimation"""
+
+    def test_short_series_is_kept(self):
+        """Test that a series shorter than 2 points per column is not decimated"""
+        xs, ys = decimate(np.array([5.0, 4.0, 3.0]), 101)
+
+        assert xs.tolist() == [0.0, 50.0, 100.0]
+        assert ys.tolist() == [5.0, 4.0, 3.0]
+
+    def test_min_max_per_column(self):
+        """Test that every pixel column keeps its minimum and maximum"""
+        values = np.random.default_rng(1).random(100000)
+
+        xs, ys = decimate(values, 100)
+
+        assert len(ys) == 200
+        buckets = values.reshape(100, 1000)
+        np.testing.assert_array_equal(ys[0::2], buckets.min(axis=1))
+        np.testing.assert_array_equal(ys[1::2], buckets.max(axis=1))
+        assert xs[0] == 0 and xs[-1] == 99
+
+    def test_spikes_survive(self):
+        """Test that a single-point spike is not lost"""
+        values = np.zeros(50001)
+        values[31337] = 7.0
+
+        _, ys = decimate(values, 300)
+
+        assert ys.max() == 7.0
+
+    def test_uneven_buckets(self):
+        """Test that every point falls into some bucket when sizes do not divide"""
+        values = np.arange(1001, dtype=np.float64)
+
+        _, ys = decimate(values, 7)
+
+        assert ys[0] == 0.0 and ys[-1] == 1000.0
+
+    def test_shared_month_range(self):
+        """Test that a shorter series covers only its share of the columns"""
+        xs, _ = decimate(np.arange(12, dtype=np.float64), 100, months=24)
+        assert xs[-1] == pytest.approx(11 * 99 / 23)
+
+        xs, ys = decimate(np.arange(1000, dtype=np.float64), 100, months=4000)
+        assert xs.max() == 24 and ys.max() == 999.0
+
+    def test_polyline_scaling(self):
+        """Test mapping of values to canvas coordinates"""
+        assert polyline(np.array([0.0, 10.0]), np.array([0.0, 50.0]), 5, 5, 100, 100.0) == [5, 105, 15, 55]
+
+
+class TestBalanceChart:
+    """Test class for the canvas chart with reused items"""
+
+    @pytest.fixture
+    def chart(self):
+        """Create a BalanceChart without a Tk root"""
+        ids = itertools.count(1)
+        with patch.object(tk.Canvas, '__init__', return_value=None), \
+             patch.object(tk.Canvas, 'create_line', side_effect=lambda *a, **k: next(ids)) as create_line, \
+             patch.object(tk.Canvas, 'create_rectangle', side_effect=lambda *a, **k: next(ids)), \
+             patch.object(tk.Canvas, 'create_text', side_effect=lambda *a, **k: next(ids)), \
+             patch.object(tk.Canvas, 'coords') as coords, \
+             patch.object(tk.Canvas, 'itemconfigure') as itemconfigure, \
+             patch.object(tk.Canvas, 'bind'), \
+             patch.object(tk.Canvas, 'cget', side_effect=lambda option: {"width": 440, "height": 300}[option]):
+            chart = BalanceChart(MagicMock())
+            yield chart, create_line, coords, itemconfigure
+
+    def test_lines_are_reused(self, chart):
+        """Test that redraws move existing lines instead of creating new ones"""
+        chart, create_line, coords, _ = chart
+
+        chart.set_loans([(100000.0, 360, 12.0)])
+        assert create_line.call_count == 3
+        chart.set_loans([(50000.0, 120, 9.0)])
+        chart.redraw(800, 400)
+
+        assert create_line.call_count == 3
+
+    def test_long_schedule_is_decimated(self, chart):
+        """Test that a very long schedule is drawn with at most two points per pixel column"""
+        chart, _, coords, _ = chart
+
+        chart.set_loans([(1000000.0, 100000, 5.0)])
+
+        lines = [c.args for c in coords.call_args_list if len(c.args) > 5]
+        assert len(lines) == 3
+        assert all(len(args) - 1 <= 2 * 2 * 380 for args in lines)
+
+    def test_unused_lines_are_hidden(self, chart):
+        """Test that lines of a removed loan are hidden, not deleted"""
+        chart, create_line, _, itemconfigure = chart
+        chart.set_loans([(1000.0, 12, 10.0), (2000.0, 24, 10.0)])
+        itemconfigure.reset_mock()
+
+        chart.set_loans([(1000.0, 12, 10.0)])
+
+        hidden = [c.args[0] for c in itemconfigure.call_args_list if c.kwargs.get("state") == "hidden"]
+        assert len(hidden) == 3
+        assert create_line.call_count == 6
+
+    def test_overlaid_loans_share_the_month_axis(self, chart):
+        """Test that month 12 of a 12-month and a 24-month loan is drawn at the same x"""
+        chart, _, coords, _ = chart
+
+        chart.set_loans([(1000.0, 12, 10.0), (2000.0, 24, 10.0)])
+
+        short = [c.args for c in coords.call_args_list if c.args[0] == chart._lines[(0, "balance")]]
+        long = [c.args for c in coords.call_args_list if c.args[0] == chart._lines[(1, "balance")]]
+        assert short[-1][-2] == pytest.approx(long[-1][23])
+        assert short[-1][-2] < long[-1][-2]
+
+    def test_single_month_loan(self, chart):
+        """Test that a one-month schedule still gets a drawable line"""
+        chart, _, coords, _ = chart
+
+        chart.set_loans([(1000.0, 1, 10.0)])
+
+        lines = [c.args for c in coords.call_args_list if c.args[0] in chart._lines.values()]
+        assert len(lines) == 3
+        assert all(len(args) == 5 for args in lines)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
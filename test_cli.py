@@ -0,0 +1,143 @@
+import pytest
+import subprocess
+import sys
+from unittest.mock import patch
+from cli import main
+from db import init_db, save_rate
+from rates_snapshot import RatesSnapshot
+
+
+class TestCli:
+    """Test class for the headless command line"""
+
+    @pytest.fixture
+    def temp_db(self, tmp_path):
+        """Point the database at a temporary file"""
+        with patch('db.DB_NAME', str(tmp_path / "rates.db")):
+            init_db()
+            yield
+
+    def test_quote(self, capsys):
+        """Test the quote command output"""
+        assert main(["quote", "100000", "12", "12"]) == 0
+
+        assert "Ежемесячный платеж: 8884.88 RUB" in capsys.readouterr().out
+
+    def test_schedule_csv(self, capsys):
+        """Test that the schedule is printed as CSV"""
+        assert main(["schedule", "1200", "3", "12"]) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == "month,payment,interest,principal,balance"
+        assert len(lines) == 4
+        assert lines[-1].endswith(",0.00")
+
+    def test_differentiated(self, capsys):
+        """Test the differentiated flag of quote and schedule"""
+        assert main(["quote", "120000", "12", "12", "--differentiated"]) == 0
+        out = capsys.readouterr().out
+        assert "Первый платеж: 11200.0 RUB" in out
+        assert "Последний платеж: 10100.0 RUB" in out
+
+        assert main(["schedule", "120000", "3", "12", "--differentiated"]) == 0
+        assert capsys.readouterr().out.splitlines()[1] == "1,41200.00,1200.00,40000.00,80000.00"
+
+    def test_plan(self, capsys):
+        """Test the plan command with events from the command line"""
+        assert main(["plan", "1000000", "120", "12", "--prepay", "12:200000", "--rate", "24:8",
+                     "--holiday", "50:6", "--prepay", "60:50000:reduce_payment"]) == 0
+
+        out = capsys.readouterr().out
+        assert "Срок: 92 мес." in out
+
+    def test_plan_rejects_bad_event(self, capsys):
+        """Test that malformed or conflicting events exit with a usage error"""
+        with pytest.raises(SystemExit):
+            main(["plan", "1000000", "120", "12", "--prepay", "twelve:1000"])
+        with pytest.raises(SystemExit):
+            main(["plan", "1000000", "120", "12", "--holiday", "6:6", "--rate", "8:5"])
+        with pytest.raises(SystemExit):
+            main(["plan", "100000", "12", "12", "--prepay", "5:-50000"])
+        with pytest.raises(SystemExit):
+            main(["plan", "100000", "12", "12", "--holiday", "3:0"])
+
+    def test_schedule_day_count(self, capsys):
+        """Test a dated schedule with interest on actual days"""
+        assert main(["schedule", "100000", "3", "12", "--day-count", "act/act", "--start", "2026-04-30"]) == 0
+
+        lines = capsys.readouterr().out.splitlines()
+        assert lines[0] == "month,date,payment,interest,principal,balance"
+        assert lines[1].startswith("1,2026-05-29,")
+        assert lines[-1].endswith(",0.00")
+
+        with pytest.raises(SystemExit):
+            main(["schedule", "100000", "3", "12", "--day-count", "act/365", "--differentiated"])
+
+    def test_cost(self, capsys):
+        """Test ПСК with fees from the command line"""
+        assert main(["cost", "100000", "12", "12", "--start", "2026-01-31"]) == 0
+        assert "ПСК: 12.000 %" in capsys.readouterr().out
+
+        assert main(["cost", "100000", "12", "12", "--upfront-fee", "2000", "--start", "2026-01-31"]) == 0
+        assert "ПСК: 15." in capsys.readouterr().out
+
+    def test_invalid_loan(self, capsys):
+        """Test that invalid inputs are rejected with the GUI's message"""
+        with pytest.raises(SystemExit) as exc:
+            main(["quote", "100000", "0", "12"])
+
+        assert exc.value.code == 2
+        assert "Срок кредита должен быть > 0 мес." in capsys.readouterr().err
+
+    def test_convert(self, temp_db, capsys):
+        """Test conversion with a saved rate"""
+        save_rate(1, 'USD', 80.0)
+
+        assert main(["convert", "1000", "--currency", "usd"]) == 0
+
+        assert capsys.readouterr().out.strip() == "1000.00 RUB = 12.50 USD"
+
+    def test_convert_without_rate(self, temp_db, capsys):
+        """Test that a missing rate is reported on stderr"""
+        assert main(["convert", "1000", "--currency", "EUR"]) == 1
+
+        assert "No saved rate for EUR" in capsys.readouterr().err
+
+    def test_update_rates(self, temp_db, capsys):
+        """Test that fetched rates are saved"""
+        with patch('api.fetch_rates', return_value={'USD': {'Value': 90.0}, 'EUR': {'Value': 100.0}}):
+            assert main(["update-rates"]) == 0
+
+        assert "Fetched 2 rates, 2 changed" in capsys.readouterr().out
+        with RatesSnapshot() as snapshot:
+            assert snapshot.count == 2
+
+    def test_update_rates_failure(self, temp_db, capsys):
+        """Test that a fetch error is reported instead of raised"""
+        with patch('api.fetch_rates', side_effect=RuntimeError("Failed to fetch rates: timeout")):
+            assert main(["update-rates"]) == 1
+
+        assert "timeout" in capsys.readouterr().err
+
+
+class TestHeadlessImports:
+    """Test that the core modules start without GUI or network libraries"""
+
+    @pytest.mark.parametrize("module", ["cli", "engine", "db", "api", "async_db", "retention"])
+    def test_no_tkinter_or_requests(self, module):
+        """Test that importing a core module loads neither tkinter nor requests"""
+        code = f"import sys, {module}; print(' '.join(m for m in ('tkinter', 'requests') if m in sys.modules))"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == ""
+
+    def test_requests_is_imported_on_first_use(self):
+        """Test that the lazy requests proxy loads the real module when used"""
+        code = "import sys, api; api.requests.RequestException; print('requests' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+
+        assert result.stdout.strip() == "True"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,139 @@
+import pytest
+import numpy as np
+from datetime import date
+from credit_cost import add_months, full_cost, loan_costs, loan_flows, month_periods, xirr
+from engine import annuity_payment
+
+
+def reference_xirr(flows):
+    """Scalar bisection on the act/365 net present value"""
+    start = flows[0][0]
+
+    def npv(rate):
+        return sum(amount / (1 + rate) ** ((day - start).days / 365) for day, amount in flows)
+
+    low, high = -0.99, 10.0
+    for _ in range(200):
+        middle = (low + high) / 2
+        if (npv(middle) > 0) == (npv(low) > 0):
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+class TestCalendar:
+    """Test class for month arithmetic on payment dates"""
+
+    def test_add_months_clamps_to_month_end(self):
+        """Test that the 31st rolls back to the last day of shorter months"""
+        dates = add_months(np.datetime64("2026-01-31"), np.arange(4))
+
+        assert [str(d) for d in dates] == ["2026-01-31", "2026-02-28", "2026-03-31", "2026-04-30"]
+
+    def test_month_periods(self):
+        """Test the split of a term into whole months and leftover days"""
+        first = np.array(["2026-01-31", "2026-01-31", "2026-01-15", "2026-01-15"], dtype="datetime64[D]")
+        dates = np.array(["2026-02-28", "2026-03-30", "2026-01-20", "2027-02-14"], dtype="datetime64[D]")
+
+        periods, days = month_periods(first, dates)
+
+        assert periods.tolist() == [1, 1, 0, 12]
+        assert days.tolist() == [0, 30, 5, 30]
+
+
+class TestCreditCost:
+    """Test class for the batched ПСК and XIRR solvers"""
+
+    def test_flows(self):
+        """Test the borrower cash flows of a loan with fees"""
+        index, dates, amounts = loan_flows([1200.0, 1000.0], [12, 2], [12.0, 0.0], "2026-01-31", [100.0, 0.0], 5.0)
+
+        assert index.tolist() == [0] * 13 + [1] * 3
+        assert str(dates[0]) == "2026-01-31" and str(dates[1]) == "2026-02-28"
+        assert amounts[0] == 1100.0
+        assert amounts[1] == pytest.approx(-annuity_payment(1200.0, 12, 12.0) - 5.0)
+        assert amounts[13:].tolist() == [1000.0, -505.0, -505.0]
+
+    def test_no_fees_equals_nominal_rate(self):
+        """Test that without fees ПСК equals the nominal annual rate"""
+        psk, effective, converged = loan_costs([100000.0, 500000.0], [12, 60], [12.0, 9.5], "2026-01-31")
+
+        assert converged.all()
+        np.testing.assert_allclose(psk, [12.0, 9.5], rtol=1e-9)
+        assert (effective > psk).all()
+
+    def test_fees_raise_cost(self):
+        """Test that upfront and monthly fees increase ПСК"""
+        psk, _, _ = loan_costs([100000.0] * 3, [24] * 3, [12.0] * 3, "2026-03-10", [0.0, 2000.0, 0.0],
+                               [0.0, 0.0, 300.0])
+
+        assert psk[0] == pytest.approx(12.0)
+        assert psk[1] > 12.0 and psk[2] > 12.0
+
+    def test_xirr_matches_scalar_reference(self):
+        """Test vectorized XIRR against bisection on irregular flows"""
+        loans = [
+            [(date(2026, 1, 1), 1000.0), (date(2026, 3, 17), -300.0), (date(2026, 9, 2), -400.0),
+             (date(2027, 1, 1), -450.0)],
+            [(date(2025, 6, 30), -5000.0), (date(2026, 6, 30), 5600.0)],
+        ]
+        index = [number for number, flows in enumerate(loans) for _ in flows]
+        dates = [str(day) for flows in loans for day, _ in flows]
+        amounts = [amount for flows in loans for _, amount in flows]
+
+        rates, converged, iterations = xirr(index, dates, amounts)
+
+        assert converged.all()
+        assert rates[0] == pytest.approx(reference_xirr(loans[0]), abs=1e-9)
+        assert rates[1] == pytest.approx(0.12, abs=1e-12)
+        assert iterations.max() < 20
+
+    def test_full_cost_with_broken_periods(self):
+        """Test ПСК when a flow falls between base periods"""
+        rates, converged, _ = full_cost([0, 0, 0], ["2026-01-15", "2026-02-15", "2026-03-31"],
+                                        [1000.0, -500.0, -520.0])
+
+        monthly = rates[0] / 1200
+        fraction = 16 / (365 / 12)
+        assert converged.all()
+        assert 1000.0 - 500.0 / (1 + monthly) - 520.0 / ((1 + fraction * monthly) * (1 + monthly) ** 2) == \
+            pytest.approx(0.0, abs=1e-9)
+
+    def test_non_convergence_is_flagged(self):
+        """Test that loans without a root or with too few iterations are flagged"""
+        rates, converged, _ = xirr([0, 0, 1, 1], ["2026-01-01", "2027-01-01", "2026-01-01", "2027-01-01"],
+                                   [-100.0, -10.0, -100.0, 150.0])
+
+        assert converged.tolist() == [False, True]
+        assert np.isnan(rates[0])
+        assert rates[1] == pytest.approx(0.5)
+
+        _, converged, iterations = xirr([0, 0], ["2026-01-01", "2027-01-01"], [-100.0, 150.0], guess=5.0,
+                                        max_iterations=2)
+        assert not converged[0] and iterations[0] == 2
+
+    def test_zero_slope_is_not_converged(self):
+        """Test that flows on a single date are not reported as converged at the guess"""
+        rates, converged, _ = xirr([0, 0], ["2024-01-01"] * 2, [100.0, -50.0])
+        assert not converged[0] and np.isnan(rates[0])
+
+        rates, converged, _ = full_cost([0, 0], ["2024-01-01"] * 2, [100.0, -50.0])
+        assert not converged[0] and np.isnan(rates[0])
+
+    def test_large_batch(self):
+        """Test that a large batch converges in a few iterations"""
+        rng = np.random.default_rng(7)
+        count = 2000
+        loans, months, annuals = rng.uniform(1e5, 5e6, count), rng.integers(6, 121, count), rng.uniform(5, 25, count)
+
+        index, dates, amounts = loan_flows(loans, months, annuals, "2026-03-10", loans * 0.01, 500.0)
+        rates, converged, iterations = full_cost(index, dates, amounts, guess=annuals / 1200)
+
+        assert converged.all()
+        assert (rates > annuals).all()
+        assert iterations.max() <= 8
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,79 @@
+import pytest
+from datetime import date
+from day_count import (ACT_365, ACT_ACT, THIRTY_360, add_months, dated_payment, dated_schedule, payment_calendar,
+                       roll, year_fraction)
+from engine import schedule
+
+
+class TestCalendar:
+    """Test class for payment dates and day fractions"""
+
+    def test_add_months(self):
+        """Test that month ends are clamped"""
+        assert add_months(date(2026, 1, 31), 1) == date(2026, 2, 28)
+        assert add_months(date(2027, 12, 31), 2) == date(2028, 2, 29)
+        assert add_months(date(2026, 11, 15), 14) == date(2028, 1, 15)
+
+    def test_roll_weekends_and_holidays(self):
+        """Test modified following rolling"""
+        assert roll(date(2026, 3, 14)) == date(2026, 3, 16)
+        assert roll(date(2026, 1, 1)) == date(2026, 1, 9)
+        assert roll(date(2026, 5, 9)) == date(2026, 5, 11)
+        # Следующий рабочий день уже в июне — перенос назад
+        assert roll(date(2026, 5, 30)) == date(2026, 5, 29)
+        assert roll(date(2026, 3, 16)) == date(2026, 3, 16)
+
+    def test_year_fractions(self):
+        """Test the three conventions, including a period across New Year"""
+        start, end = date(2027, 12, 15), date(2028, 1, 15)
+
+        assert year_fraction(start, end, THIRTY_360) == 1 / 12
+        assert year_fraction(start, end, ACT_365) == 31 / 365
+        assert year_fraction(start, end, ACT_ACT) == pytest.approx(17 / 365 + 14 / 366)
+        with pytest.raises(ValueError):
+            year_fraction(start, end, "act/360")
+
+    def test_calendar_is_cached_per_product(self):
+        """Test that loans of one product share the calendar table"""
+        payment_calendar.cache_clear()
+
+        first = payment_calendar(date(2026, 3, 10), 24, ACT_365)
+        second = payment_calendar(date(2026, 3, 10), 24, ACT_365)
+        payment_calendar(date(2026, 3, 10), 24, ACT_ACT)
+
+        assert first is second
+        assert payment_calendar.cache_info().hits == 1
+        assert payment_calendar.cache_info().misses == 2
+        assert len(first.dates) == len(first.fractions) == 24
+
+
+class TestDatedSchedule:
+    """Test class for schedules with interest on actual payment dates"""
+
+    def test_thirty_360_matches_monthly_engine(self):
+        """Test that 30/360 reproduces the 1/12-per-month schedule"""
+        dated = list(dated_schedule(100000.0, 12, 12.0, date(2026, 1, 31), THIRTY_360))
+
+        for row, expected in zip(dated, schedule(100000.0, 12, 12.0)):
+            assert row.payment == pytest.approx(expected.payment)
+            assert row.balance == pytest.approx(expected.balance, abs=1e-6)
+
+    @pytest.mark.parametrize("convention", [ACT_365, ACT_ACT])
+    def test_actual_schedule_amortizes(self, convention):
+        """Test that the loan is repaid exactly on rolled dates"""
+        rows = list(dated_schedule(500000.0, 36, 14.0, date(2027, 10, 31), convention))
+        dates, fractions = payment_calendar(date(2027, 10, 31), 36, convention)
+
+        assert [row.date for row in rows] == list(dates)
+        assert all(row.date.weekday() < 5 for row in rows)
+        assert sum(row.principal for row in rows) == pytest.approx(500000.0)
+        assert rows[-1].balance == 0.0
+        assert rows[0].interest == pytest.approx(500000.0 * 0.14 * fractions[0])
+
+    def test_dated_payment_without_interest(self):
+        """Test equal parts at a zero rate"""
+        assert dated_payment(1200.0, [1 / 12] * 12, 0.0) == pytest.approx(100.0)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -4,7 +4,11 @@ import datetime
 import os
 import tempfile
 from unittest.mock import patch, MagicMock
-from db import save_rate, init_db, get_saved_rate, DB_NAME
+from db import (
+    save_rate, init_db, get_saved_rate, get_all_rates, DB_NAME,
+    diff_rates, update_rates, add_rate_listener, remove_rate_listener, RateChange,
+    connect, STORAGE_PRAGMAS, get_rate_history
+)
 
 
 class TestDatabaseOperations:
@@ -72,6 +76,34 @@ class TestDatabaseOperations:
         
         conn.close()
     
+    def test_init_db_enables_wal(self, temp_db):
+        """Test that init_db switches the database to WAL journaling"""
+        conn = sqlite3.connect(temp_db)
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+
+        assert journal_mode == "wal"
+
+    def test_connect_applies_storage_pragmas(self, temp_db):
+        """Test that connections get the per-connection storage pragmas"""
+        conn = connect()
+        try:
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == STORAGE_PRAGMAS["busy_timeout"]
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == STORAGE_PRAGMAS["cache_size"]
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        finally:
+            conn.close()
+
+    def test_init_db_respects_rollback_journal_config(self, temp_db):
+        """Test that the journal mode comes from STORAGE_PRAGMAS"""
+        with patch.dict('db.STORAGE_PRAGMAS', {"journal_mode": "DELETE"}):
+            init_db()
+
+        conn = sqlite3.connect(temp_db)
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        assert journal_mode == "delete"
+
     def test_save_rate_new_record(self, temp_db, sample_data):
         """Test saving a new rate record"""
         save_rate(sample_data['id'], sample_data['currency'], sample_data['rate'])
@@ -269,38 +301,30 @@ class TestGetSavedRate:
         # Save a rate first
         save_rate(1, 'USD', 1.25)
         
-        with patch('db.messagebox') as mock_messagebox:
-            rate = get_saved_rate('USD')
-            
-            assert rate == 1.25, f"Expected rate 1.25, got {rate}"
-            mock_messagebox.showerror.assert_not_called()
+        rate = get_saved_rate('USD')
+        
+        assert rate == 1.25, f"Expected rate 1.25, got {rate}"
     
     def test_get_saved_rate_default_currency(self, temp_db):
         """Test get_saved_rate with default USD currency"""
         # Save a rate for USD
         save_rate(1, 'USD', 1.0)
         
-        with patch('db.messagebox') as mock_messagebox:
-            rate = get_saved_rate()  # No parameter, should default to USD
-            
-            assert rate == 1.0, f"Expected rate 1.0, got {rate}"
-            mock_messagebox.showerror.assert_not_called()
+        rate = get_saved_rate()  # No parameter, should default to USD
+        
+        assert rate == 1.0, f"Expected rate 1.0, got {rate}"
     
     def test_get_saved_rate_nonexistent_currency(self, temp_db):
         """Test get_saved_rate with a currency that doesn't exist"""
-        with patch('db.messagebox') as mock_messagebox:
-            rate = get_saved_rate('NONEXISTENT')
-            
-            assert rate is None, "Rate should be None for nonexistent currency"
-            mock_messagebox.showerror.assert_called_once_with("Ошибка", "Обновите валютные курсы")
+        rate = get_saved_rate('NONEXISTENT')
+        
+        assert rate is None, "Rate should be None for nonexistent currency"
     
     def test_get_saved_rate_empty_database(self, temp_db):
         """Test get_saved_rate when database is empty"""
-        with patch('db.messagebox') as mock_messagebox:
-            rate = get_saved_rate('USD')
-            
-            assert rate is None, "Rate should be None when database is empty"
-            mock_messagebox.showerror.assert_called_once_with("Ошибка", "Обновите валютные курсы")
+        rate = get_saved_rate('USD')
+        
+        assert rate is None, "Rate should be None when database is empty"
     
     def test_get_saved_rate_multiple_currencies(self, temp_db):
         """Test get_saved_rate with multiple currencies in database"""
@@ -309,48 +333,61 @@ class TestGetSavedRate:
         save_rate(2, 'EUR', 0.85)
         save_rate(3, 'GBP', 0.75)
         
-        with patch('db.messagebox') as mock_messagebox:
-            # Test each currency
-            usd_rate = get_saved_rate('USD')
-            eur_rate = get_saved_rate('EUR')
-            gbp_rate = get_saved_rate('GBP')
-            
-            assert usd_rate == 1.0, f"Expected USD rate 1.0, got {usd_rate}"
-            assert eur_rate == 0.85, f"Expected EUR rate 0.85, got {eur_rate}"
-            assert gbp_rate == 0.75, f"Expected GBP rate 0.75, got {gbp_rate}"
-            mock_messagebox.showerror.assert_not_called()
+        # Test each currency
+        usd_rate = get_saved_rate('USD')
+        eur_rate = get_saved_rate('EUR')
+        gbp_rate = get_saved_rate('GBP')
+        
+        assert usd_rate == 1.0, f"Expected USD rate 1.0, got {usd_rate}"
+        assert eur_rate == 0.85, f"Expected EUR rate 0.85, got {eur_rate}"
+        assert gbp_rate == 0.75, f"Expected GBP rate 0.75, got {gbp_rate}"
     
     def test_get_saved_rate_case_sensitivity(self, temp_db):
         """Test get_saved_rate with different case sensitivity"""
         # Save rate with uppercase
         save_rate(1, 'USD', 1.0)
         
-        with patch('db.messagebox') as mock_messagebox:
-            # Test with lowercase
-            rate_lower = get_saved_rate('usd')
-            # Test with mixed case
-            rate_mixed = get_saved_rate('Usd')
-            
-            # SQLite is case-insensitive by default, but let's test the behavior
-            assert rate_lower is None, "Lowercase should not match uppercase"
-            assert rate_mixed is None, "Mixed case should not match uppercase"
-            assert mock_messagebox.showerror.call_count == 2
+        # Test with lowercase
+        rate_lower = get_saved_rate('usd')
+        # Test with mixed case
+        rate_mixed = get_saved_rate('Usd')
+        
+        assert rate_lower is None, "Lowercase should not match uppercase"
+        assert rate_mixed is None, "Mixed case should not match uppercase"
     
     def test_get_saved_rate_sql_injection_protection(self, temp_db):
-        """Test that get_saved_rate is vulnerable to SQL injection (current implementation)"""
+        """Test that get_saved_rate treats the currency as a parameter, not SQL"""
         # Save a normal rate
         save_rate(1, 'USD', 1.0)
         
-        with patch('db.messagebox') as mock_messagebox:
-            # Attempt SQL injection
-            malicious_input = "'; DROP TABLE rates; --"
-            rate = get_saved_rate(malicious_input)
-            
-            # The current implementation is vulnerable to SQL injection
-            # This test documents the vulnerability
-            assert rate is None, "Should return None for malicious input"
-            mock_messagebox.showerror.assert_called_once()
+        # Attempt SQL injection
+        malicious_input = "'; DROP TABLE rates; --"
+        rate = get_saved_rate(malicious_input)
+        
+        assert rate is None, "Should return None for malicious input"
+        assert get_saved_rate('USD') == 1.0, "Table must survive the injection attempt"
+    
+    def test_get_saved_rate_missing_table(self, temp_db):
+        """Test that database errors reach the caller instead of a dialog"""
+        conn = sqlite3.connect(temp_db)
+        conn.execute("DROP TABLE rates")
+        conn.commit()
+        conn.close()
+        
+        with pytest.raises(sqlite3.OperationalError):
+            get_saved_rate('USD')
     
+    def test_get_all_rates(self, temp_db):
+        """Test that get_all_rates returns every stored currency"""
+        save_rate(1, 'USD', 75.5)
+        save_rate(2, 'EUR', 82.3)
+
+        assert get_all_rates() == {'USD': 75.5, 'EUR': 82.3}
+
+    def test_get_all_rates_empty_database(self, temp_db):
+        """Test get_all_rates on an empty database"""
+        assert get_all_rates() == {}
+
     def test_get_saved_rate_database_connection_error(self):
         """Test get_saved_rate with database connection error"""
         with patch('db.sqlite3.connect') as mock_connect:
@@ -361,5 +398,92 @@ class TestGetSavedRate:
             with pytest.raises(sqlite3.Error, match="Database connection failed"):
                 get_saved_rate('USD')
 
+class TestUpdateRates:
+    """Test class for delta-only rate updates"""
+
+    @pytest.fixture
+    def temp_db(self):
+        """Create a temporary database for testing"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        temp_file.close()
+
+        with patch('db.DB_NAME', temp_file.name):
+            init_db()
+            yield temp_file.name
+
+        try:
+            os.unlink(temp_file.name)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+    def test_diff_rates(self):
+        """Test that diff_rates reports new and moved currencies only"""
+        changes = diff_rates({'USD': 80.0, 'EUR': 82.0, 'GBP': 95.0}, {'USD': 75.0, 'EUR': 82.0})
+
+        assert changes == [
+            RateChange('USD', 75.0, 80.0, pytest.approx(6.6666667)),
+            RateChange('GBP', None, 95.0, None),
+        ]
+
+    def test_first_update_inserts_all(self, temp_db):
+        """Test that an empty database receives every rate"""
+        changes = update_rates({'USD': {'Value': 75.0}, 'EUR': {'Value': 82.0}})
+
+        assert [c.currency for c in changes] == ['USD', 'EUR']
+        assert get_all_rates() == {'USD': 75.0, 'EUR': 82.0}
+
+    def test_unchanged_rows_are_not_written(self, temp_db):
+        """Test that rows whose rate did not move keep their fetched_at"""
+        update_rates({'USD': {'Value': 75.0}, 'EUR': {'Value': 82.0}})
+        conn = sqlite3.connect(temp_db)
+        conn.execute("UPDATE rates SET fetched_at = 'old'")
+        conn.commit()
+
+        changes = update_rates({'USD': {'Value': 76.0}, 'EUR': {'Value': 82.0}})
+
+        assert changes == [RateChange('USD', 75.0, 76.0, pytest.approx(1.3333333))]
+        rows = dict(conn.execute("SELECT currency, fetched_at FROM rates").fetchall())
+        conn.close()
+        assert rows['EUR'] == 'old'
+        assert rows['USD'] != 'old'
+
+    def test_ids_are_kept_and_new_currencies_appended(self, temp_db):
+        """Test that existing ids are reused and new currencies get fresh ids"""
+        update_rates({'USD': {'Value': 75.0}, 'EUR': {'Value': 82.0}})
+
+        update_rates({'GBP': {'Value': 95.0}, 'USD': {'Value': 76.0}})
+
+        conn = sqlite3.connect(temp_db)
+        rows = dict(conn.execute("SELECT currency, id FROM rates").fetchall())
+        conn.close()
+        assert rows == {'USD': 1, 'EUR': 2, 'GBP': 3}
+
+    def test_no_changes(self, temp_db):
+        """Test that an identical payload produces an empty change set"""
+        update_rates({'USD': {'Value': 75.0}})
+
+        assert update_rates({'USD': {'Value': 75.0}}) == []
+
+    def test_changes_are_recorded_in_history(self, temp_db):
+        """Test that every changed rate is appended to rate_history"""
+        update_rates({'USD': {'Value': 75.0}, 'EUR': {'Value': 82.0}})
+        update_rates({'USD': {'Value': 76.0}, 'EUR': {'Value': 82.0}})
+
+        assert [(rate, kind) for _, rate, kind in get_rate_history('USD')] == [(75.0, 'intraday'), (76.0, 'intraday')]
+        assert len(get_rate_history('EUR')) == 1
+
+    def test_listeners_receive_changes(self, temp_db):
+        """Test that rate listeners are notified with the change set"""
+        listener = MagicMock()
+        add_rate_listener(listener)
+        try:
+            update_rates({'USD': {'Value': 75.0}})
+            update_rates({'USD': {'Value': 75.0}})
+        finally:
+            remove_rate_listener(listener)
+
+        listener.assert_called_once_with([RateChange('USD', None, 75.0, None)])
+
+
 if __name__ == "__main__":
     pytest.main([__file__])
@@ -0,0 +1,122 @@
+import pytest
+from engine import (
+    LoanQuote, annuity_payment, annuity_factor, quote_loan, balance_after, schedule_row, schedule,
+    DifferentiatedQuote, quote_differentiated, differentiated_row, differentiated_schedule, validate_loan
+)
+
+
+class TestAnnuity:
+    """Test class for the annuity formulas in engine.py"""
+
+    def test_annuity_payment_matches_formula(self):
+        """Test the payment against the textbook annuity formula"""
+        monthly = 17.0 / 12 / 100
+        expected = (100000.0 * monthly) / (1 - (1 + monthly) ** -12)
+
+        assert annuity_payment(100000.0, 12, 17.0) == expected
+
+    def test_zero_rate(self):
+        """Test that a zero rate splits the principal evenly"""
+        assert annuity_payment(1200.0, 12, 0.0) == 100.0
+
+    def test_quote_loan_totals(self):
+        """Test the totals returned by quote_loan"""
+        quote = quote_loan(100000.0, 12, 12.0)
+
+        assert isinstance(quote, LoanQuote)
+        assert quote.total == pytest.approx(quote.payment * 12)
+        assert quote.interest == pytest.approx(quote.total - 100000.0)
+        assert round(quote.payment, 2) == 8884.88
+
+    def test_annuity_factor(self):
+        """Test that principal times the factor gives the payment"""
+        assert 250000.0 * annuity_factor(60, 9.5) == pytest.approx(annuity_payment(250000.0, 60, 9.5), rel=1e-12)
+        assert annuity_factor(12, 0.0) == pytest.approx(1 / 12)
+
+
+class TestSchedule:
+    """Test class for amortization schedules in engine.py"""
+
+    def test_schedule_pays_off_loan(self):
+        """Test that the schedule ends at zero and principal sums to the loan"""
+        rows = list(schedule(100000.0, 24, 17.0))
+
+        assert len(rows) == 24
+        assert rows[-1].balance == 0.0
+        assert sum(r.principal for r in rows) == pytest.approx(100000.0)
+
+    def test_schedule_interest_matches_quote(self):
+        """Test that scheduled interest equals the quoted interest"""
+        rows = list(schedule(250000.0, 60, 9.5))
+
+        assert sum(r.interest for r in rows) == pytest.approx(quote_loan(250000.0, 60, 9.5).interest)
+
+    def test_balance_after_is_closed_form(self):
+        """Test that balance_after agrees with the iterated schedule"""
+        rows = list(schedule(100000.0, 36, 14.0))
+
+        for month in (1, 12, 35):
+            assert balance_after(100000.0, 36, 14.0, month) == pytest.approx(rows[month - 1].balance)
+
+    def test_schedule_row_random_access(self):
+        """Test that schedule_row matches the iterated schedule"""
+        rows = list(schedule(100000.0, 36, 14.0))
+
+        for month in (1, 18, 36):
+            row = schedule_row(100000.0, 36, 14.0, month)
+            assert row.month == month
+            assert row.interest == pytest.approx(rows[month - 1].interest)
+            assert row.balance == pytest.approx(rows[month - 1].balance, abs=1e-6)
+
+    def test_schedule_row_out_of_range(self):
+        """Test that months outside the term are rejected"""
+        with pytest.raises(IndexError):
+            schedule_row(100000.0, 12, 10.0, 13)
+
+    @pytest.mark.parametrize("inputs", [
+        (float("nan"), 12, 10.0), (float("inf"), 12, 10.0), (1000.0, float("inf"), 10.0),
+        (1000.0, 12, float("nan")), (1000.0, 10 ** 400, 10.0),
+    ])
+    def test_validate_rejects_non_finite(self, inputs):
+        """Test that NaN, infinity and huge integers are rejected"""
+        with pytest.raises(ValueError):
+            validate_loan(*inputs)
+
+
+class TestDifferentiated:
+    """Test class for differentiated (declining-principal) repayment"""
+
+    def test_closed_form_matches_schedule(self):
+        """Test that O(1) totals equal the sums over the month-by-month schedule"""
+        for loan, months, annual in [(120000.0, 12, 12.0), (3500000.0, 240, 9.7), (1000.0, 1, 25.0)]:
+            quote = quote_differentiated(loan, months, annual)
+            rows = list(differentiated_schedule(loan, months, annual))
+
+            assert isinstance(quote, DifferentiatedQuote)
+            assert quote.total == pytest.approx(sum(row.payment for row in rows))
+            assert quote.interest == pytest.approx(sum(row.interest for row in rows))
+            assert quote.first_payment == pytest.approx(rows[0].payment)
+            assert quote.last_payment == pytest.approx(rows[-1].payment)
+
+    def test_known_values(self):
+        """Test a hand-checked example"""
+        assert quote_differentiated(120000.0, 12, 12.0) == (11200.0, 10100.0, 127800.0, 7800.0)
+
+    def test_cheaper_than_annuity(self):
+        """Test that differentiated repayment accrues less interest than annuity"""
+        assert quote_differentiated(1000000.0, 120, 12.0).interest < quote_loan(1000000.0, 120, 12.0).interest
+
+    def test_row_is_random_access(self):
+        """Test a single row without generating the schedule"""
+        row = differentiated_row(120000.0, 12, 12.0, 7)
+
+        assert row.principal == 10000.0
+        assert row.interest == pytest.approx(600.0)
+        assert row.balance == pytest.approx(50000.0)
+        assert differentiated_row(120000.0, 12, 12.0, 12).balance == 0.0
+        with pytest.raises(IndexError):
+            differentiated_row(120000.0, 12, 12.0, 13)
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
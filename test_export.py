@@ -0,0 +1,100 @@
+import pytest
+import csv
+import numpy as np
+from batch_engine import schedule_columns
+from engine import schedule
+from export import (ScheduleFormatError, read_schedule_binary, schedule_blocks, write_schedule_binary,
+                    write_schedule_csv)
+
+LOANS = [(100000.0, 12, 17.0), (250000.0, 60, 9.5), (1200.0, 3, 0.0)]
+
+
+class TestScheduleColumns:
+    """Test class for the vectorized schedule"""
+
+    def test_matches_engine_schedule(self):
+        """Test that closed-form columns match the iterative schedule"""
+        index, month, payment, interest, principal, balance = schedule_columns(*zip(*LOANS))
+
+        expected = [(i, row) for i, loan in enumerate(LOANS) for row in schedule(*loan)]
+        assert len(index) == 75
+        for position, (i, row) in enumerate(expected):
+            assert index[position] == i
+            assert month[position] == row.month
+            assert interest[position] == pytest.approx(row.interest, abs=1e-6)
+            assert balance[position] == pytest.approx(row.balance, abs=1e-6)
+
+    def test_last_balance_is_zero(self):
+        """Test that every loan is repaid in its last month"""
+        *_, balance = schedule_columns(*zip(*LOANS))
+
+        assert balance[11] == 0.0 and balance[71] == 0.0 and balance[74] == 0.0
+
+
+class TestExport:
+    """Test class for bulk schedule export"""
+
+    def test_blocks_keep_loan_numbers(self):
+        """Test that loans are numbered across blocks"""
+        blocks = list(schedule_blocks(LOANS, block_rows=10))
+
+        assert len(blocks) == 3
+        assert [int(block[0][0]) for block in blocks] == [0, 1, 2]
+
+    def test_csv(self, tmp_path):
+        """Test CSV contents against the engine"""
+        path = tmp_path / "book.csv"
+
+        assert write_schedule_csv(LOANS, str(path), block_rows=16) == 75
+
+        with open(path) as f:
+            rows = list(csv.DictReader(f))
+        assert len(rows) == 75
+        first = next(schedule(*LOANS[0]))
+        assert rows[0] == {"loan": "0", "month": "1", "payment": f"{first.payment:.2f}",
+                           "interest": f"{first.interest:.2f}", "principal": f"{first.principal:.2f}",
+                           "balance": f"{first.balance:.2f}"}
+        assert rows[-1]["loan"] == "2" and rows[-1]["balance"] == "0.00"
+
+    def test_binary_round_trip(self, tmp_path):
+        """Test that the binary export reads back to the same columns"""
+        path = str(tmp_path / "book.sched")
+
+        assert write_schedule_binary(LOANS, path, block_rows=16) == 75
+
+        blocks = list(read_schedule_binary(path))
+        columns = [np.concatenate(parts) for parts in zip(*blocks)]
+        for read, expected in zip(columns, schedule_columns(*zip(*LOANS))):
+            np.testing.assert_array_equal(read, expected)
+
+    def test_binary_rejects_foreign_file(self, tmp_path):
+        """Test that a file with a wrong magic is rejected"""
+        path = tmp_path / "other.sched"
+        path.write_bytes(b"XXXX\x01\x00\x06\x00")
+
+        with pytest.raises(ScheduleFormatError):
+            list(read_schedule_binary(str(path)))
+
+    def test_binary_rejects_truncated_file(self, tmp_path):
+        """Test that a cut-off block is reported"""
+        path = tmp_path / "book.sched"
+        write_schedule_binary(LOANS, str(path))
+        path.write_bytes(path.read_bytes()[:-5])
+
+        with pytest.raises(ScheduleFormatError):
+            list(read_schedule_binary(str(path)))
+
+    def test_failed_export_leaves_no_file(self, tmp_path):
+        """Test that an error mid-export does not leave a partial file"""
+        def loans():
+            yield LOANS[0]
+            raise RuntimeError("source failed")
+
+        with pytest.raises(RuntimeError):
+            write_schedule_csv(loans(), str(tmp_path / "book.csv"), block_rows=1)
+
+        assert list(tmp_path.iterdir()) == []
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
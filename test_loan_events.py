@@ -0,0 +1,240 @@
+import pytest
+from engine import annuity_payment, quote_loan
+from loan_events import (IncrementalPlan, PaymentHoliday, Prepayment, RateReset, REDUCE_PAYMENT, plan_loan,
+                         plan_row, plan_rows, remaining_term)
+
+
+def simulate(loan, months, annual, events):
+    """Month-by-month reference implementation of the same rules"""
+    monthly = annual / 1200
+    balance, payment, left, month, paid = loan, annuity_payment(loan, months, annual), months, 0, 0.0
+    pending = sorted(events, key=lambda e: e.month)
+
+    def apply_events():
+        nonlocal balance, payment, left, month, paid, annual, monthly
+        while pending and pending[0].month == month:
+            event = pending.pop(0)
+            if left == 0:
+                continue
+            if isinstance(event, Prepayment):
+                amount = min(event.amount, balance)
+                balance -= amount
+                paid += amount
+                if balance <= 1e-7:
+                    balance, left = 0.0, 0
+                elif event.mode == REDUCE_PAYMENT:
+                    payment = annuity_payment(balance, left, annual)
+                else:
+                    left, rest = 0, balance
+                    while rest > 1e-7:
+                        rest = rest * (1 + monthly) - payment
+                        left += 1
+            elif isinstance(event, RateReset):
+                annual, monthly = event.annual, event.annual / 1200
+                payment = annuity_payment(balance, left, annual)
+            else:
+                balance *= (1 + monthly) ** event.months
+                month += event.months
+                payment = annuity_payment(balance, left, annual)
+
+    apply_events()
+    while left > 0:
+        month += 1
+        amount = balance * (1 + monthly) if left == 1 else payment
+        balance = balance * (1 + monthly) - amount
+        paid += amount
+        left -= 1
+        apply_events()
+    return paid, month
+
+
+class TestLoanEvents:
+    """Test class for the event-driven schedule engine"""
+
+    CASES = [
+        [],
+        [Prepayment(12, 200000.0)],
+        [Prepayment(12, 200000.0, REDUCE_PAYMENT)],
+        [RateReset(24, 8.0)],
+        [PaymentHoliday(6, 3)],
+        [RateReset(24, 8.0), Prepayment(36, 100000.0), PaymentHoliday(50, 6), Prepayment(60, 50000.0, REDUCE_PAYMENT)],
+    ]
+
+    @pytest.mark.parametrize("events", CASES)
+    def test_matches_month_by_month_simulation(self, events):
+        """Test totals and term against a brute-force monthly loop"""
+        plan = plan_loan(1000000.0, 120, 12.0, events)
+        paid, months = simulate(1000000.0, 120, 12.0, events)
+
+        assert plan.total_paid == pytest.approx(paid, rel=1e-9)
+        assert plan.months == months
+
+    def test_no_events_equals_annuity(self):
+        """Test that a plan without events is the plain annuity"""
+        plan = plan_loan(100000.0, 12, 17.0)
+        quote = quote_loan(100000.0, 12, 17.0)
+
+        assert plan.total_paid == pytest.approx(quote.total)
+        assert plan.total_interest == pytest.approx(quote.interest)
+        assert plan.last_payment == pytest.approx(quote.payment)
+
+    def test_segments_grow_with_events_not_months(self):
+        """Test that the work is proportional to the number of events"""
+        events = [Prepayment(month, 1000.0) for month in range(12, 300, 12)]
+
+        plan = plan_loan(5000000.0, 360, 10.0, events)
+
+        assert len(plan.segments) <= len(events) + 2
+        assert len(plan_loan(5000000.0, 360, 10.0).segments) == 2
+
+    def test_reduce_term_shortens_and_keeps_payment(self):
+        """Test the two prepayment modes"""
+        term = plan_loan(1000000.0, 120, 12.0, [Prepayment(12, 200000.0)])
+        payment = plan_loan(1000000.0, 120, 12.0, [Prepayment(12, 200000.0, REDUCE_PAYMENT)])
+
+        assert term.months < 120 and payment.months == 120
+        assert term.segments[-2].payment == term.segments[0].payment
+        assert payment.segments[-2].payment < payment.segments[0].payment
+        assert term.total_interest < payment.total_interest
+
+    def test_full_prepayment_closes_loan(self):
+        """Test that prepaying more than the balance ends the loan"""
+        plan = plan_loan(1000000.0, 120, 12.0, [Prepayment(10, 5000000.0), RateReset(20, 5.0)])
+
+        assert plan.months == 10
+        assert plan.last_payment == 0.0
+        rows = list(plan_rows(plan))
+        assert rows[-1].balance == 0.0
+        assert sum(row.payment for row in rows) == pytest.approx(plan.total_paid)
+
+    def test_holiday_extends_term_and_capitalizes(self):
+        """Test that a payment holiday shifts the term and adds interest"""
+        plan = plan_loan(1000000.0, 120, 12.0, [PaymentHoliday(6, 3)])
+
+        assert plan.months == 123
+        assert plan.total_interest > plan_loan(1000000.0, 120, 12.0).total_interest
+        holiday = [row for row in plan_rows(plan) if 7 <= row.month <= 9]
+        assert all(row.payment == 0.0 for row in holiday)
+        assert holiday[-1].balance > holiday[0].balance
+
+    def test_rows_match_totals(self):
+        """Test that the lazy monthly rows add up to the plan totals"""
+        plan = plan_loan(1000000.0, 120, 12.0, self.CASES[-1])
+
+        rows = list(plan_rows(plan))
+
+        assert len(rows) == plan.months
+        assert sum(row.payment for row in rows) == pytest.approx(plan.total_paid)
+        assert rows[-1].balance == 0.0
+
+    def test_prepayment_at_holiday_end_is_in_rows(self):
+        """Test that row payments add up to the plan total when a prepayment ends a holiday"""
+        plan = plan_loan(100000.0, 12, 12.0, [PaymentHoliday(3, 2), Prepayment(5, 20000.0)])
+
+        rows = list(plan_rows(plan))
+
+        assert rows[4].payment == 20000.0
+        assert rows[5].interest == pytest.approx(rows[4].balance * 0.01)
+        assert sum(row.payment for row in rows) == pytest.approx(plan.total_paid)
+        assert plan_row(plan, 5) == pytest.approx(rows[4])
+
+    @pytest.mark.parametrize("event", [
+        Prepayment(5, -50000.0), Prepayment(5, 0.0), Prepayment(0, 1000.0), PaymentHoliday(3, -2),
+        PaymentHoliday(3, 0), RateReset(-1, 5.0), RateReset(6, 0.0), RateReset(6, float("nan")),
+    ])
+    def test_invalid_event_fields(self, event):
+        """Test that events with impossible fields are rejected"""
+        with pytest.raises(ValueError):
+            plan_loan(100000.0, 12, 12.0, [event])
+
+    def test_event_inside_holiday_is_rejected(self):
+        """Test that events cannot fall inside a payment holiday"""
+        with pytest.raises(ValueError):
+            plan_loan(1000000.0, 120, 12.0, [PaymentHoliday(6, 6), RateReset(8, 5.0)])
+
+    def test_unknown_prepayment_mode(self):
+        """Test that a typo in the mode is reported"""
+        with pytest.raises(ValueError):
+            plan_loan(1000000.0, 120, 12.0, [Prepayment(6, 1000.0, "reduce_both")])
+
+    def test_remaining_term(self):
+        """Test the payment count for a fixed payment"""
+        payment = annuity_payment(100000.0, 24, 12.0)
+
+        assert remaining_term(100000.0, payment, 12.0) == 24
+        assert remaining_term(1200.0, 100.0, 0.0) == 12
+        with pytest.raises(ValueError):
+            remaining_term(100000.0, 500.0, 12.0)
+
+
+class TestIncrementalPlan:
+    """Test class for checkpointed recomputation after event edits"""
+
+    EVENTS = [RateReset(24, 8.0), Prepayment(36, 100000.0), PaymentHoliday(50, 6),
+              Prepayment(60, 50000.0, REDUCE_PAYMENT), RateReset(90, 10.0)]
+
+    def _check(self, incremental, diff, before):
+        """Compare with a full recompute and check that rows before the diff did not change"""
+        expected = plan_loan(1000000.0, 120, 12.0, incremental.events)
+        rows = list(plan_rows(expected))
+
+        assert incremental.plan.total_paid == pytest.approx(expected.total_paid, abs=1e-6)
+        assert diff.months == expected.months
+        assert len(diff.rows) == expected.months - diff.start + 1
+        for got, want in zip(diff.rows, rows[diff.start - 1:]):
+            assert got == pytest.approx(want, abs=1e-6)
+        for got, want in zip(before[:diff.start - 1], rows):
+            assert got == pytest.approx(want, abs=1e-6)
+
+    def test_plan_row_matches_lazy_rows(self):
+        """Test that random access rows equal the generated ones"""
+        plan = plan_loan(1000000.0, 120, 12.0, self.EVENTS)
+
+        assert plan.starts == [segment.start for segment in plan.segments]
+        for row in plan_rows(plan):
+            assert plan_row(plan, row.month) == pytest.approx(row, abs=1e-6)
+        with pytest.raises(IndexError):
+            plan_row(plan, plan.months + 1)
+
+    @pytest.mark.parametrize("edit", [
+        lambda plan: plan.add_event(Prepayment(80, 20000.0)),
+        lambda plan: plan.add_event(RateReset(1, 5.0)),
+        lambda plan: plan.remove_event(1),
+        lambda plan: plan.move_event(0, 40),
+        lambda plan: plan.move_event(3, 12),
+        lambda plan: plan.add_event(Prepayment(70, 5000000.0)),
+    ])
+    def test_edit_returns_changed_suffix(self, edit):
+        """Test that an edit returns exactly the rows that differ from the old plan"""
+        incremental = IncrementalPlan(1000000.0, 120, 12.0, self.EVENTS)
+        before = list(incremental.rows())
+
+        diff = edit(incremental)
+
+        self._check(incremental, diff, before)
+
+    def test_late_edit_replays_only_the_suffix(self):
+        """Test that editing the last event does not replay earlier ones"""
+        incremental = IncrementalPlan(1000000.0, 120, 12.0, self.EVENTS)
+        replayed = incremental.stats["events_replayed"]
+
+        diff = incremental.move_event(4, 100)
+
+        assert diff.start == 90
+        assert incremental.stats["events_replayed"] - replayed == 1
+
+    def test_rejected_edit_keeps_plan(self):
+        """Test that an edit that breaks the rules leaves the plan unchanged"""
+        incremental = IncrementalPlan(1000000.0, 120, 12.0, self.EVENTS)
+        total = incremental.plan.total_paid
+
+        with pytest.raises(ValueError):
+            incremental.add_event(RateReset(52, 3.0))
+
+        assert incremental.events == self.EVENTS
+        assert incremental.plan.total_paid == total
+        self._check(incremental, incremental.add_event(Prepayment(100, 1000.0)), list(incremental.rows()))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,110 @@
+import pytest
+import tkinter as tk
+from unittest.mock import MagicMock
+from log_pane import LogPane, FLUSH_DELAY_MS
+
+
+class DeferredAfter:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, ms, func):
+        self.calls.append((ms, func))
+
+    def run(self):
+        calls, self.calls = self.calls, []
+        for _, func in calls:
+            func()
+
+
+class TestLogPane:
+    """Test class for the ring-buffer log pane"""
+
+    @pytest.fixture
+    def after(self):
+        return DeferredAfter()
+
+    def test_writes_coalesce_into_one_update(self, after):
+        """Test that many lines per frame cause one scheduled insert"""
+        widget = MagicMock()
+        pane = LogPane(widget, after)
+
+        for i in range(100):
+            pane.write(f"line {i}")
+
+        assert len(after.calls) == 1
+        assert after.calls[0][0] == FLUSH_DELAY_MS
+        widget.insert.assert_not_called()
+
+        after.run()
+
+        widget.insert.assert_called_once_with(tk.END, "".join(f"line {i}\n" for i in range(100)))
+        widget.see.assert_called_once_with(tk.END)
+        assert widget.configure.call_args_list[-1].kwargs == {"state": "disabled"}
+
+    def test_next_write_schedules_again(self, after):
+        """Test that a new flush is scheduled after the previous one ran"""
+        pane = LogPane(MagicMock(), after)
+        pane.write("a")
+        after.run()
+
+        pane.write("b")
+
+        assert len(after.calls) == 1
+
+    def test_widget_is_trimmed(self, after):
+        """Test that the oldest lines are deleted past max_lines"""
+        widget = MagicMock()
+        pane = LogPane(widget, after, max_lines=5)
+
+        for i in range(3):
+            pane.write(f"first {i}")
+        after.run()
+        for i in range(4):
+            pane.write(f"second {i}")
+        after.run()
+
+        widget.delete.assert_called_once_with("1.0", "3.0")
+
+    def test_overflow_within_one_frame(self, after):
+        """Test that only the last max_lines lines are shown after a burst"""
+        widget = MagicMock()
+        pane = LogPane(widget, after, max_lines=3)
+
+        for i in range(10):
+            pane.write(str(i))
+        assert len(pane._pending) == 3, "Lines waiting for the event loop must stay bounded"
+        after.run()
+
+        widget.delete.assert_called_once_with("1.0", tk.END)
+        widget.insert.assert_called_once_with(tk.END, "7\n8\n9\n")
+
+    def test_close_flushes_pending_lines(self, after):
+        """Test that close writes lines that were not flushed yet"""
+        widget = MagicMock()
+        pane = LogPane(widget, after)
+        pane.write("last words")
+
+        pane.close()
+
+        widget.insert.assert_called_once_with(tk.END, "last words\n")
+
+    def test_rotating_file_mirror(self, tmp_path, after):
+        """Test that every line is mirrored to a rotating file"""
+        path = tmp_path / "app.log"
+        pane = LogPane(MagicMock(), after, max_lines=2, log_file=str(path), max_bytes=200, backup_count=2)
+
+        for i in range(30):
+            pane.write(f"message number {i:02d}")
+        pane.close()
+
+        assert (tmp_path / "app.log.1").exists()
+        assert not (tmp_path / "app.log.3").exists()
+        assert path.read_text(encoding="utf-8").splitlines()[-1] == "message number 29"
+        names = ("app.log.2", "app.log.1", "app.log")
+        mirrored = "".join((tmp_path / name).read_text(encoding="utf-8") for name in names)
+        assert "message number 25" in mirrored, "Lines dropped from the pane must still reach the file"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -2,7 +2,12 @@ import pytest
 import tkinter as tk
 from unittest.mock import patch, MagicMock, call
 import datetime
+import threading
+import main
 from main import CurrencyConverterApp
+from log_pane import LogPane
+from api import CircuitOpenError
+from db import RateChange
 
 
 class TestCurrencyConverterApp:
@@ -16,6 +21,7 @@ class TestCurrencyConverterApp:
              patch.object(tk.Tk, 'title'), \
              patch.object(tk.Tk, 'geometry'), \
              patch.object(tk.Tk, 'resizable'), \
+             patch.object(tk.Tk, 'protocol'), \
              patch.object(tk.Tk, 'mainloop'), \
              patch('main.ttk.Label'), \
              patch('main.ttk.Entry'), \
@@ -24,7 +30,9 @@ class TestCurrencyConverterApp:
              patch('main.tk.DoubleVar'), \
              patch('main.tk.IntVar'), \
              patch('main.tk.StringVar'), \
-             patch('main.tk.Text'):
+             patch('main.tk.Text'), \
+             patch('main.ScheduleView'), \
+             patch('main.BalanceChart'):
             app = CurrencyConverterApp()
             # Mock the tkinter components to avoid GUI issues
             app.monthly_label = MagicMock()
@@ -33,6 +41,7 @@ class TestCurrencyConverterApp:
             app.convert_btn = MagicMock()
             app.result_label = MagicMock()
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             return app
     
     @pytest.fixture
@@ -225,7 +234,7 @@ class TestCurrencyConverterApp:
             mock_messagebox.showerror.assert_not_called()
     
     def test_convert_none_rate(self, app, mock_messagebox):
-        """Test convert when rate is None"""
+        """Test convert when no rate is saved for the currency"""
         app.base_var = MagicMock()
         app.base_var.get.return_value = "RUB"
         app.target_var = MagicMock()
@@ -237,10 +246,10 @@ class TestCurrencyConverterApp:
             
             app.convert()
             
-            # Should return early without updating UI
+            # Should ask to update the rates without updating the result
             app.result_label.config.assert_not_called()
-            app.log_text.configure.assert_not_called()
-            mock_messagebox.showerror.assert_not_called()
+            app.log_text.insert.assert_called()
+            mock_messagebox.showerror.assert_called_once_with("Ошибка", "Обновите валютные курсы")
     
     def test_convert_exception(self, app, mock_messagebox):
         """Test convert with exception handling"""
@@ -288,7 +297,7 @@ class TestCurrencyConverterApp:
         }
         
         with patch('main.fetch_rates') as mock_fetch, \
-             patch('main.save_rate') as mock_save:
+             patch('db.update_rates') as mock_update:
             mock_fetch.return_value = mock_rates
             
             app.update_db()
@@ -296,13 +305,8 @@ class TestCurrencyConverterApp:
             # Verify fetch_rates was called
             mock_fetch.assert_called_once()
             
-            # Verify save_rate was called for each currency
-            expected_calls = [
-                call(1, "USD", 75.0),
-                call(2, "EUR", 82.0),
-                call(3, "GBP", 95.0)
-            ]
-            mock_save.assert_has_calls(expected_calls)
+            # Verify the whole payload was handed to update_rates once
+            mock_update.assert_called_once_with(mock_rates)
             
             # Verify success message
             mock_messagebox.showinfo.assert_called_once_with(
@@ -313,6 +317,36 @@ class TestCurrencyConverterApp:
             app.log_text.configure.assert_called()
             app.log_text.insert.assert_called()
     
+    def test_update_db_logs_changes(self, app, mock_messagebox):
+        """Test that moved rates are written to the log"""
+        app.target_var = MagicMock()
+        app.target_var.get.return_value = "USD"
+
+        with patch('main.fetch_rates') as mock_fetch, \
+             patch('db.update_rates') as mock_update:
+            mock_fetch.return_value = {"USD": {"Value": 80.0}}
+            mock_update.return_value = [RateChange("USD", 75.0, 80.0, 6.666)]
+
+            app.update_db()
+
+            logged = "".join(c[0][1] for c in app.log_text.insert.call_args_list)
+            assert "USD: 75.0 → 80.0 (+6.67%)" in logged
+
+    def test_update_db_exports_snapshot(self, app, mock_messagebox):
+        """Test that a successful refresh writes the binary rates snapshot"""
+        app.target_var = MagicMock()
+        app.target_var.get.return_value = "USD"
+        mock_rates = {"USD": {"Value": 75.0, "Nominal": 1}}
+
+        with patch('main.fetch_rates') as mock_fetch, \
+             patch('db.update_rates'), \
+             patch('rates_snapshot.export_snapshot') as mock_export:
+            mock_fetch.return_value = mock_rates
+
+            app.update_db()
+
+            mock_export.assert_called_once_with(mock_rates)
+
     def test_update_db_fetch_error(self, app, mock_messagebox):
         """Test update_db with fetch_rates error"""
         app.target_var = MagicMock()
@@ -328,7 +362,7 @@ class TestCurrencyConverterApp:
             app.log_text.insert.assert_called()
     
     def test_update_db_save_error(self, app, mock_messagebox):
-        """Test update_db with save_rate error"""
+        """Test update_db with update_rates error"""
         app.target_var = MagicMock()
         app.target_var.get.return_value = "USD"
         
@@ -337,9 +371,9 @@ class TestCurrencyConverterApp:
         }
         
         with patch('main.fetch_rates') as mock_fetch, \
-             patch('main.save_rate') as mock_save:
+             patch('db.update_rates') as mock_update:
             mock_fetch.return_value = mock_rates
-            mock_save.side_effect = Exception("Database error")
+            mock_update.side_effect = Exception("Database error")
             
             app.update_db()
             
@@ -347,18 +381,144 @@ class TestCurrencyConverterApp:
             app.log_text.configure.assert_called()
             app.log_text.insert.assert_called()
     
+    def test_update_db_circuit_open(self, app, mock_messagebox):
+        """Test update_db when the rates API circuit breaker is open"""
+        app.target_var = MagicMock()
+        app.target_var.get.return_value = "USD"
+
+        with patch('main.fetch_rates') as mock_fetch, \
+             patch('db.update_rates') as mock_update:
+            mock_fetch.side_effect = CircuitOpenError("Failed to fetch rates: circuit breaker is open")
+
+            app.update_db()
+
+            mock_update.assert_not_called()
+            mock_messagebox.showerror.assert_not_called()
+            mock_messagebox.showwarning.assert_called_once()
+            app.log_text.insert.assert_called()
+
+    def test_on_breaker_change_logs_transition(self, app):
+        """Test that breaker state transitions are written to the log"""
+        app.on_breaker_change("closed", "open")
+
+        logged = app.log_text.insert.call_args[0][1]
+        assert "closed → open" in logged
+
+    def test_maintenance_errors_are_logged_on_tk_thread(self, app):
+        """Test that maintenance thread errors are queued and logged by the Tk poll"""
+        with patch('main.HistoryMaintenance') as mock_maintenance, \
+             patch.object(app, 'after', return_value="job") as mock_after:
+            app.start_maintenance()
+            worker = threading.Thread(target=mock_maintenance.call_args.kwargs["on_error"],
+                                      args=(RuntimeError("disk full"),))
+            worker.start()
+            worker.join()
+
+            app.log_text.insert.assert_not_called()
+            app.poll_maintenance_errors()
+
+            assert "History maintenance error: disk full" in app.log_text.insert.call_args[0][1]
+            mock_after.assert_called_with(main.MAINTENANCE_POLL_MS, app.poll_maintenance_errors)
+
+    def test_close_flushes_log_before_destroy(self, app):
+        """Test that pending log lines reach the widget before the window is destroyed"""
+        app.log_pane = LogPane(app.log_text, lambda ms, func: None)
+        app.maintenance = MagicMock()
+        app._maintenance_job = "job"
+        app.log("pending line")
+        app._maintenance_errors.put(RuntimeError("late"))
+        flushed = []
+
+        with patch.object(app, 'after_cancel') as mock_cancel, \
+             patch.object(app, 'destroy', side_effect=lambda: flushed.append(app.log_text.insert.call_args)):
+            app.on_close()
+
+        mock_cancel.assert_called_once_with("job")
+        app.maintenance.stop.assert_called_once_with(timeout=main.MAINTENANCE_STOP_TIMEOUT)
+        logged = flushed[0][0][1]
+        assert "pending line" in logged and "History maintenance error: late" in logged
+
+    def test_inputs_are_traced(self, app):
+        """Test that the three loan inputs trigger recalculation"""
+        for var in (app.loan_var, app.loan_time_var, app.annual_interest_var):
+            var.trace_add.assert_called_with("write", app.schedule_recalculation)
+
+    def test_schedule_recalculation_is_debounced(self, app):
+        """Test that a new edit cancels the pending recalculation"""
+        with patch.object(app, 'after', side_effect=["job1", "job2"]) as mock_after, \
+             patch.object(app, 'after_cancel') as mock_cancel:
+            app.schedule_recalculation("PY_VAR0", "", "write")
+            app.schedule_recalculation("PY_VAR0", "", "write")
+
+            mock_after.assert_called_with(50, app.recalculate)
+            mock_cancel.assert_called_once_with("job1")
+            assert app._recalc_job == "job2"
+
+    @pytest.fixture
+    def inputs(self, app):
+        """Give the app separate mocks for the three traced inputs"""
+        app.loan_var, app.loan_time_var, app.annual_interest_var = MagicMock(), MagicMock(), MagicMock()
+        return app
+
+    def test_recalculate_updates_results(self, inputs):
+        """Test that live recalculation shows the same figures as the button"""
+        app = inputs
+        app.loan_var.get.return_value = 100000.0
+        app.loan_time_var.get.return_value = 12
+        app.annual_interest_var.get.return_value = 12.0
+
+        app.recalculate()
+
+        app.monthly_label.config.assert_called_once_with(text="Ежемесячный платеж: 8884.88 RUB")
+        app.convert_btn.config.assert_called_once_with(state=tk.ACTIVE)
+        app.schedule_view.set_source.assert_called_once()
+        app.chart.set_loans.assert_called_once_with([(100000.0, 12, 12.0)])
+        app.log_text.insert.assert_not_called()
+
+    def test_recalculate_reuses_factor_when_only_loan_changes(self, inputs):
+        """Test that the annuity factor is cached by term and rate"""
+        app = inputs
+        app.loan_time_var.get.return_value = 12
+        app.annual_interest_var.get.return_value = 12.0
+
+        with patch('main.annuity_factor', wraps=main.annuity_factor) as mock_factor:
+            for loan in (1000.0, 2000.0, 3000.0):
+                app.loan_var.get.return_value = loan
+                app.recalculate()
+            app.loan_time_var.get.return_value = 24
+            app.recalculate()
+
+        assert mock_factor.call_count == 2
+        assert app.payment == pytest.approx(main.annuity_payment(3000.0, 24, 12.0))
+
+    def test_recalculate_ignores_incomplete_input(self, inputs, mock_messagebox):
+        """Test that a half-typed or invalid value keeps the old result silently"""
+        app = inputs
+        app.loan_var.get.side_effect = tk.TclError("expected floating-point number")
+        app.recalculate()
+
+        app.loan_var.get.side_effect = None
+        app.loan_var.get.return_value = 0.0
+        app.loan_time_var.get.return_value = 12
+        app.annual_interest_var.get.return_value = 12.0
+        app.recalculate()
+
+        app.monthly_label.config.assert_not_called()
+        mock_messagebox.showerror.assert_not_called()
+
     def test_update_db_empty_rates(self, app, mock_messagebox):
         """Test update_db with empty rates"""
         app.target_var = MagicMock()
         app.target_var.get.return_value = "USD"
         
         with patch('main.fetch_rates') as mock_fetch, \
-             patch('main.save_rate') as mock_save:
+             patch('db.update_rates') as mock_update:
             mock_fetch.return_value = {}
+            mock_update.return_value = []
             
             app.update_db()
             
-            mock_save.assert_not_called()
+            mock_update.assert_called_once_with({})
             mock_messagebox.showinfo.assert_called_once_with(
                 "Успех", "Сохранено 0 курсов в базе данных."
             )
@@ -375,13 +535,13 @@ class TestCurrencyConverterApp:
             large_rates[currency] = {"Value": 1.0 + i * 0.1}
         
         with patch('main.fetch_rates') as mock_fetch, \
-             patch('main.save_rate') as mock_save:
+             patch('db.update_rates') as mock_update:
             mock_fetch.return_value = large_rates
             
             app.update_db()
             
-            # Verify all rates were saved
-            assert mock_save.call_count == 100
+            # Verify all rates were written in a single call
+            mock_update.assert_called_once_with(large_rates)
             
             # Verify success message
             mock_messagebox.showinfo.assert_called_once_with(
@@ -428,6 +588,7 @@ class TestAppInitialization:
              patch.object(tk.Tk, 'title'), \
              patch.object(tk.Tk, 'geometry'), \
              patch.object(tk.Tk, 'resizable'), \
+             patch.object(tk.Tk, 'protocol'), \
              patch.object(tk.Tk, 'mainloop'), \
              patch('main.ttk.Label'), \
              patch('main.ttk.Entry'), \
@@ -436,7 +597,9 @@ class TestAppInitialization:
              patch('main.tk.DoubleVar'), \
              patch('main.tk.IntVar'), \
              patch('main.tk.StringVar'), \
-             patch('main.tk.Text'):
+             patch('main.tk.Text'), \
+             patch('main.ScheduleView'), \
+             patch('main.BalanceChart'):
             app = CurrencyConverterApp()
             
             # Verify parent __init__ was called
@@ -449,6 +612,7 @@ class TestAppInitialization:
              patch.object(tk.Tk, 'title'), \
              patch.object(tk.Tk, 'geometry'), \
              patch.object(tk.Tk, 'resizable'), \
+             patch.object(tk.Tk, 'protocol'), \
              patch.object(tk.Tk, 'mainloop'), \
              patch('main.ttk.Label'), \
              patch('main.ttk.Entry'), \
@@ -457,7 +621,9 @@ class TestAppInitialization:
              patch('main.tk.DoubleVar'), \
              patch('main.tk.IntVar'), \
              patch('main.tk.StringVar'), \
-             patch('main.tk.Text'):
+             patch('main.tk.Text'), \
+             patch('main.ScheduleView'), \
+             patch('main.BalanceChart'):
             app = CurrencyConverterApp()
             
             # Verify essential attributes exist
@@ -472,6 +638,8 @@ class TestAppInitialization:
             assert hasattr(app, 'convert_btn')
             assert hasattr(app, 'result_label')
             assert hasattr(app, 'log_text')
+            assert hasattr(app, 'schedule_view')
+            assert hasattr(app, 'chart')
 
 
 if __name__ == "__main__":
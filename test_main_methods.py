@@ -3,6 +3,7 @@ import tkinter as tk
 from unittest.mock import patch, MagicMock, call
 import datetime
 from main import CurrencyConverterApp
+from log_pane import LogPane
 
 
 class TestMainMethods:
@@ -14,6 +15,7 @@ class TestMainMethods:
             # Create a minimal app instance for testing
             app = CurrencyConverterApp.__new__(CurrencyConverterApp)
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             result = app.is_loan_invalid(100.0, "Test message")
             
@@ -26,6 +28,7 @@ class TestMainMethods:
         with patch('main.messagebox') as mock_messagebox:
             app = CurrencyConverterApp.__new__(CurrencyConverterApp)
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             test_message = "Test error message"
             result = app.is_loan_invalid(0.0, test_message)
@@ -40,6 +43,7 @@ class TestMainMethods:
         with patch('main.messagebox') as mock_messagebox:
             app = CurrencyConverterApp.__new__(CurrencyConverterApp)
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             test_message = "Test negative error"
             result = app.is_loan_invalid(-50.0, test_message)
@@ -65,7 +69,10 @@ class TestMainMethods:
             app.loan_sum_label = MagicMock()
             app.interest_label = MagicMock()
             app.convert_btn = MagicMock()
+            app.schedule_view = MagicMock()
+            app.chart = MagicMock()
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             with patch.object(app, 'is_loan_invalid', return_value=False):
                 app.calculate_loan()
@@ -88,6 +95,7 @@ class TestMainMethods:
                     text=f"Начисленные проценты: {expected_interest_total} RUB"
                 )
                 app.convert_btn.config.assert_called_once_with(state=tk.ACTIVE)
+                app.schedule_view.set_source.assert_called_once()
     
     def test_calculate_loan_invalid_loan_amount(self):
         """Test calculate_loan with invalid loan amount"""
@@ -104,7 +112,10 @@ class TestMainMethods:
             app.loan_sum_label = MagicMock()
             app.interest_label = MagicMock()
             app.convert_btn = MagicMock()
+            app.schedule_view = MagicMock()
+            app.chart = MagicMock()
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             with patch.object(app, 'is_loan_invalid') as mock_invalid:
                 mock_invalid.return_value = True  # First call returns True (invalid)
@@ -130,6 +141,7 @@ class TestMainMethods:
             app.payment = 1000.0  # Set payment amount
             app.result_label = MagicMock()
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             mock_get_rate.return_value = 75.0  # 1 USD = 75 RUB
             
@@ -146,7 +158,7 @@ class TestMainMethods:
             mock_messagebox.showerror.assert_not_called()
     
     def test_convert_none_rate(self):
-        """Test convert when rate is None"""
+        """Test convert when no rate is saved for the currency"""
         with patch('main.messagebox') as mock_messagebox, \
              patch('main.get_saved_rate') as mock_get_rate:
             
@@ -158,15 +170,16 @@ class TestMainMethods:
             app.payment = 1000.0
             app.result_label = MagicMock()
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             mock_get_rate.return_value = None
             
             app.convert()
             
-            # Should return early without updating UI
+            # Should ask to update the rates without updating the result
             app.result_label.config.assert_not_called()
-            app.log_text.configure.assert_not_called()
-            mock_messagebox.showerror.assert_not_called()
+            app.log_text.insert.assert_called()
+            mock_messagebox.showerror.assert_called_once_with("Ошибка", "Обновите валютные курсы")
     
     def test_convert_exception(self):
         """Test convert with exception handling"""
@@ -181,6 +194,7 @@ class TestMainMethods:
             app.payment = 1000.0
             app.result_label = MagicMock()
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             mock_get_rate.side_effect = Exception("Database error")
             
@@ -194,12 +208,13 @@ class TestMainMethods:
         """Test successful database update"""
         with patch('main.messagebox') as mock_messagebox, \
              patch('main.fetch_rates') as mock_fetch, \
-             patch('main.save_rate') as mock_save:
+             patch('db.update_rates') as mock_update:
             
             app = CurrencyConverterApp.__new__(CurrencyConverterApp)
             app.target_var = MagicMock()
             app.target_var.get.return_value = "USD"
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             mock_rates = {
                 "USD": {"Value": 75.0},
@@ -213,13 +228,8 @@ class TestMainMethods:
             # Verify fetch_rates was called
             mock_fetch.assert_called_once()
             
-            # Verify save_rate was called for each currency
-            expected_calls = [
-                call(1, "USD", 75.0),
-                call(2, "EUR", 82.0),
-                call(3, "GBP", 95.0)
-            ]
-            mock_save.assert_has_calls(expected_calls)
+            # Verify the whole payload was handed to update_rates once
+            mock_update.assert_called_once_with(mock_rates)
             
             # Verify success message
             mock_messagebox.showinfo.assert_called_once_with(
@@ -234,18 +244,20 @@ class TestMainMethods:
         """Test update_db with empty rates"""
         with patch('main.messagebox') as mock_messagebox, \
              patch('main.fetch_rates') as mock_fetch, \
-             patch('main.save_rate') as mock_save:
+             patch('db.update_rates') as mock_update:
             
             app = CurrencyConverterApp.__new__(CurrencyConverterApp)
             app.target_var = MagicMock()
             app.target_var.get.return_value = "USD"
             app.log_text = MagicMock()
+            app.log_pane = LogPane(app.log_text, lambda ms, func: func())
             
             mock_fetch.return_value = {}
+            mock_update.return_value = []
             
             app.update_db()
             
-            mock_save.assert_not_called()
+            mock_update.assert_called_once_with({})
             mock_messagebox.showinfo.assert_called_once_with(
                 "Успех", "Сохранено 0 курсов в базе данных."
             )
@@ -254,6 +266,7 @@ class TestMainMethods:
         """Test the log method functionality"""
         app = CurrencyConverterApp.__new__(CurrencyConverterApp)
         app.log_text = MagicMock()
+        app.log_pane = LogPane(app.log_text, lambda ms, func: func())
         
         test_message = "Test log message"
         
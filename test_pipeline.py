@@ -0,0 +1,106 @@
+import pytest
+import io
+import json
+from unittest.mock import patch
+from pipeline import QuotePipeline, parse_record, price_chunk, run_pipeline
+from engine import quote_loan
+
+
+def _lines(records):
+    return io.StringIO("".join(json.dumps(r) + "\n" for r in records))
+
+
+class FailingSink(io.StringIO):
+    def write(self, data):
+        raise BrokenPipeError("closed")
+
+
+class TestPipeline:
+    """Test class for the NDJSON quoting pipeline"""
+
+    def test_prices_records_in_order(self):
+        """Test that every record is priced and order is kept across chunks"""
+        records = [{"id": i, "loan": 1000 * i, "months": 12, "annual": 10.0} for i in range(1, 51)]
+        sink = io.StringIO()
+
+        stats = run_pipeline(_lines(records), sink, chunk_size=7, queue_depth=2)
+
+        out = [json.loads(line) for line in sink.getvalue().splitlines()]
+        assert [item["id"] for item in out] == list(range(1, 51))
+        assert out[0]["payment"] == round(quote_loan(1000, 12, 10.0).payment, 2)
+        assert stats == {"records": 50, "priced": 50, "errors": 0, "chunks": 8}
+
+    def test_bad_lines_become_error_records(self):
+        """Test that invalid lines are reported with their line number"""
+        source = io.StringIO('{"loan": 1000, "months": 12, "annual": 10}\nnot json\n\n'
+                             '{"loan": -5, "months": 12, "annual": 10}\n{"loan": 1000}\n')
+        sink = io.StringIO()
+
+        stats = run_pipeline(source, sink)
+
+        out = [json.loads(line) for line in sink.getvalue().splitlines()]
+        assert "payment" in out[0]
+        assert out[1]["line"] == 2
+        assert out[2] == {"line": 4, "error": "Сумма кредита должна быть > 0 RUB"}
+        assert out[3] == {"line": 5, "error": "Missing field: months"}
+        assert stats["errors"] == 3
+
+    def test_currency_conversion(self):
+        """Test conversion with the stored rate"""
+        sink = io.StringIO()
+
+        run_pipeline(_lines([{"loan": 1200, "months": 12, "annual": 12.0}]), sink, currency="usd",
+                     rates={"USD": 100.0})
+
+        converted = json.loads(sink.getvalue())["converted"]
+        quote = quote_loan(1200, 12, 12.0)
+        assert converted["currency"] == "USD"
+        assert converted["payment"] == round(quote.payment / 100.0, 2)
+
+    def test_rates_read_from_db(self):
+        """Test that rates are loaded from the database when not given"""
+        with patch('pipeline.db.get_all_rates', return_value={"EUR": 90.0}) as mock_rates:
+            pipe = QuotePipeline(io.StringIO(), io.StringIO(), currency="EUR")
+
+        mock_rates.assert_called_once()
+        assert pipe.rate == 90.0
+
+    def test_unknown_currency(self):
+        """Test that a missing rate fails before any work is done"""
+        with pytest.raises(KeyError):
+            QuotePipeline(io.StringIO(), io.StringIO(), currency="XYZ", rates={"USD": 90.0})
+
+    def test_sink_failure_does_not_hang(self):
+        """Test that a failing writer stops the pipeline instead of deadlocking"""
+        records = ({"loan": 1000, "months": 12, "annual": 10.0} for _ in range(10000))
+        source = (json.dumps(r) + "\n" for r in records)
+
+        with pytest.raises(BrokenPipeError):
+            run_pipeline(source, FailingSink(), chunk_size=10, queue_depth=1)
+
+    def test_parse_record_rejects_fractional_months(self):
+        """Test months validation"""
+        with pytest.raises(ValueError):
+            parse_record('{"loan": 1000, "months": 12.5, "annual": 10}')
+
+    def test_non_finite_lines_become_error_records(self):
+        """Test that overflowing and NaN numbers do not abort the run or leak NaN into the output"""
+        source = io.StringIO('{"loan": 1, "months": 1e400, "annual": 1}\n{"loan": "nan", "months": 12, "annual": 1}\n'
+                             '{"loan": 1000, "months": 12, "annual": 10}\n')
+        sink = io.StringIO()
+
+        stats = run_pipeline(source, sink)
+
+        out = [json.loads(line) for line in sink.getvalue().splitlines()]
+        assert out[0] == {"line": 1, "error": "months must be an integer"}
+        assert out[1]["line"] == 2 and "error" in out[1]
+        assert "NaN" not in sink.getvalue()
+        assert stats == {"records": 3, "priced": 1, "errors": 2, "chunks": 1}
+
+    def test_price_chunk_without_valid_records(self):
+        """Test a chunk made only of errors"""
+        assert price_chunk([(1, None, None, "bad")]) == [{"line": 1, "error": "bad"}]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,138 @@
+import pytest
+import os
+import tempfile
+from unittest.mock import patch
+from db import init_db
+from engine import quote_loan, schedule
+from quote_cache import QuoteCache, quote_key
+
+
+class FakeClock:
+    """Manually advanced clock for TTL tests"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestQuoteCache:
+    """Test class for the persistent quote-result cache"""
+
+    @pytest.fixture
+    def temp_db(self):
+        """Create a temporary database for testing"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        temp_file.close()
+
+        with patch('db.DB_NAME', temp_file.name):
+            init_db()
+            yield temp_file.name
+
+        try:
+            os.unlink(temp_file.name)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+    def test_normalized_keys(self):
+        """Test that equivalent inputs share a key"""
+        assert quote_key("quote", 100000, 12, 17) == quote_key("quote", 100000.001, 12.0, 17.0)
+        assert quote_key("quote", 100000, 12, 17) != quote_key("quote", 100000, 12, 17.5)
+        assert quote_key("quote", 100000, 12, 17) != quote_key("schedule", 100000, 12, 17)
+
+    def test_miss_then_hit(self, temp_db):
+        """Test that a repeat quote is served from the cache"""
+        cache = QuoteCache()
+
+        first = cache.get_quote(100000.0, 12, 17.0)
+        with patch('quote_cache.quote_loan') as mock_quote:
+            second = cache.get_quote(100000.0, 12, 17.0)
+            mock_quote.assert_not_called()
+
+        assert first == second == quote_loan(100000.0, 12, 17.0)
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_schedule_round_trip(self, temp_db):
+        """Test that cached schedules come back as ScheduleRow tuples"""
+        cache = QuoteCache()
+
+        cache.get_schedule(50000.0, 6, 10.0)
+        rows = cache.get_schedule(50000.0, 6, 10.0)
+
+        assert rows == list(schedule(50000.0, 6, 10.0))
+
+    def test_shared_between_instances(self, temp_db):
+        """Test that a second cache instance (another process) sees stored quotes"""
+        QuoteCache().get_quote(100000.0, 12, 17.0)
+
+        cache = QuoteCache()
+        cache.get_quote(100000.0, 12, 17.0)
+
+        assert cache.stats()["hits"] == 1
+
+    def test_hits_are_written_in_batches(self, temp_db):
+        """Test that hits stay in memory until flush_every of them are collected"""
+        cache = QuoteCache(flush_every=3, flush_interval=3600)
+        cache.get_quote(100000.0, 12, 17.0)
+        observer = QuoteCache()
+
+        cache.get_quote(100000.0, 12, 17.0)
+        cache.get_quote(100000.0, 12, 17.0)
+        assert observer.stats()["hits"] == 0
+
+        cache.get_quote(100000.0, 12, 17.0)
+        assert observer.stats()["hits"] == 3
+
+        cache.get_quote(100000.0, 12, 17.0)
+        cache.flush()
+        assert observer.stats()["hits"] == 4
+
+    def test_ttl_expiry(self, temp_db):
+        """Test that expired entries are recomputed"""
+        clock = FakeClock()
+        cache = QuoteCache(ttl=60, clock=clock)
+        cache.get_quote(100000.0, 12, 17.0)
+
+        clock.now += 61
+        cache.get_quote(100000.0, 12, 17.0)
+
+        assert cache.stats()["misses"] == 2
+
+    def test_lru_eviction(self, temp_db):
+        """Test that the least recently used entry is evicted at the size cap"""
+        clock = FakeClock()
+        cache = QuoteCache(max_entries=2, clock=clock)
+        cache.get_quote(1000.0, 12, 10.0)
+        clock.now += 1
+        cache.get_quote(2000.0, 12, 10.0)
+        clock.now += 1
+        cache.get_quote(1000.0, 12, 10.0)  # refresh the first entry
+        clock.now += 1
+
+        cache.get_quote(3000.0, 12, 10.0)
+
+        stats = cache.stats()
+        assert stats["entries"] == 2
+        assert stats["evictions"] == 1
+        cache.get_quote(1000.0, 12, 10.0)
+        assert cache.stats()["hits"] == 2, "The refreshed entry should have survived"
+
+    def test_purge_and_clear(self, temp_db):
+        """Test purge_expired and clear"""
+        clock = FakeClock()
+        cache = QuoteCache(ttl=60, clock=clock)
+        cache.get_quote(1000.0, 12, 10.0)
+        clock.now += 61
+        cache.get_quote(2000.0, 12, 10.0)
+
+        assert cache.purge_expired() == 1
+        cache.clear()
+        assert cache.stats() == {"hits": 0, "misses": 0, "evictions": 0, "entries": 0, "hit_rate": 0.0}
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
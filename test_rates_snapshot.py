@@ -0,0 +1,107 @@
+import pytest
+import os
+from unittest.mock import patch
+from rates_snapshot import (
+    RatesSnapshot, SnapshotFormatError, export_snapshot, pack_snapshot, refresh_rates, HEADER_SIZE
+)
+
+
+class TestRatesSnapshot:
+    """Test class for the binary rates snapshot"""
+
+    RATES = {
+        "USD": {"Value": 75.5, "Nominal": 1},
+        "EUR": {"Value": 82.3, "Nominal": 1},
+        "JPY": {"Value": 51.2, "Nominal": 100},
+        "AUD": {"Value": 49.0},
+    }
+
+    @pytest.fixture
+    def snapshot_path(self, tmp_path):
+        return export_snapshot(self.RATES, str(tmp_path / "rates.bin"))
+
+    def test_round_trip(self, snapshot_path):
+        """Test that exported values and nominals are read back"""
+        with RatesSnapshot(snapshot_path) as snapshot:
+            assert len(snapshot) == 4
+            assert snapshot.get("USD") == 75.5
+            assert snapshot.get("EUR") == 82.3
+            assert snapshot.get("JPY") == 51.2
+            assert snapshot.nominal("JPY") == 100.0
+            assert snapshot.nominal("AUD") == 1.0
+
+    def test_codes_are_sorted(self, snapshot_path):
+        """Test that the code table is stored in sorted order"""
+        with RatesSnapshot(snapshot_path) as snapshot:
+            assert snapshot.codes() == ["AUD", "EUR", "JPY", "USD"]
+
+    def test_missing_code(self, snapshot_path):
+        """Test lookups of codes that are not in the snapshot"""
+        with RatesSnapshot(snapshot_path) as snapshot:
+            assert snapshot.get("GBP") is None
+            assert snapshot.get("GBP", 0.0) == 0.0
+            assert "GBP" not in snapshot
+            assert "USD" in snapshot
+
+    def test_empty_snapshot(self, tmp_path):
+        """Test a snapshot without any currencies"""
+        path = export_snapshot({}, str(tmp_path / "empty.bin"))
+
+        with RatesSnapshot(path) as snapshot:
+            assert len(snapshot) == 0
+            assert snapshot.get("USD") is None
+
+    def test_values_are_zero_copy_views(self, snapshot_path):
+        """Test that the value column is a memoryview over the mapped file"""
+        snapshot = RatesSnapshot(snapshot_path)
+        try:
+            assert isinstance(snapshot._values, memoryview)
+            assert snapshot._values.format == "d"
+        finally:
+            snapshot.close()
+
+    def test_bad_magic(self, tmp_path):
+        """Test that files that are not snapshots are rejected"""
+        path = tmp_path / "bad.bin"
+        path.write_bytes(b"X" * HEADER_SIZE)
+
+        with pytest.raises(SnapshotFormatError):
+            RatesSnapshot(str(path))
+
+    def test_truncated_file(self, tmp_path):
+        """Test that a truncated snapshot is rejected"""
+        path = tmp_path / "short.bin"
+        path.write_bytes(pack_snapshot(self.RATES)[:-8])
+
+        with pytest.raises(SnapshotFormatError):
+            RatesSnapshot(str(path))
+
+    def test_export_replaces_atomically(self, snapshot_path):
+        """Test that re-exporting replaces the file and leaves no temp files"""
+        export_snapshot({"USD": {"Value": 80.0}}, snapshot_path)
+
+        with RatesSnapshot(snapshot_path) as snapshot:
+            assert snapshot.get("USD") == 80.0
+        assert [n for n in os.listdir(os.path.dirname(snapshot_path)) if n.startswith(".snapshot-")] == []
+
+    def test_code_too_long(self):
+        """Test that codes wider than the code table are rejected"""
+        with pytest.raises(ValueError):
+            pack_snapshot({"TOOLONG": {"Value": 1.0}})
+
+    def test_refresh_saves_then_exports(self):
+        """Test that refresh_rates writes the DB first and reports export errors to the callback"""
+        with patch('db.update_rates', return_value=["change"]) as mock_update:
+            assert refresh_rates({"USD": {"Value": 80.0}}) == ["change"]
+            with RatesSnapshot() as snapshot:
+                assert snapshot.get("USD") == 80.0
+
+            errors = []
+            assert refresh_rates({"TOOLONG": {"Value": 1.0}}, on_export_error=errors.append) == ["change"]
+            assert mock_update.call_count == 2 and isinstance(errors[0], ValueError)
+            with pytest.raises(ValueError):
+                refresh_rates({"TOOLONG": {"Value": 1.0}})
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
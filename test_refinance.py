@@ -0,0 +1,70 @@
+import pytest
+import numpy as np
+from engine import annuity_payment, balance_after
+from refinance import best_offers, score_offers
+
+
+def brute_force(payment, left, offer_payment, term, fee):
+    """Month-by-month cumulative savings and the first month they cover the fee"""
+    cumulative = -fee
+    for month in range(1, max(left, term) + 1):
+        cumulative += (payment if month <= left else 0.0) - (offer_payment if month <= term else 0.0)
+        if cumulative >= -1e-6:
+            return month
+    return -1
+
+
+class TestRefinance:
+    """Test class for vectorized refinancing offer scoring"""
+
+    def test_scores_match_direct_formulas(self):
+        """Test payment, savings and NPV of single offers"""
+        scores = score_offers(1000000.0, 120, 14.0, [10.0, 16.0], [90, 60], [5000.0, 0.0], paid_months=30,
+                              discount_annual=12.0)
+
+        payment = annuity_payment(1000000.0, 120, 14.0)
+        balance = balance_after(1000000.0, 120, 14.0, 30)
+        offer = annuity_payment(balance, 90, 10.0)
+        monthly = 0.01
+        value = (1 - 1.01 ** -90) / monthly
+
+        assert scores.payment[0] == pytest.approx(offer)
+        assert scores.savings[0] == pytest.approx(payment * 90 - offer * 90 - 5000.0)
+        assert scores.npv[0] == pytest.approx((payment - offer) * value - 5000.0)
+        assert scores.savings[1] > 0 and scores.npv[1] < scores.npv[0]
+
+    def test_break_even_matches_month_by_month(self):
+        """Test break-even months against a cumulative month loop"""
+        rng = np.random.default_rng(3)
+        annuals, terms = rng.uniform(3, 20, 500), rng.integers(6, 200, 500)
+        fees = rng.choice([0.0, 1000.0, 5000.0, 20000.0], 500)
+
+        scores = score_offers(1000000.0, 120, 14.0, annuals, terms, fees, paid_months=30)
+
+        payment = annuity_payment(1000000.0, 120, 14.0)
+        expected = [brute_force(payment, 90, *args) for args in zip(scores.payment, terms, fees)]
+        assert scores.break_even.tolist() == expected
+        assert -1 in expected
+
+    def test_best_offers_equal_full_sort(self):
+        """Test that partial selection returns the head of a full sort"""
+        rng = np.random.default_rng(5)
+        scores = score_offers(500000.0, 60, 15.0, rng.uniform(5, 20, 10000), rng.integers(12, 84, 10000),
+                              rng.uniform(0, 10000, 10000))
+
+        top = best_offers(scores, 25)
+
+        assert top.tolist() == np.argsort(-scores.npv, kind="stable")[:25].tolist()
+        assert best_offers(scores, 3, by="savings").tolist() == np.argsort(-scores.savings)[:3].tolist()
+        assert len(best_offers(scores, 20000)) == 10000
+
+    def test_invalid_inputs(self):
+        """Test the paid months range and the ranking name"""
+        with pytest.raises(ValueError):
+            score_offers(500000.0, 60, 15.0, [10.0], [60], paid_months=60)
+        with pytest.raises(ValueError):
+            best_offers(score_offers(500000.0, 60, 15.0, [10.0], [60]), 1, by="payment")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
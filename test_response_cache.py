@@ -0,0 +1,103 @@
+import pytest
+import hashlib
+import os
+from response_cache import ResponseCache, payload_expiry, FALLBACK_TTL
+
+
+class TestResponseCache:
+    """Test class for the content-addressed ResponseCache"""
+
+    URL = "https://example.test/daily_json.js"
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        return ResponseCache(str(tmp_path))
+
+    def test_put_and_get(self, cache):
+        """Test that a stored payload is returned unchanged"""
+        cache.put(self.URL, b'{"Valute": {}}', expires_at=2000.0)
+
+        assert cache.get(self.URL, now=1000.0) == b'{"Valute": {}}'
+
+    def test_blob_is_content_addressed(self, cache):
+        """Test that blobs are stored under the sha256 of their content"""
+        digest = cache.put(self.URL, b"payload", expires_at=2000.0)
+
+        assert digest == hashlib.sha256(b"payload").hexdigest()
+        assert os.path.exists(os.path.join(cache.blobs_dir, digest))
+
+    def test_expired_entry_is_ignored(self, cache):
+        """Test that expired entries miss unless stale reads are allowed"""
+        cache.put(self.URL, b"payload", expires_at=1000.0)
+
+        assert cache.get(self.URL, now=1000.0) is None
+        assert cache.get(self.URL, now=1000.0, allow_stale=True) == b"payload"
+
+    def test_missing_entry(self, cache):
+        """Test that an unknown URL misses"""
+        assert cache.get(self.URL) is None
+
+    def test_corrupted_blob_is_ignored(self, cache):
+        """Test that a blob whose content no longer matches its digest is rejected"""
+        digest = cache.put(self.URL, b"payload", expires_at=2000.0)
+        with open(os.path.join(cache.blobs_dir, digest), "wb") as f:
+            f.write(b"garbage")
+
+        assert cache.get(self.URL, now=1000.0) is None
+
+    def test_no_temp_files_left_behind(self, cache):
+        """Test that atomic writes clean up their temporary files"""
+        cache.put(self.URL, b"payload", expires_at=2000.0)
+
+        leftovers = [n for d in (cache.blobs_dir, cache.index_dir) for n in os.listdir(d) if n.startswith(".tmp-")]
+        assert leftovers == []
+
+    def test_purge_removes_unreferenced_blobs(self, cache):
+        """Test that purge keeps only blobs referenced by the index"""
+        cache.put(self.URL, b"old", expires_at=2000.0)
+        new_digest = cache.put(self.URL, b"new", expires_at=2000.0)
+        with open(os.path.join(cache.blobs_dir, "orphan"), "wb") as f:
+            f.write(b"orphan")
+
+        assert cache.purge() == 1
+        assert os.listdir(cache.blobs_dir) == [new_digest]
+
+    def test_put_drops_the_replaced_blob(self, cache):
+        """Test that daily refreshes do not accumulate blobs"""
+        for day in range(5):
+            digest = cache.put(self.URL, f"day {day}".encode(), expires_at=2000.0)
+
+        assert os.listdir(cache.blobs_dir) == [digest]
+        assert cache.get(self.URL, now=1000.0) == b"day 4"
+
+    def test_lock_is_reentrant_across_instances(self, tmp_path):
+        """Test that the refill lock can be taken in sequence by separate instances"""
+        with ResponseCache(str(tmp_path)).lock(self.URL):
+            pass
+        with ResponseCache(str(tmp_path)).lock(self.URL):
+            pass
+
+
+class TestPayloadExpiry:
+    """Test class for payload_expiry"""
+
+    def test_next_date(self):
+        """Test that NextDate is used as the expiry time"""
+        payload = b'{"NextDate": "2024-03-16T11:30:00+03:00", "Timestamp": "2024-03-15T20:00:00+03:00"}'
+
+        assert payload_expiry(payload) == 1710577800.0
+
+    def test_timestamp_fallback(self):
+        """Test that Timestamp plus one day is used when NextDate is absent"""
+        payload = b'{"Timestamp": "2024-03-15T20:00:00+03:00"}'
+
+        assert payload_expiry(payload) == 1710522000.0 + 24 * 3600
+
+    def test_unparseable_payload(self):
+        """Test the fallback TTL for payloads without usable dates"""
+        assert payload_expiry(b"not json", now=100.0) == 100.0 + FALLBACK_TTL
+        assert payload_expiry(b'{"NextDate": "soon"}', now=100.0) == 100.0 + FALLBACK_TTL
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,140 @@
+import pytest
+import datetime
+import os
+import sqlite3
+import tempfile
+from unittest.mock import patch
+from db import init_db, connect, get_rate_history
+from retention import RetentionPolicy, compact_history, HistoryMaintenance
+
+DAY = 86400
+
+
+def _ts(*args) -> float:
+    return datetime.datetime(*args, tzinfo=datetime.timezone.utc).timestamp()
+
+
+class TestRetention:
+    """Test class for rate history retention and compaction"""
+
+    @pytest.fixture
+    def temp_db(self):
+        """Create a temporary database for testing"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        temp_file.close()
+
+        with patch('db.DB_NAME', temp_file.name):
+            init_db()
+            yield temp_file.name
+
+        try:
+            os.unlink(temp_file.name)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+    def insert(self, rows):
+        conn = connect()
+        conn.executemany(
+            "INSERT INTO rate_history (currency, rate, recorded_at, granularity) VALUES (?, ?, ?, ?)", rows
+        )
+        conn.commit()
+        conn.close()
+
+    def test_init_db_enables_incremental_vacuum(self, temp_db):
+        """Test that new databases are created with incremental auto-vacuum"""
+        conn = sqlite3.connect(temp_db)
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        conn.close()
+
+        assert mode == 2
+
+    def test_existing_database_is_converted(self, tmp_path):
+        """Test that an existing database without auto-vacuum is converted"""
+        path = str(tmp_path / "legacy.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE legacy (x)")
+        conn.commit()
+        conn.close()
+
+        with patch('db.DB_NAME', path):
+            init_db()
+
+        conn = sqlite3.connect(path)
+        mode = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        conn.close()
+        assert mode == 2
+
+    def test_intraday_compacted_to_daily_close(self, temp_db):
+        """Test that old intraday points collapse to the last point of each day"""
+        self.insert([
+            ('USD', 75.0, _ts(2024, 3, 1, 9), 'intraday'),
+            ('USD', 76.0, _ts(2024, 3, 1, 15), 'intraday'),
+            ('USD', 77.0, _ts(2024, 3, 2, 9), 'intraday'),
+            ('USD', 78.0, _ts(2024, 3, 20, 9), 'intraday'),
+        ])
+
+        result = compact_history(RetentionPolicy(intraday_days=7, daily_days=365), now=_ts(2024, 3, 21, 12))
+
+        assert result["daily_created"] == 2
+        assert result["intraday_removed"] == 3
+        assert get_rate_history('USD') == [
+            (_ts(2024, 3, 1, 15), 76.0, 'daily'),
+            (_ts(2024, 3, 2, 9), 77.0, 'daily'),
+            (_ts(2024, 3, 20, 9), 78.0, 'intraday'),
+        ]
+
+    def test_daily_compacted_to_monthly_average(self, temp_db):
+        """Test that old daily closes collapse to monthly averages"""
+        self.insert([
+            ('EUR', 80.0, _ts(2023, 1, 10), 'daily'),
+            ('EUR', 90.0, _ts(2023, 1, 20), 'daily'),
+            ('EUR', 85.0, _ts(2023, 2, 5), 'daily'),
+            ('EUR', 88.0, _ts(2024, 3, 1), 'daily'),
+        ])
+
+        result = compact_history(RetentionPolicy(intraday_days=7, daily_days=365), now=_ts(2024, 3, 21))
+
+        assert result["monthly_created"] == 2
+        assert get_rate_history('EUR') == [
+            (_ts(2023, 1, 1), 85.0, 'monthly'),
+            (_ts(2023, 2, 1), 85.0, 'monthly'),
+            (_ts(2024, 3, 1), 88.0, 'daily'),
+        ]
+
+    def test_compaction_is_idempotent(self, temp_db):
+        """Test that running the job twice does not duplicate points"""
+        self.insert([('USD', 75.0, _ts(2024, 3, 1, 9), 'intraday')])
+        policy = RetentionPolicy(intraday_days=7, daily_days=365)
+
+        compact_history(policy, now=_ts(2024, 3, 21))
+        second = compact_history(policy, now=_ts(2024, 3, 21))
+
+        assert second["daily_created"] == 0
+        assert len(get_rate_history('USD')) == 1
+
+    def test_vacuum_releases_pages(self, temp_db):
+        """Test that incremental vacuum returns freed pages to the OS"""
+        self.insert([('USD', float(i), _ts(2020, 1, 1) + i, 'intraday') for i in range(20000)])
+        size_before = os.path.getsize(temp_db)
+
+        compact_history(RetentionPolicy(intraday_days=7, daily_days=10000), now=_ts(2024, 3, 21))
+
+        conn = sqlite3.connect(temp_db)
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        freelist = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        conn.close()
+        assert freelist == 0
+        assert os.path.getsize(temp_db) < size_before or size_before == 0
+
+    def test_maintenance_thread_runs_and_stops(self, temp_db):
+        """Test that the background job runs once and stops promptly"""
+        job = HistoryMaintenance(interval=3600)
+        job.start()
+        job.stop(timeout=5)
+
+        assert not job.is_alive()
+        assert job.last_result is not None
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,166 @@
+import pytest
+import itertools
+import tracemalloc
+from tkinter import ttk
+from unittest.mock import patch, MagicMock
+from engine import schedule
+from loan_events import IncrementalPlan, Prepayment, plan_loan, plan_rows
+from schedule_view import BookSchedule, LoanSchedule, PlanSchedule, ScheduleView, format_row
+
+
+class TestScheduleSources:
+    """Test class for lazily computed schedule sources"""
+
+    def test_loan_schedule_matches_engine(self):
+        """Test that rows computed on demand equal the generated schedule"""
+        source = LoanSchedule(100000.0, 360, 12.0)
+
+        assert len(source) == 360
+        for index, expected in enumerate(schedule(100000.0, 360, 12.0)):
+            number, row = source.row(index)
+            assert number == 1
+            assert row.month == expected.month
+            assert row.balance == pytest.approx(expected.balance, abs=1e-6)
+
+    def test_book_schedule_indexing(self):
+        """Test that rows of a book map to the right loan and month"""
+        source = BookSchedule([(1000.0, 12, 10.0), (2000.0, 3, 5.0), (3000.0, 24, 7.0)])
+
+        assert len(source) == 39
+        assert (source.row(0)[0], source.row(0)[1].month) == (1, 1)
+        assert (source.row(11)[0], source.row(11)[1].month) == (1, 12)
+        assert (source.row(12)[0], source.row(12)[1].month) == (2, 1)
+        assert (source.row(38)[0], source.row(38)[1].month) == (3, 24)
+        with pytest.raises(IndexError):
+            source.row(39)
+
+    def test_million_row_book_is_not_materialized(self):
+        """Test that a million-row view keeps only loan parameters in memory"""
+        tracemalloc.start()
+        source = BookSchedule((100000.0 + i, 360, 12.0) for i in range(2800))
+        rows = [source.row(i) for i in range(len(source) - 10, len(source))]
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert len(source) == 1008000
+        assert rows[-1][1].balance == 0.0
+        assert peak < 5 * 1024 * 1024
+
+    def test_plan_schedule_follows_edits(self):
+        """Test that a plan source reflects event edits without rebuilding"""
+        incremental = IncrementalPlan(100000.0, 36, 12.0)
+        source = PlanSchedule(incremental)
+
+        incremental.add_event(Prepayment(12, 50000.0))
+
+        expected = list(plan_rows(plan_loan(100000.0, 36, 12.0, [Prepayment(12, 50000.0)])))
+        assert len(source) == len(expected) < 36
+        assert source.row(11)[1] == pytest.approx(expected[11])
+
+    def test_format_row(self):
+        """Test cell formatting"""
+        number, row = LoanSchedule(1200.0, 12, 12.0).row(0)
+
+        assert format_row(number, row)[:3] == (1, 1, f"{row.payment:.2f}")
+
+
+class TestScheduleView:
+    """Test class for the virtualized Treeview"""
+
+    @pytest.fixture
+    def view(self):
+        """Create a ScheduleView with mocked ttk widgets"""
+        with patch.object(ttk.Frame, '__init__', return_value=None), \
+             patch('schedule_view.ttk.Treeview') as mock_tree, \
+             patch('schedule_view.ttk.Scrollbar'):
+            ids = itertools.count()
+            mock_tree.return_value.insert.side_effect = lambda *args, **kwargs: f"I{next(ids)}"
+            yield ScheduleView(MagicMock(), height=5)
+
+    def _shown(self, view):
+        return {c.args[0]: c.kwargs["values"] for c in view.tree.item.call_args_list}
+
+    def test_fixed_number_of_items(self, view):
+        """Test that the tree holds exactly height items"""
+        assert view.tree.insert.call_count == 5
+
+    def test_set_source_renders_first_window(self, view):
+        """Test that only the visible window is rendered"""
+        view.tree.item.reset_mock()
+
+        view.set_source(LoanSchedule(100000.0, 360, 12.0))
+
+        shown = self._shown(view)
+        assert len(shown) == 5
+        assert [values[1] for values in shown.values()] == [1, 2, 3, 4, 5]
+        view.scrollbar.set.assert_called_with(0.0, 5 / 360)
+        view.tree.configure.assert_called_with(displaycolumns=["month", "payment", "interest", "principal",
+                                                               "balance"])
+
+    def test_scrollbar_moveto(self, view):
+        """Test jumping with the scrollbar"""
+        view.set_source(LoanSchedule(100000.0, 360, 12.0))
+        view.tree.item.reset_mock()
+
+        view.yview("moveto", "0.5")
+
+        assert view.first == 180
+        assert [values[1] for values in self._shown(view).values()] == [181, 182, 183, 184, 185]
+
+    def test_scroll_is_clamped(self, view):
+        """Test that scrolling stops at the last full window"""
+        view.set_source(LoanSchedule(100000.0, 12, 12.0))
+
+        view.yview("scroll", "10", "pages")
+        assert view.first == 7
+        view.yview("scroll", "-100", "units")
+        assert view.first == 0
+
+    def test_mouse_wheel(self, view):
+        """Test wheel events on Windows/macOS and X11"""
+        view.set_source(LoanSchedule(100000.0, 360, 12.0))
+
+        assert view._on_wheel(MagicMock(num=5, delta=0)) == "break"
+        assert view.first == 3
+        view._on_wheel(MagicMock(num=4, delta=0))
+        assert view.first == 0
+        view._on_wheel(MagicMock(num=None, delta=-120))
+        assert view.first == 3
+
+    def test_short_source_blanks_remaining_items(self, view):
+        """Test that items past the end of a short schedule are cleared"""
+        view.set_source(LoanSchedule(1000.0, 2, 12.0))
+
+        assert list(self._shown(view).values())[-3:] == [(), (), ()]
+
+    def test_book_shows_loan_column(self, view):
+        """Test that the loan number column is shown for a book"""
+        view.set_source(BookSchedule([(1000.0, 12, 10.0), (2000.0, 12, 10.0)]))
+
+        assert "loan" in view.tree.configure.call_args.kwargs["displaycolumns"]
+
+    def test_diff_below_window_skips_render(self, view):
+        """Test that an edit below the visible rows does not touch the items"""
+        incremental = IncrementalPlan(100000.0, 360, 12.0)
+        view.set_source(PlanSchedule(incremental))
+        view.tree.item.reset_mock()
+
+        view.apply_diff(incremental.add_event(Prepayment(100, 1000.0)))
+        assert not view.tree.item.called
+
+        view.apply_diff(incremental.add_event(Prepayment(2, 1000.0)))
+        assert [values[1] for values in self._shown(view).values()] == [1, 2, 3, 4, 5]
+
+    def test_diff_shortening_schedule_moves_window(self, view):
+        """Test that the window is clamped when an edit shortens the schedule"""
+        incremental = IncrementalPlan(100000.0, 360, 12.0)
+        view.set_source(PlanSchedule(incremental))
+        view.scroll_to(350)
+
+        view.apply_diff(incremental.add_event(Prepayment(12, 90000.0)))
+
+        assert view.first == len(view.source) - 5
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
@@ -0,0 +1,261 @@
+import pytest
+import asyncio
+import json
+import os
+import tempfile
+from unittest.mock import patch
+from db import init_db, save_rate
+from engine import quote_loan
+from quote_cache import QuoteCache
+from service import QuoteService, Request, encode_response
+
+
+async def _read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    length = next(int(line.split(b":", 1)[1]) for line in head.split(b"\r\n")
+                  if line.lower().startswith(b"content-length:"))
+    return status, json.loads(await reader.readexactly(length))
+
+
+def _request(method, path, payload=None, close=False):
+    body = json.dumps(payload).encode() if payload is not None else b""
+    headers = f"{method} {path} HTTP/1.1\r\nHost: test\r\nContent-Length: {len(body)}\r\n"
+    if close:
+        headers += "Connection: close\r\n"
+    return headers.encode() + b"\r\n" + body
+
+
+class TestQuoteService:
+    """Test class for the asyncio JSON-over-HTTP quote service"""
+
+    @pytest.fixture
+    def temp_db(self):
+        """Create a temporary database for testing"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        temp_file.close()
+
+        with patch('db.DB_NAME', temp_file.name):
+            init_db()
+            yield temp_file.name
+
+        try:
+            os.unlink(temp_file.name)
+        except (PermissionError, FileNotFoundError):
+            pass
+
+    def exchange(self, *raw_requests, cache=None, eof=False):
+        """Start a service, send raw bytes on one connection and collect the responses"""
+        async def scenario():
+            service = QuoteService(cache=cache)
+            server = await service.start("127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            try:
+                reader, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.write(b"".join(raw_requests))
+                await writer.drain()
+                if eof:
+                    writer.write_eof()
+                responses = [await _read_response(reader) for _ in raw_requests]
+                writer.close()
+                return responses
+            finally:
+                server.close()
+                await server.wait_closed()
+                await service.close()
+
+        return asyncio.run(scenario())
+
+    def test_quote(self):
+        """Test the /quote endpoint against the engine"""
+        [(status, body)] = self.exchange(_request("POST", "/quote", {"loan": 100000, "months": 12, "annual": 17}))
+
+        expected = quote_loan(100000.0, 12, 17.0)
+        assert status == 200
+        assert body == {"payment": round(expected.payment, 2), "total": round(expected.total, 2),
+                        "interest": round(expected.interest, 2)}
+
+    def test_pipelined_requests_answered_in_order(self):
+        """Test that pipelined requests on one connection are answered in order"""
+        responses = self.exchange(
+            _request("POST", "/quote", {"loan": 1000, "months": 12, "annual": 10}),
+            _request("GET", "/health"),
+            _request("POST", "/quote", {"loan": 2000, "months": 12, "annual": 10}),
+        )
+
+        assert [status for status, _ in responses] == [200, 200, 200]
+        assert responses[1][1] == {"status": "ok"}
+        assert responses[2][1]["payment"] == pytest.approx(2 * responses[0][1]["payment"], abs=0.01)
+
+    def test_schedule(self):
+        """Test the /schedule endpoint"""
+        [(status, body)] = self.exchange(_request("POST", "/schedule", {"loan": 12000, "months": 12, "annual": 12}))
+
+        assert status == 200
+        assert len(body["rows"]) == 12
+        assert body["rows"][-1][4] == 0.0
+
+    def test_quote_cache(self, temp_db):
+        """Test that repeat quotes and schedules are served from the result cache"""
+        loan = {"loan": 12000, "months": 12, "annual": 12}
+        requests = [_request("POST", path, loan) for path in ("/quote", "/schedule")]
+        cache = QuoteCache()
+        first = self.exchange(*requests, cache=cache)
+        second = self.exchange(*requests, cache=cache)
+
+        assert first == second == self.exchange(*requests)
+        stats = cache.stats()
+        assert stats["hits"] == 2 and stats["misses"] == 2
+
+    def test_batch(self):
+        """Test that the batch endpoint prices every loan and reports bad ones"""
+        loans = [{"loan": 1000, "months": 12, "annual": 10}, {"loan": -1, "months": 12, "annual": 10}]
+        [(status, body)] = self.exchange(_request("POST", "/batch", {"loans": loans}))
+
+        assert status == 200
+        assert "payment" in body["quotes"][0]
+        assert body["quotes"][1] == {"error": "Сумма кредита должна быть > 0 RUB"}
+
+    def test_non_finite_inputs(self):
+        """Test that NaN and overflowing numbers are a 400, and only fail their own batch item"""
+        responses = self.exchange(
+            _request("POST", "/quote", {"loan": "nan", "months": 12, "annual": 10}),
+            _request("POST", "/quote", {"loan": 1000, "months": float("inf"), "annual": 10}),
+            _request("POST", "/quote", {"loan": 10 ** 400, "months": 12, "annual": 10}),
+            _request("POST", "/batch", {"loans": [{"loan": 1000, "months": float("inf"), "annual": 10},
+                                                  {"loan": 1000, "months": 12, "annual": 10}]}),
+        )
+
+        assert [status for status, _ in responses] == [400, 400, 400, 200]
+        quotes = responses[3][1]["quotes"]
+        assert quotes[0] == {"error": "months must be an integer"}
+        assert "payment" in quotes[1]
+
+    def test_refinance(self):
+        """Test that the best offers come back ranked by NPV"""
+        offers = [{"annual": 16, "months": 60}, {"annual": 9, "months": 60, "fee": 3000},
+                  {"annual": 11, "months": 48}]
+        responses = self.exchange(
+            _request("POST", "/refinance", {"loan": {"loan": 500000, "months": 60, "annual": 15},
+                                            "offers": offers, "k": 2}),
+            _request("POST", "/refinance", {"loan": {"loan": 500000, "months": 60, "annual": 15},
+                                            "offers": [{"annual": 9, "months": 0}]}),
+        )
+
+        [(status, body), (bad_status, bad_body)] = responses
+        assert status == 200
+        assert body["count"] == 3
+        assert [offer["index"] for offer in body["offers"]] == [1, 2]
+        assert body["offers"][0]["npv"] > body["offers"][1]["npv"] > 0
+        assert bad_status == 400 and bad_body["error"] == "Invalid offer at index 0"
+
+    def test_refinance_rejects_huge_and_non_finite_numbers(self):
+        """Test that overflowing and NaN parameters and oversized offer terms are a 400"""
+        loan = {"loan": 500000, "months": 60, "annual": 15}
+        offers = [{"annual": 9, "months": 60}]
+        responses = self.exchange(
+            _request("POST", "/refinance", {"loan": loan, "offers": offers, "paid_months": float("inf")}),
+            _request("POST", "/refinance", {"loan": loan, "offers": offers, "discount_annual": "nan"}),
+            _request("POST", "/refinance", {"loan": loan, "offers": [{"annual": 9, "months": 1e300}]}),
+        )
+
+        assert [status for status, _ in responses] == [400, 400, 400]
+        assert responses[2][1]["error"] == "Invalid offer at index 0"
+
+    def test_convert(self, temp_db):
+        """Test conversion through the stored rates"""
+        save_rate(1, 'USD', 75.0)
+
+        [(status, body)] = self.exchange(_request("POST", "/convert", {"amount": 1000, "currency": "usd"}))
+
+        assert status == 200
+        assert body["converted"] == round(1000 / 75.0, 2)
+
+    def test_convert_missing_rate(self, temp_db):
+        """Test conversion into a currency without a stored rate"""
+        [(status, body)] = self.exchange(_request("POST", "/convert", {"amount": 1000, "currency": "XXX"}))
+
+        assert status == 404
+
+    def test_convert_non_finite_amount(self, temp_db):
+        """Test that infinite and NaN amounts are a 400 instead of a non-JSON body"""
+        save_rate(1, 'USD', 75.0)
+        body = b'{"amount": 1e400}'
+        raw = f"POST /convert HTTP/1.1\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+        responses = self.exchange(raw, _request("POST", "/convert", {"amount": float("nan")}))
+
+        assert [status for status, _ in responses] == [400, 400]
+
+    def test_tiny_rate_is_finite(self):
+        """Test that a rate below machine precision is quoted like a zero rate"""
+        responses = self.exchange(_request("POST", "/quote", {"loan": 1200, "months": 12, "annual": 1e-20}),
+                                  _request("POST", "/batch", {"loans": [{"loan": 1200, "months": 12,
+                                                                         "annual": 1e-20}]}))
+
+        assert responses[0] == (200, {"payment": 100.0, "total": 1200.0, "interest": 0.0})
+        assert responses[1] == (200, {"quotes": [{"payment": 100.0, "total": 1200.0, "interest": 0.0}]})
+
+    def test_non_finite_result_is_never_a_200(self):
+        """Test that a payload with NaN becomes a 500 with a valid JSON body"""
+        async def nan_health(data):
+            return {"value": float("nan")}
+
+        async def scenario():
+            service = QuoteService()
+            service.routes[("GET", "/health")] = nan_health
+            try:
+                return await service.respond(Request("GET", "/health", {}, b"", False))
+            finally:
+                await service.close()
+
+        data = asyncio.run(scenario())
+        assert data.startswith(b"HTTP/1.1 500 ")
+        assert json.loads(data.split(b"\r\n\r\n", 1)[1]) == {"error": "Result is not a finite number"}
+        with pytest.raises(ValueError):
+            encode_response(200, {"a": float("inf")}, keep_alive=False)
+
+    def test_validation_errors(self):
+        """Test rejected inputs"""
+        responses = self.exchange(
+            _request("POST", "/quote", {"loan": 1000, "months": 1.5, "annual": 10}),
+            _request("POST", "/quote", {"loan": 1000, "annual": 10}),
+            _request("POST", "/quote", {"loan": 1000, "months": 12, "annual": 0}),
+        )
+
+        assert [status for status, _ in responses] == [400, 400, 400]
+        assert responses[2][1]["error"] == "Процентная ставка должна быть > 0 %"
+
+    def test_bad_content_length(self):
+        """Test that a negative length and a body cut short are answered with a 400"""
+        [(status, body)] = self.exchange(b"POST /quote HTTP/1.1\r\nContent-Length: -5\r\n\r\n")
+        assert status == 400 and body == {"error": "Invalid Content-Length"}
+
+        [(status, body)] = self.exchange(b"POST /quote HTTP/1.1\r\nContent-Length: 50\r\n\r\n{\"loan\"", eof=True)
+        assert status == 400 and body == {"error": "Incomplete request body"}
+
+    def test_unknown_route_and_method(self):
+        """Test 404 and 405 responses"""
+        responses = self.exchange(_request("GET", "/nope"), _request("GET", "/quote", close=True))
+
+        assert [status for status, _ in responses] == [404, 405]
+
+    def test_metrics_include_breaker_state(self):
+        """Test that /metrics exposes the rates API circuit breaker"""
+        [(status, body)] = self.exchange(_request("GET", "/metrics"))
+
+        assert status == 200
+        assert body["rates_api"]["state"] == "closed"
+
+    def test_encode_response(self):
+        """Test the HTTP response framing"""
+        data = encode_response(200, {"a": 1}, keep_alive=False)
+
+        assert data.startswith(b"HTTP/1.1 200 OK\r\n")
+        assert b"Content-Length: 8\r\n" in data
+        assert b"Connection: close\r\n" in data
+        assert data.endswith(b'\r\n\r\n{"a": 1}')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])
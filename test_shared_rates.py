@@ -0,0 +1,96 @@
+import pytest
+import multiprocessing
+import os
+import tempfile
+from unittest.mock import patch
+from db import init_db, save_rate
+from shared_rates import SharedRatesTable, init_worker, worker_rate
+
+
+def _worker_lookup(code):
+    return os.getpid(), worker_rate(code)
+
+
+class TestSharedRatesTable:
+    """Test class for the shared-memory rates table"""
+
+    @pytest.fixture
+    def table(self):
+        table = SharedRatesTable.create({"USD": 75.5, "EUR": 82.3}, capacity=8)
+        yield table
+        table.close()
+        table.unlink()
+
+    def test_create_and_read(self, table):
+        """Test that published rates are readable by the owner"""
+        assert table.get("USD") == 75.5
+        assert table.get("EUR") == 82.3
+        assert table.get("GBP") is None
+        assert table.rates() == {"EUR": 82.3, "USD": 75.5}
+
+    def test_generation_is_even_after_publish(self, table):
+        """Test that each publish advances the generation by two"""
+        before = table.generation
+
+        after = table.publish({"USD": 80.0})
+
+        assert after == before + 2
+        assert after % 2 == 0
+
+    def test_attached_reader_sees_new_generation(self, table):
+        """Test that an attached reader picks up a mid-run refresh"""
+        reader = SharedRatesTable.attach(table.name)
+        try:
+            assert reader.get("USD") == 75.5
+
+            table.publish({"USD": 80.0, "GBP": 95.0})
+
+            assert reader.get("USD") == 80.0
+            assert reader.get("GBP") == 95.0
+            assert reader.get("EUR") is None
+        finally:
+            reader.close()
+
+    def test_reader_cannot_publish(self, table):
+        """Test that only the creating process may publish"""
+        reader = SharedRatesTable.attach(table.name)
+        try:
+            with pytest.raises(PermissionError):
+                reader.publish({"USD": 1.0})
+        finally:
+            reader.close()
+
+    def test_capacity_exceeded(self, table):
+        """Test that publishing more rates than the capacity fails cleanly"""
+        before = table.generation
+
+        with pytest.raises(ValueError):
+            table.publish({f"C{i:02d}": 1.0 for i in range(9)})
+
+        assert table.generation == before
+        assert table.get("USD") == 75.5
+
+    def test_from_db(self):
+        """Test filling the table from the rates database"""
+        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix='.db')
+        temp_file.close()
+        try:
+            with patch('db.DB_NAME', temp_file.name):
+                init_db()
+                save_rate(1, 'USD', 75.5)
+                save_rate(2, 'EUR', 82.3)
+                with SharedRatesTable.from_db(capacity=4) as table:
+                    assert table.rates() == {"USD": 75.5, "EUR": 82.3}
+        finally:
+            os.unlink(temp_file.name)
+
+    def test_pool_workers_attach_by_name(self, table):
+        """Test that pool workers read rates through the shared segment"""
+        with multiprocessing.Pool(2, initializer=init_worker, initargs=(table.name,)) as pool:
+            results = pool.map(_worker_lookup, ["USD", "EUR", "GBP"])
+
+        assert [rate for _, rate in results] == [75.5, 82.3, None]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__])